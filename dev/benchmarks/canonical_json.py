@@ -0,0 +1,105 @@
+"""
+Compares the canonical JSON backends of reconcile.utils.canonical_json on
+Deployment and Secret bodies like the ones OpenshiftResource hashes, and
+checks that every backend produces the same output as json.dumps.
+
+    uv run python dev/benchmarks/canonical_json.py
+"""
+
+import argparse
+import base64
+import json
+import timeit
+from typing import Any
+
+from reconcile.utils import canonical_json
+
+
+def deployment() -> dict[str, Any]:
+    return {
+        "apiVersion": "apps/v1",
+        "kind": "Deployment",
+        "metadata": {
+            "name": "backend",
+            "labels": {"app": "backend", "component": "api", "tier": "web"},
+            "annotations": {"deployment.kubernetes.io/revision": "42"},
+        },
+        "spec": {
+            "replicas": 3,
+            "selector": {"matchLabels": {"app": "backend"}},
+            "strategy": {
+                "type": "RollingUpdate",
+                "rollingUpdate": {"maxSurge": "25%", "maxUnavailable": 0},
+            },
+            "template": {
+                "metadata": {"labels": {"app": "backend"}},
+                "spec": {
+                    "serviceAccountName": "backend",
+                    "containers": [
+                        {
+                            "name": name,
+                            "image": f"quay.io/app-sre/{name}:0123456789abcdef",
+                            "args": ["--port", "8080", "--log-level", "info"],
+                            "env": [
+                                {"name": f"SETTING_{i}", "value": f"value-{i}"}
+                                for i in range(25)
+                            ],
+                            "ports": [{"containerPort": 8080, "name": "http"}],
+                            "resources": {
+                                "limits": {"cpu": "1", "memory": "1Gi"},
+                                "requests": {"cpu": "100m", "memory": "512Mi"},
+                            },
+                            "readinessProbe": {
+                                "httpGet": {"path": "/ready", "port": 8080},
+                                "periodSeconds": 10,
+                            },
+                        }
+                        for name in ("api", "worker")
+                    ],
+                },
+            },
+        },
+    }
+
+
+def secret() -> dict[str, Any]:
+    return {
+        "apiVersion": "v1",
+        "kind": "Secret",
+        "type": "Opaque",
+        "metadata": {"name": "backend-credentials", "annotations": {}},
+        "data": {
+            f"key-{i}": base64.b64encode(f"secret-value-{i}".encode() * 4).decode()
+            for i in range(10)
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    for name, body in (("Deployment", deployment()), ("Secret", secret())):
+        expected = json.dumps(body, sort_keys=True)
+        print(f"{name} ({len(expected)} bytes)")
+        reference = 0.0
+        for backend, serializer in canonical_json.backends().items():
+            assert serializer(body) == expected, f"{backend} output differs"
+            seconds = min(
+                timeit.repeat(
+                    "serializer(body)",
+                    globals={"serializer": serializer, "body": body},
+                    number=args.number,
+                    repeat=5,
+                )
+            )
+            reference = reference or seconds
+            print(
+                f"  {backend:8s} {seconds / args.number * 1e6:8.2f} us/call "
+                f"{reference / seconds:5.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Peak memory (max RSS) of populating a ResourceInventory and realizing it in
+dry-run mode, the way openshift-resources does it, with the inventory kept
+plain, compact or spilled to disk.
+
+The current resources are the desired ones as a cluster returns them:
+annotated, with status and managedFields. --changed of them differ from the
+desired state. Each mode runs in its own process, so the peaks don't mix:
+
+    uv run python dev/benchmarks/realize_memory.py
+    uv run python dev/benchmarks/realize_memory.py --spill-dir /tmp
+"""
+
+import argparse
+import logging
+import multiprocessing
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from reconcile.openshift_base import realize_data
+from reconcile.utils.openshift_resource import (
+    OpenshiftResource,
+    ResourceInventory,
+)
+
+KIND = "ConfigMap"
+CLUSTER = "cluster"
+
+
+class DryRunOCMap:
+    def get_cluster(self, cluster: str, privileged: bool = False) -> None:
+        return None
+
+
+def build_body(namespace: str, index: int, size: int) -> dict[str, Any]:
+    return {
+        "apiVersion": "v1",
+        "kind": KIND,
+        "metadata": {"name": f"config-{index}", "labels": {"app": "benchmark"}},
+        "data": {f"key-{i}": f"{namespace}-{index}-{i}".ljust(size) for i in range(32)},
+    }
+
+
+def current_body(desired: OpenshiftResource, changed: bool) -> dict[str, Any]:
+    body = desired.annotate().body
+    body["metadata"] |= {
+        "resourceVersion": "1",
+        "uid": "uid",
+        "managedFields": [{"manager": "qontract-reconcile", "fieldsV1": {}}],
+    }
+    if changed:
+        body["data"]["key-0"] = "changed"
+    return body
+
+
+def max_rss_mb() -> float:
+    # kilobytes on linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+
+
+def run(mode: str, args: argparse.Namespace) -> tuple[float, float, float]:
+    ri = ResourceInventory(
+        compact=mode != "plain",
+        spill_dir=args.spill_dir if mode == "spill" else None,
+    )
+    changed_every = int(1 / args.changed) if args.changed else 0
+    for n in range(args.namespaces):
+        namespace = f"namespace-{n}"
+        ri.initialize_resource_type(CLUSTER, namespace, KIND)
+        for index in range(args.resources):
+            body = build_body(namespace, index, args.value_size)
+            desired = OpenshiftResource(body, "benchmark", "1.0")
+            changed = bool(changed_every) and index % changed_every == 0
+            current = OpenshiftResource(
+                current_body(desired, changed), "benchmark", "1.0"
+            )
+            ri.add_current(CLUSTER, namespace, KIND, desired.name, current)
+            ri.add_desired(CLUSTER, namespace, KIND, desired.name, desired)
+    populated = max_rss_mb()
+
+    start = time.perf_counter()
+    realize_data(
+        True,
+        DryRunOCMap(),  # type: ignore[arg-type]
+        ri,
+        thread_pool_size=args.threads,
+        recycle_pods=False,
+    )
+    return populated, max_rss_mb(), time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--namespaces", type=int, default=100)
+    parser.add_argument("--resources", type=int, default=100)
+    parser.add_argument("--value-size", type=int, default=256)
+    parser.add_argument("--changed", type=float, default=0.05)
+    parser.add_argument("--threads", type=int, default=10)
+    parser.add_argument("--spill-dir", help="also run with the bodies on disk")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    modes = ["plain", "compact"] + (["spill"] if args.spill_dir else [])
+    context = multiprocessing.get_context("spawn")
+    for mode in modes:
+        with ProcessPoolExecutor(1, mp_context=context) as pool:
+            populated, peak, seconds = pool.submit(run, mode, args).result()
+        print(
+            f"{mode:8s} populated {populated:8.1f}MB, realize peak {peak:8.1f}MB, "
+            f"realize {seconds:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Throughput of populating a ResourceInventory from parallel fetch threads,
+the way openshift_base.fetch_current_state and the desired state fetchers
+do it.
+
+Each task fetches one (cluster, namespace) - simulated by a sleep, which
+releases the GIL like a real API call - and adds its resources to the
+inventory. Compare thread counts and the number of lock stripes:
+
+    uv run python dev/benchmarks/resource_inventory.py
+    uv run python dev/benchmarks/resource_inventory.py --stripes 1 --compact
+    uv run python dev/benchmarks/resource_inventory.py --spill-dir /tmp
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from reconcile.utils import openshift_resource
+from reconcile.utils.openshift_resource import (
+    OpenshiftResource,
+    ResourceInventory,
+)
+
+KIND = "ConfigMap"
+
+
+def build_body(namespace: str, index: int) -> dict:
+    return {
+        "apiVersion": "v1",
+        "kind": KIND,
+        "metadata": {
+            "name": f"config-{index}",
+            "labels": {"app": "benchmark", "namespace": namespace},
+        },
+        "data": {f"key-{i}": f"{namespace}-{index}-{i}" * 8 for i in range(32)},
+    }
+
+
+def populate(
+    ri: ResourceInventory,
+    cluster: str,
+    namespace: str,
+    resources: int,
+    latency: float,
+) -> None:
+    time.sleep(latency)
+    for index in range(resources):
+        resource = OpenshiftResource(build_body(namespace, index), "benchmark", "1.0")
+        ri.add_current(cluster, namespace, KIND, resource.name, resource)
+        ri.add_desired(cluster, namespace, KIND, resource.name, resource)
+
+
+def run(threads: int, args: argparse.Namespace) -> float:
+    ri = ResourceInventory(compact=args.compact, spill_dir=args.spill_dir)
+    tasks = [
+        (f"cluster-{c}", f"namespace-{n}")
+        for c in range(args.clusters)
+        for n in range(args.namespaces)
+    ]
+    for cluster, namespace in tasks:
+        ri.initialize_resource_type(cluster, namespace, KIND)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        for future in [
+            pool.submit(populate, ri, cluster, namespace, args.resources, args.latency)
+            for cluster, namespace in tasks
+        ]:
+            future.result()
+    return len(tasks) * args.resources / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clusters", type=int, default=8)
+    parser.add_argument("--namespaces", type=int, default=32)
+    parser.add_argument("--resources", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per fetch")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument(
+        "--stripes",
+        type=int,
+        default=openshift_resource.INVENTORY_LOCK_STRIPES,
+        help="1 behaves like a single inventory lock",
+    )
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--spill-dir", help="keep the bodies on disk in this directory")
+    args = parser.parse_args()
+
+    openshift_resource.INVENTORY_LOCK_STRIPES = args.stripes
+    print(f"stripes={args.stripes} compact={args.compact} spill_dir={args.spill_dir}")
+    baseline = 0.0
+    for threads in args.threads:
+        throughput = run(threads, args)
+        baseline = baseline or throughput
+        print(
+            f"threads={threads:3d} {throughput:10.0f} resources/s "
+            f"{throughput / baseline:5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compares validating the results of the biggest generated queries with
+building them with reconcile.utils.trusted_models.construct, and checks that
+both produce the same objects.
+
+The results are made up from the data classes: every optional value is set
+up to --depth levels, and every list has --items items. The top level lists,
+e.g. all namespaces, have --objects items.
+
+    uv run python dev/benchmarks/trusted_models.py
+"""
+
+import argparse
+import time
+from typing import Any
+
+from pydantic import BaseModel
+from pydantic.fields import (
+    SHAPE_DICT,
+    SHAPE_LIST,
+    ModelField,
+)
+
+from reconcile.gql_definitions.common.clusters import ClustersQueryData
+from reconcile.gql_definitions.common.namespaces import NamespacesQueryData
+from reconcile.gql_definitions.common.saas_files import SaasFilesQueryData
+from reconcile.utils.trusted_models import construct
+
+QUERIES: list[type[BaseModel]] = [
+    NamespacesQueryData,
+    SaasFilesQueryData,
+    ClustersQueryData,
+]
+
+SCALARS: dict[Any, Any] = {str: "value", int: 1, float: 1.5, bool: True}
+
+
+def value(field: ModelField, depth: int, items: int) -> Any:
+    if field.allow_none and depth <= 0:
+        return None
+    if field.parse_json:
+        return '{"key": "value"}'
+    if field.shape == SHAPE_LIST:
+        item_field = field.sub_fields[0]  # type: ignore[index]
+        return [value(item_field, depth - 1, items) for _ in range(items)]
+    if field.shape == SHAPE_DICT:
+        return {"key": "value"}
+    if field.sub_fields:
+        return value(field.sub_fields[0], depth, items)
+    if isinstance(field.type_, type) and issubclass(field.type_, BaseModel):
+        return data(field.type_, depth - 1, items)
+    return SCALARS.get(field.type_, "value")
+
+
+def data(model: type[BaseModel], depth: int, items: int) -> dict[str, Any]:
+    return {
+        field.alias: value(field, depth, items) for field in model.__fields__.values()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--objects", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=2)
+    parser.add_argument("--depth", type=int, default=4)
+    args = parser.parse_args()
+
+    for model in QUERIES:
+        raw = data(model, args.depth + 1, args.items)
+        # the first field is the list of all objects
+        field = next(iter(model.__fields__.values()))
+        item = raw[field.alias][0]
+        raw[field.alias] = [item] * args.objects
+
+        start = time.perf_counter()
+        validated = model.parse_obj(raw)
+        validate_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        constructed = construct(model, raw)
+        construct_seconds = time.perf_counter() - start
+
+        assert constructed == validated, f"{model.__name__} differs"
+        print(
+            f"{model.__name__}: {args.objects} objects, "
+            f"validate {validate_seconds:.3f}s, construct {construct_seconds:.3f}s, "
+            f"{validate_seconds / construct_seconds:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
 import hashlib
-import json
 from abc import (
     ABC,
 )
@@ -32,6 +31,7 @@ from reconcile.gql_definitions.external_resources.fragments.external_resources_m
     ExternalResourcesModuleOverrides,
 )
 from reconcile.gql_definitions.fragments.deplopy_resources import DeployResourcesFields
+from reconcile.utils import canonical_json
 from reconcile.utils.exceptions import FetchResourceError
 from reconcile.utils.external_resource_spec import (
     ExternalResourceSpec,
@@ -84,7 +84,7 @@ class ExternalResourceKey(BaseModel, frozen=True):
 
     def hash(self) -> str:
         return hashlib.md5(
-            json.dumps(self.dict(), sort_keys=True).encode("utf-8")
+            canonical_json.dumps(self.dict()).encode("utf-8")
         ).hexdigest()
 
     @property
@@ -405,6 +405,4 @@ class ExternalResource(BaseModel):
     provision: ExternalResourceProvision
 
     def hash(self) -> str:
-        return hashlib.md5(
-            json.dumps(self.data, sort_keys=True).encode("utf-8")
-        ).hexdigest()
+        return hashlib.md5(canonical_json.dumps(self.data).encode("utf-8")).hexdigest()
@@ -1,14 +1,22 @@
 import itertools
+import json
 import logging
-from collections import Counter
+import os
+from collections import (
+    Counter,
+    defaultdict,
+)
 from collections.abc import (
     Iterable,
     Mapping,
     Sequence,
 )
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import (
     dataclass,
     field,
+    fields,
+    replace,
 )
 from typing import (
     Any,
@@ -17,22 +25,24 @@ from typing import (
 )
 
 import yaml
-from sretoolbox.utils import (
-    retry,
-    threaded,
-)
+from sretoolbox.utils import retry
 
 from reconcile import queries
 from reconcile.utils import (
     differ,
     metrics,
 )
+from reconcile.utils.cluster_scheduler import (
+    ClusterDeadlineExceededError,
+    ClusterScheduler,
+)
 from reconcile.utils.oc import (
     DeploymentFieldIsImmutableError,
     FieldIsImmutableError,
     InvalidValueApplyError,
     MayNotChangeOnceSetError,
     MetaDataAnnotationsTooLongApplyError,
+    ObjectHasBeenModifiedError,
     OC_Map,
     OCCli,
     OCClient,
@@ -43,8 +53,10 @@ from reconcile.utils.oc import (
     StatusCodeError,
     UnsupportedMediaTypeError,
 )
+from reconcile.utils.oc_state_cache import cached_items
 from reconcile.utils.openshift_resource import OpenshiftResource as OR
 from reconcile.utils.openshift_resource import (
+    OpenshiftResourceInventoryBytesGauge,
     OpenshiftResourceInventoryGauge,
     ResourceInventory,
 )
@@ -53,6 +65,11 @@ from reconcile.utils.three_way_diff_strategy import three_way_diff_using_hash
 ACTION_APPLIED = "applied"
 ACTION_DELETED = "deleted"
 
+PLAN_REASON_NEW = "new"
+PLAN_REASON_MODIFIED = "modified"
+PLAN_REASON_TAKE_OVER = "take_over"
+PLAN_REASON_NOT_DESIRED = "not_desired"
+
 
 class ValidationError(Exception):
     pass
@@ -85,6 +102,49 @@ class DesiredStateSpec(BaseStateSpec):
 StateSpec = CurrentStateSpec | DesiredStateSpec
 
 
+@dataclass
+class ClusterCurrentStateSpec:
+    """Current state of a kind in many namespaces of a cluster, fetched with
+    a single all-namespaces LIST and partitioned into namespaces locally."""
+
+    oc: OCClient = field(compare=False, repr=False)
+    cluster: str
+    kind: str
+    namespaces: set[str]
+
+
+# a (cluster, kind) managed in at least this many namespaces is fetched with
+# one all-namespaces LIST instead of one LIST per namespace. 0 disables it.
+CLUSTER_WIDE_FETCH_NAMESPACE_THRESHOLD_ENV = "CLUSTER_WIDE_FETCH_NAMESPACE_THRESHOLD"
+
+# limits for the work scheduled per cluster when fetching and realizing
+# resources. 0 means no limit.
+CLUSTER_MAX_WORKERS_ENV = "OPENSHIFT_CLUSTER_MAX_WORKERS"
+CLUSTER_DEADLINE_SECONDS_ENV = "OPENSHIFT_CLUSTER_DEADLINE_SECONDS"
+
+# apply the resources of a namespace with one oc apply of a List
+BATCH_APPLY_ENV = "OPENSHIFT_BATCH_APPLY"
+# plan the actions of realize_data in this many processes. 0 plans in the
+# calling process.
+PLAN_PROCESSES_ENV = "OPENSHIFT_PLAN_PROCESSES"
+# print the planned actions as JSON in dry-run mode
+PRINT_PLAN_ENV = "OPENSHIFT_PRINT_PLAN"
+# errors of oc apply
+APPLY_ERRORS = (
+    StatusCodeError,
+    InvalidValueApplyError,
+    FieldIsImmutableError,
+    DeploymentFieldIsImmutableError,
+    MayNotChangeOnceSetError,
+    PrimaryClusterIPCanNotBeUnsetError,
+    MetaDataAnnotationsTooLongApplyError,
+    UnsupportedMediaTypeError,
+    StatefulSetUpdateForbidden,
+    ObjectHasBeenModifiedError,
+    RequestEntityTooLargeError,
+)
+
+
 @runtime_checkable
 class HasService(Protocol):
     """A service protocol."""
@@ -285,13 +345,158 @@ def init_specs_to_fetch(
     return state_specs
 
 
+def cluster_wide_fetch_namespace_threshold() -> int:
+    return int(os.environ.get(CLUSTER_WIDE_FETCH_NAMESPACE_THRESHOLD_ENV, "0"))
+
+
+def cluster_scheduler(name: str, thread_pool_size: int | None) -> ClusterScheduler:
+    max_workers = int(os.environ.get(CLUSTER_MAX_WORKERS_ENV, "0"))
+    deadline_seconds = float(os.environ.get(CLUSTER_DEADLINE_SECONDS_ENV, "0"))
+    return ClusterScheduler(
+        thread_pool_size,
+        max_workers_per_cluster=max_workers or None,
+        cluster_deadline_seconds=deadline_seconds or None,
+        name=name,
+    )
+
+
+def register_cluster_deadline_errors(
+    ri: ResourceInventory, results: Iterable[Any]
+) -> list[Any]:
+    """
+    Register an error for every cluster that had work skipped because it
+    exceeded its deadline, and return the remaining results.
+    """
+    remaining = []
+    for result in results:
+        if isinstance(result, ClusterDeadlineExceededError):
+            ri.register_error(cluster=result.cluster)
+            logging.error(str(result))
+        else:
+            remaining.append(result)
+    return remaining
+
+
+def group_current_state_specs(
+    state_specs: Iterable[StateSpec],
+    namespace_threshold: int | None = None,
+) -> list[StateSpec | ClusterCurrentStateSpec]:
+    """
+    Replace the CurrentStateSpecs of a (cluster, kind) that is managed in at
+    least namespace_threshold namespaces with a single ClusterCurrentStateSpec.
+
+    Only specs of namespaced kinds that are not restricted to managed resource
+    names are grouped. Specs using different clients (e.g. privileged ones)
+    are never grouped together.
+    """
+    if namespace_threshold is None:
+        namespace_threshold = cluster_wide_fetch_namespace_threshold()
+    if namespace_threshold <= 0:
+        return list(state_specs)
+
+    specs: list[StateSpec | ClusterCurrentStateSpec] = []
+    groups: dict[tuple[str, str, int], list[CurrentStateSpec]] = defaultdict(list)
+    for spec in state_specs:
+        if (
+            isinstance(spec, CurrentStateSpec)
+            and spec.namespace != "cluster"
+            and not spec.resource_names
+        ):
+            groups[spec.cluster, spec.kind, id(spec.oc)].append(spec)
+        else:
+            specs.append(spec)
+
+    for (cluster, kind, _), group in groups.items():
+        oc = group[0].oc
+        if (
+            len(group) < namespace_threshold
+            or not oc.is_kind_supported(kind)
+            or not oc.is_kind_namespaced(kind)
+        ):
+            specs.extend(group)
+            continue
+        specs.append(
+            ClusterCurrentStateSpec(
+                oc=oc,
+                cluster=cluster,
+                kind=kind,
+                namespaces={s.namespace for s in group},
+            )
+        )
+
+    return specs
+
+
+def populate_cluster_current_state(
+    spec: ClusterCurrentStateSpec,
+    ri: ResourceInventory,
+    integration: str,
+    integration_version: str,
+    caller: str | None = None,
+) -> None:
+    if not spec.oc.is_kind_supported(spec.kind):
+        msg = f"[{spec.cluster}] cluster has no API resource {spec.kind}."
+        logging.warning(msg)
+        return
+    try:
+        items: Iterable[dict[str, Any]] | None = cached_items(spec.oc, spec.kind, "")
+        if items is None:
+            items = spec.oc.iter_items(spec.kind, all_namespaces=True)
+        for item in items:
+            namespace = item["metadata"].get("namespace")
+            if namespace not in spec.namespaces:
+                continue
+            openshift_resource = OR(item, integration, integration_version)
+
+            if caller and openshift_resource.caller != caller:
+                continue
+
+            ri.add_current(
+                spec.cluster,
+                namespace,
+                spec.kind,
+                openshift_resource.name,
+                openshift_resource,
+            )
+    except StatusCodeError as e:
+        if "Forbidden" not in str(e):
+            ri.register_error(cluster=spec.cluster)
+            logging.error(f"[{spec.cluster}] {e!s}")
+            return
+        # the client is not allowed to list the kind across all namespaces,
+        # fall back to one LIST per namespace
+        logging.debug(
+            f"[{spec.cluster}] cluster wide fetch of {spec.kind} is forbidden, "
+            "fetching per namespace"
+        )
+        for namespace in sorted(spec.namespaces):
+            populate_current_state(
+                CurrentStateSpec(
+                    oc=spec.oc,
+                    cluster=spec.cluster,
+                    namespace=namespace,
+                    kind=spec.kind,
+                    resource_names=None,
+                ),
+                ri,
+                integration,
+                integration_version,
+                caller=caller,
+            )
+
+
 def populate_current_state(
-    spec: CurrentStateSpec,
+    spec: CurrentStateSpec | ClusterCurrentStateSpec,
     ri: ResourceInventory,
     integration: str,
     integration_version: str,
     caller: str | None = None,
 ):
+    if isinstance(spec, ClusterCurrentStateSpec):
+        populate_cluster_current_state(
+            spec, ri, integration, integration_version, caller=caller
+        )
+        return
     # if spec.oc is None: - oc can't be none because init_namespace_specs_to_fetch does not create specs if oc is none
     #    return
     if not spec.oc.is_kind_supported(spec.kind):
@@ -299,11 +504,16 @@ def populate_current_state(
         logging.warning(msg)
         return
     try:
-        for item in spec.oc.get_items(
-            spec.kind,
-            namespace=spec.namespace,
-            resource_names=spec.resource_names,
-        ):
+        items = cached_items(
+            spec.oc, spec.kind, spec.namespace, resource_names=spec.resource_names
+        )
+        if items is None:
+            items = spec.oc.get_items(
+                spec.kind,
+                namespace=spec.namespace,
+                resource_names=spec.resource_names,
+            )
+        for item in items:
             openshift_resource = OR(item, integration, integration_version)
 
             if caller and openshift_resource.caller != caller:
@@ -349,23 +559,26 @@ def fetch_current_state(
         cluster_admin=cluster_admin,
         init_projects=init_projects,
     )
-    state_specs = init_specs_to_fetch(
-        ri,
-        oc_map,
-        namespaces=namespaces,
-        clusters=clusters,
-        override_managed_types=override_managed_types,
-        cluster_admin=cluster_admin,
+    state_specs = group_current_state_specs(
+        init_specs_to_fetch(
+            ri,
+            oc_map,
+            namespaces=namespaces,
+            clusters=clusters,
+            override_managed_types=override_managed_types,
+            cluster_admin=cluster_admin,
+        )
     )
-    threaded.run(
+    results = cluster_scheduler("fetch_current_state", thread_pool_size).run(
         populate_current_state,
         state_specs,
-        thread_pool_size,
+        cluster_of=lambda spec: spec.cluster,
         ri=ri,
         integration=integration,
         integration_version=integration_version,
         caller=caller,
     )
+    register_cluster_deadline_errors(ri, results)
 
     return ri, oc_map
 
@@ -426,7 +639,7 @@ def apply(
             UnsupportedMediaTypeError,
             RequestEntityTooLargeError,
         ):
-            if not oc.get(
+            if not oc.get_metadata(
                 namespace, resource_type, resource.name, allow_not_found=True
             ):
                 oc.create(namespace, annotated)
@@ -535,6 +748,57 @@ def apply(
         oc.recycle_pods(dry_run, namespace, resource_type, resource)
 
 
+def apply_batch(
+    oc_map: ClusterMap,
+    cluster: str,
+    namespace: str,
+    resources: Sequence[tuple[str, OR]],
+    wait_for_namespace: bool,
+    recycle_pods: bool = True,
+    privileged: bool = False,
+) -> bool:
+    """
+    Applies (resource_type, resource) pairs of a namespace with a single oc
+    apply of a List instead of one per resource. Returns False if they were
+    not applied, they must be applied one by one with apply() then, which
+    handles the errors of the individual resources.
+    """
+    try:
+        oc = oc_map.get_cluster(cluster, privileged)
+    except OCLogMsg:
+        return False
+    if namespace != "cluster" and not oc.project_exists(namespace):
+        if not wait_for_namespace:
+            return False
+        logging.info(
+            f"[{cluster}/{namespace}] namespace does not exist (yet). waiting..."
+        )
+        wait_for_namespace_exists(oc, namespace)
+
+    try:
+        oc.apply_list(namespace, [resource.annotate() for _, resource in resources])
+    except APPLY_ERRORS:
+        # the error may contain Secret data, apply() reports the failing resources
+        logging.info(
+            f"[{cluster}/{namespace}] apply of {len(resources)} resources failed, "
+            "applying them one by one"
+        )
+        return False
+
+    for resource_type, resource in resources:
+        logging.info([
+            "apply",
+            f"privileged={privileged}",
+            cluster,
+            namespace,
+            resource_type,
+            resource.name,
+        ])
+        if recycle_pods:
+            oc.recycle_pods(False, namespace, resource_type, resource)
+    return True
+
+
 def create(dry_run, oc_map, cluster, namespace, resource_type, resource):
     logging.info(["create", cluster, namespace, resource_type, resource.name])
 
@@ -602,6 +866,45 @@ class ApplyOptions:
     all_callers: Sequence[str] | None
     privileged: bool | None
     enable_deletion: bool | None
+    batch_apply: bool = False
+
+
+@dataclass
+class PlannedAction:
+    """
+    A change realize_data decided to make, before it is made. Planning only
+    compares the current and desired states, so all actions of a run are
+    known before the first one is executed, e.g. to batch them per
+    namespace. to_dict() and from_dict() convert an action to plain data
+    and back, to print, cache or replay a plan; the resource body is not
+    part of it and is looked up in the inventory again.
+    """
+
+    action: str
+    reason: str
+    cluster: str
+    namespace: str
+    kind: str
+    name: str
+    privileged: bool
+    # the desired resource to apply, None for deletions
+    resource: OR | None = field(default=None, repr=False, compare=False)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            f.name: getattr(self, f.name) for f in fields(self) if f.name != "resource"
+        }
+
+    @classmethod
+    def from_dict(
+        cls, data: Mapping[str, Any], ri: ResourceInventory | None = None
+    ) -> "PlannedAction":
+        planned = cls(**data)
+        if ri is not None and planned.action == ACTION_APPLIED:
+            planned.resource = ri.get_desired(
+                planned.cluster, planned.namespace, planned.kind, planned.name
+            )
+        return planned
 
 
 def should_apply(
@@ -638,6 +941,10 @@ def should_apply(
     if logging.getLogger().isEnabledFor(logging.DEBUG):
         logging.debug("CURRENT: " + OR.serialize(OR.canonicalize(current.body)))
         logging.debug("DESIRED: " + OR.serialize(OR.canonicalize(desired.body)))
+        logging.debug(
+            "FIRST DIFFERENCE: "
+            + str(desired.obj_intersect_difference(desired.body, current.body))
+        )
 
     return True
 
@@ -665,6 +972,28 @@ def should_delete(
     return True
 
 
+def plan_new_resources(
+    new_resources: Mapping[Any, Any],
+    cluster: str,
+    namespace: str,
+    resource_type: str,
+    data: Mapping[Any, Any],
+) -> list[PlannedAction]:
+    return [
+        PlannedAction(
+            action=ACTION_APPLIED,
+            reason=PLAN_REASON_NEW,
+            cluster=cluster,
+            namespace=namespace,
+            kind=resource_type,
+            name=name,
+            privileged=data["use_admin_token"].get(name, False),
+            resource=desired,
+        )
+        for name, desired in new_resources.items()
+    ]
+
+
 def handle_new_resources(
     oc_map: ClusterMap,
     ri: ResourceInventory,
@@ -675,30 +1004,18 @@ def handle_new_resources(
     data: Mapping[Any, Any],
     options: ApplyOptions,
 ) -> list[dict[str, Any]]:
-    actions: list[dict[str, Any]] = []
-
-    for name, desired in new_resources.items():
-        options.privileged = data["use_admin_token"].get(name, False)
-        action = {
-            "action": ACTION_APPLIED,
-            "cluster": cluster,
-            "namespace": namespace,
-            "kind": resource_type,
-            "name": name,
-            "privileged": options.privileged,
-        }
-        actions.append(action)
-        apply_action(
-            oc_map=oc_map,
-            ri=ri,
+    return execute_actions(
+        oc_map=oc_map,
+        ri=ri,
+        planned_actions=plan_new_resources(
+            new_resources=new_resources,
             cluster=cluster,
             namespace=namespace,
             resource_type=resource_type,
-            resource=desired,
-            options=options,
-        )
-
-    return actions
+            data=data,
+        ),
+        options=options,
+    )
 
 
 def should_take_over(
@@ -725,8 +1042,7 @@ def should_take_over(
     return False
 
 
-def handle_identical_resources(
-    oc_map: ClusterMap,
+def plan_identical_resources(
     ri: ResourceInventory,
     identical_resources: Mapping[Any, Any],
     cluster: str,
@@ -734,10 +1050,19 @@ def handle_identical_resources(
     resource_type: str,
     data: Mapping[Any, Any],
     options: ApplyOptions,
-) -> list[dict[str, Any]]:
-    actions: list[dict[str, Any]] = []
-
-    for name, dp in identical_resources.items():
+) -> list[PlannedAction]:
+    return [
+        PlannedAction(
+            action=ACTION_APPLIED,
+            reason=PLAN_REASON_TAKE_OVER,
+            cluster=cluster,
+            namespace=namespace,
+            kind=resource_type,
+            name=name,
+            privileged=data["use_admin_token"].get(name, False),
+            resource=dp.desired,
+        )
+        for name, dp in identical_resources.items()
         if should_take_over(
             current=dp.current,
             ri=ri,
@@ -746,42 +1071,57 @@ def handle_identical_resources(
             namespace=namespace,
             resource_type=resource_type,
             options=options,
-        ):
-            options.privileged = data["use_admin_token"].get(name, False)
-            action = {
-                "action": ACTION_APPLIED,
-                "cluster": cluster,
-                "namespace": namespace,
-                "kind": resource_type,
-                "name": name,
-                "privileged": options.privileged,
-            }
-            actions.append(action)
-            apply_action(
-                oc_map=oc_map,
-                ri=ri,
-                cluster=cluster,
-                namespace=namespace,
-                resource_type=resource_type,
-                resource=dp.desired,
-                options=options,
-            )
-    return actions
+        )
+    ]
 
 
-def handle_modified_resources(
+def handle_identical_resources(
     oc_map: ClusterMap,
     ri: ResourceInventory,
-    modified_resources: Mapping[Any, Any],
+    identical_resources: Mapping[Any, Any],
     cluster: str,
     namespace: str,
     resource_type: str,
     data: Mapping[Any, Any],
     options: ApplyOptions,
 ) -> list[dict[str, Any]]:
-    actions: list[dict[str, Any]] = []
+    return execute_actions(
+        oc_map=oc_map,
+        ri=ri,
+        planned_actions=plan_identical_resources(
+            ri=ri,
+            identical_resources=identical_resources,
+            cluster=cluster,
+            namespace=namespace,
+            resource_type=resource_type,
+            data=data,
+            options=options,
+        ),
+        options=options,
+    )
+
 
-    for name, dp in modified_resources.items():
+def plan_modified_resources(
+    ri: ResourceInventory,
+    modified_resources: Mapping[Any, Any],
+    cluster: str,
+    namespace: str,
+    resource_type: str,
+    data: Mapping[Any, Any],
+    options: ApplyOptions,
+) -> list[PlannedAction]:
+    return [
+        PlannedAction(
+            action=ACTION_APPLIED,
+            reason=PLAN_REASON_MODIFIED,
+            cluster=cluster,
+            namespace=namespace,
+            kind=resource_type,
+            name=name,
+            privileged=data["use_admin_token"].get(name, False),
+            resource=dp.desired,
+        )
+        for name, dp in modified_resources.items()
         if should_apply(
             current=dp.current,
             desired=dp.desired,
@@ -791,42 +1131,55 @@ def handle_modified_resources(
             namespace=namespace,
             resource_type=resource_type,
             options=options,
-        ):
-            options.privileged = data["use_admin_token"].get(name, False)
-            action = {
-                "action": ACTION_APPLIED,
-                "cluster": cluster,
-                "namespace": namespace,
-                "kind": resource_type,
-                "name": name,
-                "privileged": options.privileged,
-            }
-            actions.append(action)
-            apply_action(
-                oc_map=oc_map,
-                ri=ri,
-                cluster=cluster,
-                namespace=namespace,
-                resource_type=resource_type,
-                resource=dp.desired,
-                options=options,
-            )
-    return actions
+        )
+    ]
 
 
-def handle_deleted_resources(
+def handle_modified_resources(
     oc_map: ClusterMap,
     ri: ResourceInventory,
-    deleted_resources: Mapping[Any, Any],
+    modified_resources: Mapping[Any, Any],
     cluster: str,
     namespace: str,
     resource_type: str,
     data: Mapping[Any, Any],
     options: ApplyOptions,
 ) -> list[dict[str, Any]]:
-    actions: list[dict[str, Any]] = []
+    return execute_actions(
+        oc_map=oc_map,
+        ri=ri,
+        planned_actions=plan_modified_resources(
+            ri=ri,
+            modified_resources=modified_resources,
+            cluster=cluster,
+            namespace=namespace,
+            resource_type=resource_type,
+            data=data,
+            options=options,
+        ),
+        options=options,
+    )
+
 
-    for name, current in deleted_resources.items():
+def plan_deleted_resources(
+    deleted_resources: Mapping[Any, Any],
+    cluster: str,
+    namespace: str,
+    resource_type: str,
+    data: Mapping[Any, Any],
+    options: ApplyOptions,
+) -> list[PlannedAction]:
+    return [
+        PlannedAction(
+            action=ACTION_DELETED,
+            reason=PLAN_REASON_NOT_DESIRED,
+            cluster=cluster,
+            namespace=namespace,
+            kind=resource_type,
+            name=name,
+            privileged=data["use_admin_token"].get(name, False),
+        )
+        for name, current in deleted_resources.items()
         if should_delete(
             current=current,
             cluster=cluster,
@@ -834,28 +1187,33 @@ def handle_deleted_resources(
             namespace=namespace,
             resource_type=resource_type,
             options=options,
-        ):
-            options.privileged = data["use_admin_token"].get(name, False)
-            action = {
-                "action": ACTION_DELETED,
-                "cluster": cluster,
-                "namespace": namespace,
-                "kind": resource_type,
-                "name": name,
-                "privileged": options.privileged,
-            }
-            actions.append(action)
-            delete_action(
-                oc_map=oc_map,
-                ri=ri,
-                cluster=cluster,
-                namespace=namespace,
-                resource_type=resource_type,
-                resource_name=name,
-                options=options,
-            )
+        )
+    ]
 
-    return actions
+
+def handle_deleted_resources(
+    oc_map: ClusterMap,
+    ri: ResourceInventory,
+    deleted_resources: Mapping[Any, Any],
+    cluster: str,
+    namespace: str,
+    resource_type: str,
+    data: Mapping[Any, Any],
+    options: ApplyOptions,
+) -> list[dict[str, Any]]:
+    return execute_actions(
+        oc_map=oc_map,
+        ri=ri,
+        planned_actions=plan_deleted_resources(
+            deleted_resources=deleted_resources,
+            cluster=cluster,
+            namespace=namespace,
+            resource_type=resource_type,
+            data=data,
+            options=options,
+        ),
+        options=options,
+    )
 
 
 def apply_action(
@@ -917,66 +1275,120 @@ def delete_action(
         logging.error(msg)
 
 
-def _realize_resource_data(
-    ri_item: tuple[str, str, str, Mapping[str, Any]],
-    dry_run: bool,
+def apply_batches(
     oc_map: ClusterMap,
-    ri: ResourceInventory,
-    take_over: bool,
-    caller: str,
-    all_callers: Sequence[str],
-    wait_for_namespace: bool,
-    no_dry_run_skip_compare: bool,
-    override_enable_deletion: bool,
-    recycle_pods: bool,
-) -> list[dict[str, Any]]:
-    options = ApplyOptions(
-        dry_run=dry_run,
-        no_dry_run_skip_compare=no_dry_run_skip_compare,
-        wait_for_namespace=wait_for_namespace,
-        override_enable_deletion=override_enable_deletion,
-        take_over=take_over,
-        caller=caller,
-        all_callers=all_callers,
-        recycle_pods=recycle_pods,
-        privileged=False,
-        enable_deletion=False,
-    )
-    return _realize_resource_data_3way_diff(
-        ri_item=ri_item, oc_map=oc_map, ri=ri, options=options
-    )
+    planned_actions: Sequence[PlannedAction],
+    options: ApplyOptions,
+) -> set[int]:
+    """
+    Applies the planned applies of each namespace with apply_batch and
+    returns the indexes of the actions done.
+    """
+    batches: dict[tuple[str, str, bool], list[int]] = defaultdict(list)
+    for index, planned in enumerate(planned_actions):
+        if planned.action == ACTION_APPLIED and planned.resource is not None:
+            key = (planned.cluster, planned.namespace, planned.privileged)
+            batches[key].append(index)
+
+    done: set[int] = set()
+    for (cluster, namespace, privileged), indexes in batches.items():
+        if len(indexes) < 2:
+            continue
+        resources = []
+        for index in indexes:
+            planned = planned_actions[index]
+            assert planned.resource is not None
+            resources.append((planned.kind, planned.resource))
+        if apply_batch(
+            oc_map=oc_map,
+            cluster=cluster,
+            namespace=namespace,
+            resources=resources,
+            wait_for_namespace=options.wait_for_namespace,
+            recycle_pods=options.recycle_pods,
+            privileged=privileged,
+        ):
+            done.update(indexes)
+    return done
 
 
-def _realize_resource_data_3way_diff(
-    ri_item: tuple[str, str, str, Mapping[str, Any]],
+def execute_actions(
     oc_map: ClusterMap,
     ri: ResourceInventory,
+    planned_actions: Iterable[PlannedAction],
     options: ApplyOptions,
 ) -> list[dict[str, Any]]:
-    cluster, namespace, resource_type, data = ri_item
-
-    actions: list[dict] = []
+    planned_actions = list(planned_actions)
+    done = (
+        apply_batches(oc_map, planned_actions, options)
+        if options.batch_apply and not options.dry_run
+        else set()
+    )
+    actions: list[dict[str, Any]] = []
+    for index, planned in enumerate(planned_actions):
+        options.privileged = planned.privileged
+        actions.append({
+            "action": planned.action,
+            "cluster": planned.cluster,
+            "namespace": planned.namespace,
+            "kind": planned.kind,
+            "name": planned.name,
+            "privileged": planned.privileged,
+        })
+        if index in done:
+            continue
+        if planned.action == ACTION_DELETED:
+            delete_action(
+                oc_map=oc_map,
+                ri=ri,
+                cluster=planned.cluster,
+                namespace=planned.namespace,
+                resource_type=planned.kind,
+                resource_name=planned.name,
+                options=options,
+            )
+        else:
+            assert planned.resource is not None
+            apply_action(
+                oc_map=oc_map,
+                ri=ri,
+                cluster=planned.cluster,
+                namespace=planned.namespace,
+                resource_type=planned.kind,
+                resource=planned.resource,
+                options=options,
+            )
+    return actions
 
-    if ri.has_error_registered(cluster=cluster):
-        msg = f"[{cluster}] skipping realize_data for cluster with errors"
-        logging.error(msg)
-        return actions
 
+def set_enable_deletion(ri: ResourceInventory, options: ApplyOptions) -> None:
     # don't delete resources if there are errors
     options.enable_deletion = not ri.has_error_registered()
     # only allow to override enable_deletion if no errors were found
     if options.enable_deletion and options.override_enable_deletion is False:
         options.enable_deletion = False
 
+
+def plan_resource_data(
+    ri_item: tuple[str, str, str, Mapping[str, Any]],
+    ri: ResourceInventory,
+    options: ApplyOptions,
+) -> list[PlannedAction]:
+    cluster, namespace, resource_type, data = ri_item
+
+    if ri.has_error_registered(cluster=cluster):
+        msg = f"[{cluster}] skipping realize_data for cluster with errors"
+        logging.error(msg)
+        return []
+
     diff_result = differ.diff_mappings(
         data["current"], data["desired"], equal=three_way_diff_using_hash
     )
 
     # identical resources need to be checked
     # for take_overs and saas file deprecations
-    actions.extend(
-        handle_identical_resources(
-            oc_map=oc_map,
+    planned_actions = [
+        *plan_identical_resources(
             ri=ri,
             identical_resources=diff_result.identical,
             cluster=cluster,
@@ -984,25 +1396,15 @@ def _realize_resource_data_3way_diff(
             resource_type=resource_type,
             data=data,
             options=options,
-        )
-    )
-
-    actions.extend(
-        handle_new_resources(
-            oc_map=oc_map,
-            ri=ri,
+        ),
+        *plan_new_resources(
             new_resources=diff_result.add,
             cluster=cluster,
             namespace=namespace,
             resource_type=resource_type,
             data=data,
-            options=options,
-        )
-    )
-
-    actions.extend(
-        handle_modified_resources(
-            oc_map=oc_map,
+        ),
+        *plan_modified_resources(
             ri=ri,
             modified_resources=diff_result.change,
             cluster=cluster,
@@ -1010,23 +1412,137 @@ def _realize_resource_data_3way_diff(
             resource_type=resource_type,
             data=data,
             options=options,
-        )
-    )
-
-    actions.extend(
-        handle_deleted_resources(
-            oc_map=oc_map,
-            ri=ri,
+        ),
+        *plan_deleted_resources(
             deleted_resources=diff_result.delete,
             cluster=cluster,
             namespace=namespace,
             resource_type=resource_type,
             data=data,
             options=options,
+        ),
+    ]
+    # the bodies loaded by the comparisons are loaded again if the actions
+    # need them
+    ri.compact_resource_type(cluster, namespace, resource_type)
+    return planned_actions
+
+
+def _plan_resource_data_in_process(
+    ri_item: tuple[str, str, str, Mapping[str, Any]],
+    options: ApplyOptions,
+) -> tuple[list[dict[str, Any]], bool]:
+    # runs in a worker process, which reports the errors it registered
+    ri = ResourceInventory(compact=False)
+    planned_actions = plan_resource_data(ri_item, ri, options)
+    return [planned.to_dict() for planned in planned_actions], ri.has_error_registered()
+
+
+def plan_data(
+    ri: ResourceInventory, options: ApplyOptions, processes: int = 0
+) -> list[PlannedAction]:
+    """
+    The actions needed to realize the desired state, in inventory order.
+    No requests are made to the clusters.
+
+    With processes, the resource types are compared in that many worker
+    processes. Inventories spilled to disk are always planned in the
+    calling process.
+    """
+    if processes <= 0 or ri.spill_dir is not None:
+        return list(
+            itertools.chain.from_iterable(
+                plan_resource_data(ri_item, ri, options) for ri_item in ri
+            )
+        )
+
+    ri_items = []
+    for ri_item in ri:
+        if ri.has_error_registered(cluster=ri_item[0]):
+            # logs the skipped cluster
+            plan_resource_data(ri_item, ri, options)
+        else:
+            ri_items.append(ri_item)
+    plan: list[PlannedAction] = []
+    with ProcessPoolExecutor(processes) as pool:
+        chunksize = max(1, len(ri_items) // (processes * 4))
+        results = pool.map(
+            _plan_resource_data_in_process,
+            ri_items,
+            itertools.repeat(options),
+            chunksize=chunksize,
         )
+        for planned_actions, error_registered in results:
+            if error_registered:
+                ri.register_error()
+            plan.extend(PlannedAction.from_dict(data, ri) for data in planned_actions)
+    return plan
+
+
+def print_plan(plan: Iterable[PlannedAction]) -> None:
+    print(json.dumps([planned.to_dict() for planned in plan], indent=2))
+
+
+def _execute_batch_actions(
+    batch: tuple[tuple[str, ...], list[PlannedAction]],
+    oc_map: ClusterMap,
+    ri: ResourceInventory,
+    options: ApplyOptions,
+) -> list[dict[str, Any]]:
+    _, planned_actions = batch
+    options = replace(options)
+    # errors of actions executed so far prevent deletions
+    set_enable_deletion(ri, options)
+    return execute_actions(
+        oc_map=oc_map, ri=ri, planned_actions=planned_actions, options=options
     )
 
-    return actions
+
+def execute_plan(
+    plan: Iterable[PlannedAction],
+    oc_map: ClusterMap,
+    ri: ResourceInventory,
+    options: ApplyOptions,
+    thread_pool_size: int | None,
+) -> list[dict[str, Any]]:
+    """
+    Execute planned actions. The actions of a kind in a namespace run in
+    one batch, in plan order; with batch_apply, the actions of a namespace
+    do, so they can be applied together. Batches run in parallel,
+    scheduled per cluster.
+    """
+    batches: dict[tuple[str, ...], list[PlannedAction]] = defaultdict(list)
+    for planned in plan:
+        key: tuple[str, ...] = (planned.cluster, planned.namespace)
+        if not options.batch_apply:
+            key += (planned.kind,)
+        batches[key].append(planned)
+    results = cluster_scheduler("realize_data", thread_pool_size).run(
+        _execute_batch_actions,
+        list(batches.items()),
+        cluster_of=lambda batch: batch[0][0],
+        oc_map=oc_map,
+        ri=ri,
+        options=options,
+    )
+    return list(
+        itertools.chain.from_iterable(register_cluster_deadline_errors(ri, results))
+    )
+
+
+def _realize_resource_data_3way_diff(
+    ri_item: tuple[str, str, str, Mapping[str, Any]],
+    oc_map: ClusterMap,
+    ri: ResourceInventory,
+    options: ApplyOptions,
+) -> list[dict[str, Any]]:
+    set_enable_deletion(ri, options)
+    return execute_actions(
+        oc_map=oc_map,
+        ri=ri,
+        planned_actions=plan_resource_data(ri_item, ri, options),
+        options=options,
+    )
 
 
 def realize_data(
@@ -1060,10 +1576,25 @@ def realize_data(
     :param override_enable_deletion: override calculated enable_deletion value
     :param recycle_pods: should pods be recycled if a dependency changed
     """
-    args = locals()
-    del args["thread_pool_size"]
-    results = threaded.run(_realize_resource_data, ri, thread_pool_size, **args)
-    return list(itertools.chain.from_iterable(results))
+    options = ApplyOptions(
+        dry_run=dry_run,
+        no_dry_run_skip_compare=no_dry_run_skip_compare,
+        wait_for_namespace=wait_for_namespace,
+        override_enable_deletion=override_enable_deletion,
+        take_over=take_over,
+        caller=caller,
+        all_callers=all_callers,
+        recycle_pods=recycle_pods,
+        privileged=False,
+        enable_deletion=False,
+        batch_apply=os.environ.get(BATCH_APPLY_ENV, "false").lower() == "true",
+    )
+    plan = plan_data(
+        ri, options, processes=int(os.environ.get(PLAN_PROCESSES_ENV, "0"))
+    )
+    if dry_run and os.environ.get(PRINT_PLAN_ENV, "false").lower() == "true":
+        print_plan(plan)
+    return execute_plan(plan, oc_map, ri, options, thread_pool_size)
 
 
 def _validate_resources_used_exist(
@@ -1519,6 +2050,20 @@ def publish_metrics(ri: ResourceInventory, integration: str) -> None:
                 ),
                 len(data[state]),
             )
+    for cluster in {cluster for cluster, _, _, _ in ri}:
+        for state in ("current", "desired"):
+            # only tracked by compact inventories
+            size = ri.size_bytes(cluster, state)
+            if size is None:
+                continue
+            metrics.set_gauge(
+                OpenshiftResourceInventoryBytesGauge(
+                    integration=integration.replace("_", "-"),
+                    cluster=cluster,
+                    state=state,
+                ),
+                size,
+            )
 
 
 def get_state_count_combinations(state: Iterable[Mapping[str, str]]) -> Counter[str]:
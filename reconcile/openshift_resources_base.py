@@ -53,6 +53,7 @@ from reconcile.utils.oc import (
     OCLogMsg,
     StatusCodeError,
 )
+from reconcile.utils.oc_state_cache import cached_items
 from reconcile.utils.openshift_resource import (
     ConstructResourceError,
     ResourceInventory,
@@ -237,6 +238,8 @@ KUBERNETES_SECRET_DATA_KEY_RE = "^[-._a-zA-Z0-9]+$"
 # Keys in vault secrets that do not need to land
 # into K8S secrets.
 VAULT_SECRETS_EXCLUDED_KEYS = {SECRET_UPDATED_AT}
+# path argument of query() lookups in templates, see referenced_resource_paths
+QUERY_LOOKUP_PATH_RE = re.compile(r"""\bquery\(\s*["']([^"']+)["']""")
 _log_lock = Lock()
 
 
@@ -656,7 +659,12 @@ def fetch_current_state(
     if not oc.is_kind_supported(kind):
         logging.warning(f"[{cluster}] cluster has no API resource {kind}.")
         return
-    for item in oc.get_items(kind, namespace=namespace, resource_names=resource_names):
+    items: Iterable[dict[str, Any]] | None = cached_items(
+        oc, kind, namespace, resource_names=resource_names
+    )
+    if items is None:
+        items = oc.iter_items(kind, namespace=namespace, resource_names=resource_names)
+    for item in items:
         openshift_resource = OR(
             item, QONTRACT_INTEGRATION, QONTRACT_INTEGRATION_VERSION
         )
@@ -727,11 +735,15 @@ def fetch_desired_state(
 
 
 def fetch_states(
-    spec: ob.StateSpec,
+    spec: ob.StateSpec | ob.ClusterCurrentStateSpec,
     ri: ResourceInventory,
     settings: Mapping[str, Any] | None = None,
 ) -> None:
     try:
+        if isinstance(spec, ob.ClusterCurrentStateSpec):
+            ob.populate_cluster_current_state(
+                spec, ri, QONTRACT_INTEGRATION, QONTRACT_INTEGRATION_VERSION
+            )
         if isinstance(spec, ob.CurrentStateSpec):
             fetch_current_state(
                 spec.oc,
@@ -758,6 +770,22 @@ def fetch_states(
         logging.error(f"{spec} - exception: {e!s}")
 
 
+def referenced_resource_paths(
+    state_specs: Iterable[ob.StateSpec | ob.ClusterCurrentStateSpec],
+) -> set[str]:
+    """Paths of the GraphQL queries that the templates of the desired state
+    look up with query()."""
+    paths: set[str] = set()
+    for spec in state_specs:
+        if not isinstance(spec, ob.DesiredStateSpec):
+            continue
+        if spec.resource["provider"] not in {"resource-template", "prometheus-rule"}:
+            continue
+        content = (spec.resource.get("resource") or {}).get("content") or ""
+        paths.update(QUERY_LOOKUP_PATH_RE.findall(content))
+    return paths
+
+
 def fetch_data(
     namespaces: Iterable[Mapping[str, Any]],
     thread_pool_size: int,
@@ -778,10 +806,22 @@ def fetch_data(
         thread_pool_size=thread_pool_size,
         init_api_resources=init_api_resources,
     )
-    state_specs = ob.init_specs_to_fetch(
-        ri, oc_map, namespaces=namespaces, override_managed_types=overrides
+    state_specs = ob.group_current_state_specs(
+        ob.init_specs_to_fetch(
+            ri, oc_map, namespaces=namespaces, override_managed_types=overrides
+        )
+    )
+    # the threads rendering templates would look these up one by one
+    if paths := referenced_resource_paths(state_specs):
+        gql.get_api().prefetch_resources(paths)
+    results = ob.cluster_scheduler("fetch_data", thread_pool_size).run(
+        fetch_states,
+        state_specs,
+        cluster_of=lambda spec: spec.cluster,
+        ri=ri,
+        settings=settings,
     )
-    threaded.run(fetch_states, state_specs, thread_pool_size, ri=ri, settings=settings)
+    ob.register_cluster_deadline_errors(ri, results)
 
     return oc_map, ri
 
@@ -314,7 +314,7 @@ def _pipeline_exists(
         logging.error(oc.message)
         raise RuntimeError(f"No OC client for {tkn_cluster_name}: {oc.message}")
     return bool(
-        oc.get(
+        oc.get_metadata(
             namespace=tkn_namespace_name,
             kind="Pipeline",
             name=name,
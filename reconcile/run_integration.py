@@ -23,6 +23,7 @@ from reconcile.utils.metrics import (
     run_status,
     run_time,
 )
+from reconcile.utils.oc_state_cache import end_current_state_cache_run
 from reconcile.utils.runtime.environment import (
     LOG_DATEFMT,
     log_fmt,
@@ -205,6 +206,28 @@ def main() -> None:
     * PUSHGATEWAY_ENABLED (defaults to false)
       send metrics to a Prometheus Pushgateway after the run. In expects
       "PUSHGATEWAY_USERNAME", "PUSHGATEWAY_PASSWORD" and "PUSHGATEWAY_URL" to be defined.
+    * OC_CURRENT_STATE_CACHE (defaults to false)
+      keep the objects fetched from clusters in memory between runs and only
+      watch for their changes, see reconcile.utils.oc_state_cache. Objects
+      not fetched by a run are dropped at its end
+    * JUMPHOST_TUNNEL_KEEPALIVE_SECONDS (defaults to 0)
+      keep unused SSH tunnels to jumphosts open for this long, so the next
+      run reuses them, see reconcile.utils.jump_host.TunnelPool
+    * RESOURCE_INVENTORY_SPILL_DIR (optional)
+      keep the bodies of the objects in a ResourceInventory compressed in a
+      temporary sqlite database in this directory instead of in memory
+    * GQL_QUERY_MEMO (defaults to false)
+      memoize the results of GraphQL queries for the rest of the run
+    * GQL_RESULT_CACHE_DIR (optional)
+      keep the results of GraphQL queries against a bundle commit in a sqlite
+      database in this directory, shared by all processes using it, see
+      reconcile.utils.gql.GqlResultCache
+    * GQL_RESULT_CACHE_MAX_BYTES (defaults to 1GiB)
+      size of the GraphQL result cache
+    * GQL_TRUSTED_MODELS_INTEGRATIONS (optional)
+      comma separated integrations, or "all", that build the results of the
+      biggest queries without validating them, see
+      reconcile.utils.trusted_models
 
 
     Based on those variables, the following command will be executed
@@ -249,6 +272,8 @@ def main() -> None:
             return_code = ExitCodes.ERROR
 
         time_spent = time.monotonic() - start_time
+        # release the clusters' objects and clients the run didn't use
+        end_current_state_cache_run()
 
         run_time.labels(
             integration=INTEGRATION_NAME, shards=SHARDS, shard_id=SHARD_ID_LABEL
@@ -32,7 +32,7 @@ def delete_skupper_site(
         # delete everything labeled by us
         to_delete.update({
             f"{item['kind']}-{item['metadata']['name']}": item
-            for item in oc.get_items(
+            for item in oc.get_items_metadata(
                 kind=kind,
                 namespace=site.namespace.name,
                 labels=labels,
@@ -41,7 +41,7 @@ def delete_skupper_site(
         # delete everything else that starts with 'skupper-'
         to_delete.update({
             f"{item['kind']}-{item['metadata']['name']}": item
-            for item in oc.get_items(kind=kind, namespace=site.namespace.name)
+            for item in oc.get_items_metadata(kind=kind, namespace=site.namespace.name)
             if item["metadata"]["name"].startswith("skupper-")
         })
 
@@ -215,7 +215,7 @@ def connect_sites(
 def delete_unused_tokens(site: SkupperSite, oc_map: OCMap, dry_run: bool) -> None:
     """Delete any other connection tokens that are no longer needed."""
     oc = oc_map.get_cluster(site.cluster.name)
-    for item in oc.get_items(
+    for item in oc.get_items_metadata(
         kind="Secret",
         namespace=site.namespace.name,
         labels=site.token_labels,
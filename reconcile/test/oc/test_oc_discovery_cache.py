@@ -0,0 +1,73 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from reconcile.utils.oc_discovery_cache import (
+    DISCOVERY_CACHE_DIR_ENV,
+    DISCOVERY_CACHE_TTL_ENV,
+    DiscoveryCache,
+)
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> DiscoveryCache:
+    return DiscoveryCache(str(tmp_path), ttl_seconds=60)
+
+
+def test_discovery_cache_roundtrip(cache: DiscoveryCache) -> None:
+    data = {"Deployment": [{"kind": "Deployment", "group": "apps"}]}
+    cache.write("https://api.cluster:6443", "4.14", "api-resources", data)
+    assert cache.read("https://api.cluster:6443", "4.14", "api-resources") == data
+
+
+def test_discovery_cache_miss(cache: DiscoveryCache) -> None:
+    assert cache.read("https://api.cluster:6443", "4.14", "api-resources") is None
+
+
+def test_discovery_cache_keyed_by_version(cache: DiscoveryCache) -> None:
+    cache.write("https://api.cluster:6443", "4.14", "api-resources", {"a": []})
+    assert cache.read("https://api.cluster:6443", "4.15", "api-resources") is None
+    assert cache.read("https://api.other:6443", "4.14", "api-resources") is None
+
+
+def test_discovery_cache_expired(cache: DiscoveryCache) -> None:
+    cache.write("https://api.cluster:6443", "4.14", "api-resources", {"a": []})
+    path = cache.path("https://api.cluster:6443", "4.14", "api-resources")
+    expired = time.time() - 120
+    os.utime(path, (expired, expired))
+    assert cache.read("https://api.cluster:6443", "4.14", "api-resources") is None
+    assert not os.path.exists(path)
+
+
+def test_discovery_cache_corrupt_file(cache: DiscoveryCache) -> None:
+    path = cache.path("https://api.cluster:6443", "4.14", "api-resources")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{not json")
+    assert cache.read("https://api.cluster:6443", "4.14", "api-resources") is None
+
+
+def test_discovery_cache_invalidate(cache: DiscoveryCache) -> None:
+    cache.write("https://api.cluster:6443", "4.14", "api-resources", {"a": []})
+    cache.invalidate("https://api.cluster:6443", "4.14", "api-resources")
+    assert cache.read("https://api.cluster:6443", "4.14", "api-resources") is None
+    # invalidating a missing entry is a no-op
+    cache.invalidate("https://api.cluster:6443", "4.14", "api-resources")
+
+
+def test_discovery_cache_from_env_disabled(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv(DISCOVERY_CACHE_DIR_ENV, raising=False)
+    assert DiscoveryCache.from_env() is None
+
+
+def test_discovery_cache_from_env(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    cache_dir = tmp_path / "discovery"
+    monkeypatch.setenv(DISCOVERY_CACHE_DIR_ENV, str(cache_dir))
+    monkeypatch.setenv(DISCOVERY_CACHE_TTL_ENV, "10")
+    cache = DiscoveryCache.from_env()
+    assert cache is not None
+    assert cache.ttl_seconds == 10
+    assert cache_dir.is_dir()
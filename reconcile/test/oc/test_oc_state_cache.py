@@ -0,0 +1,256 @@
+import threading
+import time
+from collections.abc import (
+    Generator,
+    Iterator,
+)
+from typing import Any
+from unittest.mock import Mock
+
+import pytest
+from pytest_mock import MockerFixture
+
+from reconcile.utils.oc import (
+    OCCli,
+    OCNative,
+    StatusCodeError,
+)
+from reconcile.utils.oc_state_cache import (
+    CURRENT_STATE_CACHE_ENV,
+    WATCH_SECONDS,
+    CurrentStateCache,
+    cached_items,
+)
+
+
+class TimeMock:
+    def __init__(self) -> None:
+        self.current_time = 0.0
+
+    def time(self) -> float:
+        return self.current_time
+
+
+def cm(name: str, resource_version: str, data: str = "") -> dict[str, Any]:
+    return {
+        "kind": "ConfigMap",
+        "metadata": {
+            "name": name,
+            "namespace": "ns",
+            "resourceVersion": resource_version,
+        },
+        "data": {"a": data},
+    }
+
+
+def events(
+    window: list[tuple[str, dict[str, Any]]],
+) -> Generator[tuple[str, dict[str, Any]], None, None]:
+    yield from window
+
+
+class Watch:
+    """Serves the given windows of events to watch_items, then blocks until
+    the test is done."""
+
+    def __init__(self, *windows: list[tuple[str, dict[str, Any]]]) -> None:
+        self.windows = list(windows)
+        self.served = threading.Event()
+        self.done = threading.Event()
+
+    def __call__(
+        self, *args: Any, **kwargs: Any
+    ) -> Generator[tuple[str, Any], None, None]:
+        if not self.windows:
+            self.served.set()
+            self.done.wait(timeout=5)
+            return events([])
+        return events(self.windows.pop(0))
+
+
+@pytest.fixture
+def oc(mocker: MockerFixture) -> Mock:
+    oc = mocker.create_autospec(OCNative, instance=True)
+    oc.server = "https://api.cluster:6443"
+    oc.identity = "identity"
+    oc.cluster_name = "cluster"
+    oc.list_items.return_value = ([cm("a", "1"), cm("b", "2")], "2")
+    return oc
+
+
+@pytest.fixture
+def time_mock() -> TimeMock:
+    return TimeMock()
+
+
+@pytest.fixture
+def cache(time_mock: TimeMock) -> Iterator[CurrentStateCache]:
+    cache = CurrentStateCache(resync_seconds=100, time_module=time_mock)
+    yield cache
+    cache.stop()
+
+
+def serve(oc: Mock, *windows: list[tuple[str, dict[str, Any]]]) -> Watch:
+    watch = Watch(*windows)
+    oc.watch_items.side_effect = watch
+    return watch
+
+
+def test_current_state_cache_watches_changes(
+    oc: Mock, cache: CurrentStateCache
+) -> None:
+    watch = serve(
+        oc,
+        [("MODIFIED", cm("a", "3", data="new")), ("DELETED", cm("b", "4"))],
+        [("ADDED", cm("c", "5"))],
+    )
+
+    assert cache.get_items(oc, "ConfigMap", "ns") == [cm("a", "1"), cm("b", "2")]
+    assert watch.served.wait(timeout=5)
+    assert cache.get_items(oc, "ConfigMap", "ns") == [
+        cm("a", "3", data="new"),
+        cm("c", "5"),
+    ]
+    watch.done.set()
+
+    oc.list_items.assert_called_once_with("ConfigMap", namespace="ns")
+    resource_versions = [
+        c.kwargs["resource_version"] for c in oc.watch_items.call_args_list
+    ]
+    assert resource_versions == ["2", "4", "5"]
+    assert oc.watch_items.call_args.kwargs["timeout_seconds"] == WATCH_SECONDS
+
+
+def test_current_state_cache_resync(
+    oc: Mock, cache: CurrentStateCache, time_mock: TimeMock
+) -> None:
+    watch = serve(oc)
+    cache.get_items(oc, "ConfigMap", "ns")
+    time_mock.current_time = 101
+    cache.get_items(oc, "ConfigMap", "ns")
+    watch.done.set()
+
+    assert oc.list_items.call_count == 2
+
+
+def test_current_state_cache_relist_on_watch_error(
+    oc: Mock, cache: CurrentStateCache
+) -> None:
+    oc.watch_items.side_effect = StatusCodeError("too old resource version")
+    cache.get_items(oc, "ConfigMap", "ns")
+    entry = next(iter(cache._entries.values()))
+    for _ in range(500):
+        if not entry.watching:
+            break
+        time.sleep(0.01)
+    oc.list_items.return_value = ([cm("a", "7")], "7")
+    watch = serve(oc)
+
+    assert cache.get_items(oc, "ConfigMap", "ns") == [cm("a", "7")]
+    watch.done.set()
+    assert oc.list_items.call_count == 2
+
+
+def test_current_state_cache_closes_stale_watch(
+    oc: Mock, cache: CurrentStateCache, time_mock: TimeMock
+) -> None:
+    closed = threading.Event()
+
+    def stale_watch() -> Generator[tuple[str, Any], None, None]:
+        try:
+            # listed again before the first event arrives
+            time_mock.current_time = 101
+            cache.get_items(oc, "ConfigMap", "ns")
+            yield "ADDED", cm("c", "5")
+        finally:
+            closed.set()
+
+    watch = Watch()
+    oc.watch_items.side_effect = lambda *args, **kwargs: (
+        stale_watch() if not closed.is_set() else watch()
+    )
+
+    cache.get_items(oc, "ConfigMap", "ns")
+    assert closed.wait(timeout=5)
+    assert watch.served.wait(timeout=5)
+    watch.done.set()
+
+    assert cache.get_items(oc, "ConfigMap", "ns") == [cm("a", "1"), cm("b", "2")]
+    assert oc.list_items.call_count == 2
+
+
+def test_current_state_cache_end_run(
+    oc: Mock, cache: CurrentStateCache, mocker: MockerFixture
+) -> None:
+    watch = serve(oc)
+    cache.get_items(oc, "ConfigMap", "ns")
+    cache.get_items(oc, "Secret", "ns")
+    cache.end_run()
+    (config_maps,) = (e for k, e in cache._entries.items() if k[2] == "ConfigMap")
+
+    # the next run only uses the ConfigMaps
+    cache.get_items(oc, "ConfigMap", "ns")
+    cache.end_run()
+    watch.done.set()
+
+    assert list(cache._entries.values()) == [config_maps]
+    assert oc.list_items.call_count == 2
+
+
+def test_current_state_cache_returns_copies(oc: Mock, cache: CurrentStateCache) -> None:
+    watch = serve(oc)
+    cache.get_items(oc, "ConfigMap", "ns")[0]["data"]["a"] = "changed"
+
+    assert cache.get_items(oc, "ConfigMap", "ns")[0] == cm("a", "1")
+    watch.done.set()
+
+
+def test_current_state_cache_keyed_by_identity(
+    oc: Mock, cache: CurrentStateCache, mocker: MockerFixture
+) -> None:
+    watch = serve(oc)
+    other = mocker.create_autospec(OCNative, instance=True)
+    other.server = oc.server
+    other.identity = "other-identity"
+    other.list_items.return_value = ([], "2")
+    other.watch_items.side_effect = watch
+
+    cache.get_items(oc, "ConfigMap", "ns")
+    assert cache.get_items(other, "ConfigMap", "ns") == []
+    watch.done.set()
+
+    oc.list_items.assert_called_once()
+    other.list_items.assert_called_once()
+
+
+def test_current_state_cache_all_namespaces(oc: Mock, cache: CurrentStateCache) -> None:
+    watch = serve(oc)
+    cache.get_items(oc, "ConfigMap", "")
+    watch.done.set()
+
+    oc.list_items.assert_called_once_with("ConfigMap")
+
+
+def test_cached_items_disabled(oc: Mock, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv(CURRENT_STATE_CACHE_ENV, raising=False)
+    assert cached_items(oc, "ConfigMap", "ns") is None
+
+
+def test_cached_items(
+    oc: Mock, monkeypatch: pytest.MonkeyPatch, mocker: MockerFixture
+) -> None:
+    monkeypatch.setenv(CURRENT_STATE_CACHE_ENV, "true")
+    cache = CurrentStateCache()
+    mocker.patch("reconcile.utils.oc_state_cache._current_state_cache", cache)
+    oc.project_exists.return_value = True
+    watch = serve(oc)
+
+    assert cached_items(oc, "ConfigMap", "ns") == [cm("a", "1"), cm("b", "2")]
+    # only list requests are cached
+    assert cached_items(oc, "ConfigMap", "ns", resource_names=["a"]) is None
+    assert cached_items(mocker.create_autospec(OCCli), "ConfigMap", "ns") is None
+
+    oc.project_exists.return_value = False
+    assert cached_items(oc, "ConfigMap", "missing") == []
+    watch.done.set()
+    cache.stop()
@@ -25,7 +25,7 @@ def test_skupper_network_reconciler_delete_skupper_resources(
     another_fake_configmap = copy.deepcopy(fake_site_configmap)
     another_fake_configmap["metadata"]["name"] = "another-fake-configmap"
     site = skupper_sites[0]
-    oc.get_items.side_effect = [
+    oc.get_items_metadata.side_effect = [
         # by-label
         (another_fake_configmap,),
         # by-name
@@ -277,7 +277,7 @@ def test_skupper_network_reconciler_delete_unused_tokens(
     edge_1 = skupper_sites[0]
     private_1 = skupper_sites[2]
     edge_1.connected_sites = {private_1}
-    oc.get_items.return_value = token_secrets
+    oc.get_items_metadata.return_value = token_secrets
     reconciler.delete_unused_tokens(
         edge_1,
         oc_map,
@@ -1,14 +1,20 @@
 import os
 from typing import Any
-from unittest.mock import create_autospec
+from unittest.mock import (
+    Mock,
+    create_autospec,
+)
 
 import pytest
+from pytest_mock import MockerFixture
+from sshtunnel import SSHTunnelForwarder
 
 from reconcile.utils import gql
 from reconcile.utils.jump_host import (
     JumpHostBase,
     JumphostParameters,
     JumpHostSSH,
+    TunnelPool,
 )
 
 EXPECTED_USER = "test-user"
@@ -112,3 +118,98 @@ def test_ssh_jumphost(
 
     with open(known_hosts_file, encoding="locale") as f:
         assert f.read() == EXPECTED_KNOWN_HOSTS_CONTENT
+
+
+class TimeMock:
+    def __init__(self) -> None:
+        self.current_time = 0.0
+
+    def time(self) -> float:
+        return self.current_time
+
+
+TUNNEL_KEY = ("bastion", "localhost", 8888)
+
+
+def test_tunnel_pool_shares_tunnels() -> None:
+    tunnel = create_autospec(SSHTunnelForwarder, instance=True)
+    start_tunnel = Mock(return_value=tunnel)
+    pool = TunnelPool()
+
+    assert pool.acquire(TUNNEL_KEY, 50000, start_tunnel) == 50000
+    assert pool.acquire(TUNNEL_KEY, 50001, start_tunnel) == 50000
+    assert pool.local_port(TUNNEL_KEY) == 50000
+    start_tunnel.assert_called_once_with(50000)
+
+    pool.release(TUNNEL_KEY)
+    tunnel.close.assert_not_called()
+    pool.release(TUNNEL_KEY)
+    tunnel.close.assert_called_once()
+    assert pool.local_port(TUNNEL_KEY) is None
+
+
+def test_tunnel_pool_keepalive() -> None:
+    time_mock = TimeMock()
+    tunnel = create_autospec(SSHTunnelForwarder, instance=True)
+    start_tunnel = Mock(return_value=tunnel)
+    pool = TunnelPool(keepalive_seconds=60, time_module=time_mock)
+
+    pool.acquire(TUNNEL_KEY, 50000, start_tunnel)
+    pool.release(TUNNEL_KEY)
+    time_mock.current_time = 30
+    assert pool.acquire(TUNNEL_KEY, 50001, start_tunnel) == 50000
+    start_tunnel.assert_called_once()
+
+    pool.release(TUNNEL_KEY)
+    time_mock.current_time = 100
+    pool.acquire(("other", "localhost", 8888), 50002, start_tunnel)
+    tunnel.close.assert_called_once()
+    assert pool.local_port(TUNNEL_KEY) is None
+
+
+def test_tunnel_pool_restarts_inactive_tunnel() -> None:
+    down = create_autospec(SSHTunnelForwarder, instance=True)
+    down.is_active = False
+    up = create_autospec(SSHTunnelForwarder, instance=True)
+    start_tunnel = Mock(side_effect=[down, up])
+    pool = TunnelPool()
+
+    pool.acquire(TUNNEL_KEY, 50000, start_tunnel)
+    assert pool.acquire(TUNNEL_KEY, 50001, start_tunnel) == 50000
+
+    down.close.assert_called_once()
+    assert start_tunnel.call_args_list[1].args == (50000,)
+
+
+def test_ssh_jumphost_pooled_tunnel(fs: Any, mocker: MockerFixture) -> None:
+    mocker.patch.object(JumpHostSSH, "tunnel_pool", TunnelPool())
+    mocker.patch.object(JumpHostSSH, "local_ports", [])
+    forwarder = mocker.patch("reconcile.utils.jump_host.SSHTunnelForwarder")
+    gql_mock = create_autospec(spec=gql.GqlApi)
+    gql_mock.get_resource.return_value = {"content": EXPECTED_KNOWN_HOSTS_CONTENT}
+    parameters = JumphostParameters(
+        hostname=EXPECTED_HOSTNAME,
+        key="ABC",
+        known_hosts=EXPECTED_KNOWN_HOSTS_PATH,
+        local_port=None,
+        port=None,
+        remote_port=8888,
+        user=EXPECTED_USER,
+    )
+    first = JumpHostSSH(parameters=parameters, gql_api=gql_mock)
+    second = JumpHostSSH(parameters=parameters, gql_api=gql_mock)
+
+    first.create_ssh_tunnel()
+    second.create_ssh_tunnel()
+
+    forwarder.assert_called_once()
+    assert second.local_port == first.local_port
+    # the port reserved for the second client is released again
+    assert JumpHostSSH.local_ports == [first.local_port]
+    assert JumpHostSSH.get_tunnel_port(EXPECTED_HOSTNAME, 8888) == first.local_port
+
+    first.cleanup()
+    forwarder.return_value.close.assert_not_called()
+    second.cleanup()
+    forwarder.return_value.close.assert_called_once()
+    assert not JumpHostSSH.local_ports
@@ -1,3 +1,4 @@
+import json
 import logging
 from collections.abc import Mapping
 from typing import Any
@@ -625,6 +626,106 @@ def test_populate_current_state_resource_name_filtering(
     )
 
 
+def build_namespaced_resource(name: str, namespace: str) -> dict[str, Any]:
+    body = build_resource("Kind", "fully.qualified/v1", name)
+    body["metadata"]["namespace"] = namespace
+    return body
+
+
+def test_group_current_state_specs(oc_cs1: oc.OCNative) -> None:
+    specs: list[sut.StateSpec] = [
+        sut.CurrentStateSpec(
+            oc=oc_cs1, cluster="cs1", namespace=ns, kind="Kind", resource_names=None
+        )
+        for ns in ("ns1", "ns2", "ns3")
+    ]
+    names_spec = sut.CurrentStateSpec(
+        oc=oc_cs1, cluster="cs1", namespace="ns4", kind="Kind", resource_names=["n"]
+    )
+    specs.append(names_spec)
+
+    grouped = sut.group_current_state_specs(specs, namespace_threshold=3)
+
+    assert grouped == [
+        names_spec,
+        sut.ClusterCurrentStateSpec(
+            oc=oc_cs1, cluster="cs1", kind="Kind", namespaces={"ns1", "ns2", "ns3"}
+        ),
+    ]
+
+
+def test_group_current_state_specs_below_threshold(oc_cs1: oc.OCNative) -> None:
+    specs: list[sut.StateSpec] = [
+        sut.CurrentStateSpec(
+            oc=oc_cs1, cluster="cs1", namespace=ns, kind="Kind", resource_names=None
+        )
+        for ns in ("ns1", "ns2")
+    ]
+
+    assert sut.group_current_state_specs(specs, namespace_threshold=3) == specs
+    assert sut.group_current_state_specs(specs, namespace_threshold=0) == specs
+
+
+def test_group_current_state_specs_cluster_scoped_kind(oc_cs1: oc.OCNative) -> None:
+    oc_cs1.is_kind_namespaced.return_value = False  # type: ignore[attr-defined]
+    specs: list[sut.StateSpec] = [
+        sut.CurrentStateSpec(
+            oc=oc_cs1, cluster="cs1", namespace=ns, kind="Kind", resource_names=None
+        )
+        for ns in ("ns1", "ns2")
+    ]
+
+    assert sut.group_current_state_specs(specs, namespace_threshold=1) == specs
+
+
+def test_populate_cluster_current_state(
+    resource_inventory: resource.ResourceInventory, oc_cs1: oc.OCNative
+) -> None:
+    resource_inventory.initialize_resource_type("cs1", "ns1", "Kind")
+    resource_inventory.initialize_resource_type("cs1", "ns2", "Kind")
+    oc_cs1.iter_items.return_value = iter([  # type: ignore[attr-defined]
+        build_namespaced_resource("name1", "ns1"),
+        build_namespaced_resource("name2", "ns2"),
+        build_namespaced_resource("name3", "unmanaged"),
+    ])
+    spec = sut.ClusterCurrentStateSpec(
+        oc=oc_cs1, cluster="cs1", kind="Kind", namespaces={"ns1", "ns2"}
+    )
+
+    sut.populate_current_state(spec, resource_inventory, TEST_INT, TEST_INT_VER)
+
+    oc_cs1.iter_items.assert_called_once_with(  # type: ignore[attr-defined]
+        "Kind", all_namespaces=True
+    )
+    current = {
+        (namespace, name)
+        for _, namespace, _, data in resource_inventory
+        for name in data["current"]
+    }
+    assert current == {("ns1", "name1"), ("ns2", "name2")}
+
+
+def test_populate_cluster_current_state_forbidden_fallback(
+    resource_inventory: resource.ResourceInventory, oc_cs1: oc.OCNative
+) -> None:
+    resource_inventory.initialize_resource_type("cs1", "ns1", "Kind")
+    oc_cs1.iter_items.side_effect = oc.StatusCodeError(  # type: ignore[attr-defined]
+        "Reason: Forbidden"
+    )
+    oc_cs1.get_items.return_value = [build_namespaced_resource("name1", "ns1")]
+    spec = sut.ClusterCurrentStateSpec(
+        oc=oc_cs1, cluster="cs1", kind="Kind", namespaces={"ns1"}
+    )
+
+    sut.populate_current_state(spec, resource_inventory, TEST_INT, TEST_INT_VER)
+
+    oc_cs1.get_items.assert_called_once_with(
+        "Kind", namespace="ns1", resource_names=None
+    )
+    assert not resource_inventory.has_error_registered()
+    assert resource_inventory.get_current("cs1", "ns1", "Kind", "name1")
+
+
 #
 # determine_user_keys_for_access tests
 #
@@ -1195,6 +1296,386 @@ def test_realize_resource_data_3way_diff(
     assert delete_mock.call_count == delete_calls
 
 
+def build_planned_inventory() -> resource.ResourceInventory:
+    ri = resource.ResourceInventory()
+    for namespace in ["ns1", "ns2"]:
+        ri.initialize_resource_type("test-cluster", namespace, "test-kind")
+    ri.add_desired(
+        "test-cluster", "ns1", "test-kind", "new", build_openshift_resource_1()
+    )
+    ri.add_current(
+        "test-cluster", "ns1", "test-kind", "changed", build_openshift_resource_1()
+    )
+    ri.add_desired(
+        "test-cluster",
+        "ns1",
+        "test-kind",
+        "changed",
+        build_openshift_resource_2(),
+        privileged=True,
+    )
+    ri.add_current(
+        "test-cluster", "ns2", "test-kind", "obsolete", build_openshift_resource_1()
+    )
+    return ri
+
+
+def test_plan_data(mocker: MockerFixture, apply_options: sut.ApplyOptions) -> None:
+    apply_mock = mocker.patch.object(sut, "apply", autospec=True)
+    delete_mock = mocker.patch.object(sut, "delete", autospec=True)
+    mocker.patch.object(
+        resource.OpenshiftResource, "has_qontract_annotations", autospec=True
+    ).return_value = True
+
+    plan = sut.plan_data(build_planned_inventory(), apply_options)
+
+    assert [(a.action, a.reason, a.namespace, a.name) for a in plan] == [
+        (sut.ACTION_APPLIED, sut.PLAN_REASON_NEW, "ns1", "new"),
+        (sut.ACTION_APPLIED, sut.PLAN_REASON_MODIFIED, "ns1", "changed"),
+        (sut.ACTION_DELETED, sut.PLAN_REASON_NOT_DESIRED, "ns2", "obsolete"),
+    ]
+    assert plan[1].privileged
+    assert plan[1].resource is not None
+    assert plan[2].resource is None
+    assert (plan[2].cluster, plan[2].kind, plan[2].privileged) == (
+        "test-cluster",
+        "test-kind",
+        False,
+    )
+    apply_mock.assert_not_called()
+    delete_mock.assert_not_called()
+
+
+def test_plan_data_round_trip(
+    mocker: MockerFixture, apply_options: sut.ApplyOptions
+) -> None:
+    mocker.patch.object(
+        resource.OpenshiftResource, "has_qontract_annotations", autospec=True
+    ).return_value = True
+    ri = build_planned_inventory()
+    plan = sut.plan_data(ri, apply_options)
+
+    data = json.loads(json.dumps([a.to_dict() for a in plan]))
+    replayed = [sut.PlannedAction.from_dict(d, ri) for d in data]
+
+    assert data[1] == {
+        "action": "applied",
+        "reason": "modified",
+        "cluster": "test-cluster",
+        "namespace": "ns1",
+        "kind": "test-kind",
+        "name": "changed",
+        "privileged": True,
+    }
+    assert replayed == plan
+    assert [a.resource for a in replayed] == [a.resource for a in plan]
+    assert sut.PlannedAction.from_dict(data[0]).resource is None
+
+
+def test_plan_data_processes(
+    mocker: MockerFixture, apply_options: sut.ApplyOptions
+) -> None:
+    mocker.patch.object(
+        resource.OpenshiftResource, "has_qontract_annotations", autospec=True
+    ).return_value = True
+    ri = build_planned_inventory()
+
+    plan = sut.plan_data(ri, apply_options, processes=2)
+
+    assert plan == sut.plan_data(build_planned_inventory(), apply_options)
+    # the resources to apply are the ones of the inventory
+    assert plan[1].resource is ri.get_desired(
+        "test-cluster", "ns1", "test-kind", "changed"
+    )
+
+
+def test_plan_data_processes_registers_errors(
+    apply_options: sut.ApplyOptions,
+) -> None:
+    ri = build_planned_inventory()
+    ri.add_current(
+        "test-cluster",
+        "ns1",
+        "test-kind",
+        "new",
+        build_openshift_resource("test-kind", "v1", "new", None, caller_name="other"),
+    )
+    apply_options.caller = "saas-test"
+    apply_options.all_callers = ["saas-test", "other"]
+
+    plan = sut.plan_data(ri, apply_options, processes=1)
+
+    assert "new" not in [a.name for a in plan]
+    assert ri.has_error_registered()
+
+
+def test_plan_data_skips_clusters_with_errors(
+    apply_options: sut.ApplyOptions,
+) -> None:
+    ri = build_planned_inventory()
+    ri.register_error(cluster="test-cluster")
+
+    assert sut.plan_data(ri, apply_options) == []
+    assert sut.plan_data(ri, apply_options, processes=1) == []
+
+
+def test_execute_plan(
+    mocker: MockerFixture, oc_map: oc.OC_Map, apply_options: sut.ApplyOptions
+) -> None:
+    apply_mock = mocker.patch.object(sut, "apply", autospec=True)
+    delete_mock = mocker.patch.object(sut, "delete", autospec=True)
+    ri = resource.ResourceInventory()
+    plan = [
+        sut.PlannedAction(
+            action=sut.ACTION_APPLIED,
+            reason=sut.PLAN_REASON_NEW,
+            cluster="test-cluster",
+            namespace=namespace,
+            kind="test-kind",
+            name=name,
+            privileged=namespace == "ns2",
+            resource=build_openshift_resource_1(),
+        )
+        for namespace, name in [("ns1", "a"), ("ns2", "b"), ("ns1", "c")]
+    ]
+    plan.append(
+        sut.PlannedAction(
+            action=sut.ACTION_DELETED,
+            reason=sut.PLAN_REASON_NOT_DESIRED,
+            cluster="test-cluster",
+            namespace="ns2",
+            kind="test-kind",
+            name="d",
+            privileged=False,
+        )
+    )
+    apply_options.override_enable_deletion = None
+
+    actions = sut.execute_plan(plan, oc_map, ri, apply_options, thread_pool_size=1)
+
+    # grouped by namespace, in plan order
+    assert [(a["namespace"], a["name"]) for a in actions] == [
+        ("ns1", "a"),
+        ("ns1", "c"),
+        ("ns2", "b"),
+        ("ns2", "d"),
+    ]
+    assert "reason" not in actions[0]
+    assert [c.kwargs["privileged"] for c in apply_mock.call_args_list] == [
+        False,
+        False,
+        True,
+    ]
+    assert delete_mock.call_args.kwargs["enable_deletion"] is True
+    # the options passed in are not changed by the batches
+    assert apply_options.privileged is False
+
+
+@pytest.mark.parametrize(
+    "batch_apply, batches",
+    [
+        (False, [["a", "c"], ["b"]]),
+        (True, [["a", "b", "c"]]),
+    ],
+)
+def test_execute_plan_batches(
+    mocker: MockerFixture,
+    oc_map: oc.OC_Map,
+    apply_options: sut.ApplyOptions,
+    batch_apply: bool,
+    batches: list[list[str]],
+) -> None:
+    execute_mock = mocker.patch.object(sut, "execute_actions", autospec=True)
+    execute_mock.return_value = []
+    apply_options.batch_apply = batch_apply
+    plan = [
+        sut.PlannedAction(
+            action=sut.ACTION_APPLIED,
+            reason=sut.PLAN_REASON_NEW,
+            cluster="test-cluster",
+            namespace="ns1",
+            kind=kind,
+            name=name,
+            privileged=False,
+            resource=build_openshift_resource_1(),
+        )
+        for kind, name in [("kind-1", "a"), ("kind-2", "b"), ("kind-1", "c")]
+    ]
+
+    sut.execute_plan(
+        plan, oc_map, resource.ResourceInventory(), apply_options, thread_pool_size=1
+    )
+
+    # the kinds of a namespace run in parallel unless applied together
+    assert [
+        [a.name for a in c.kwargs["planned_actions"]]
+        for c in execute_mock.call_args_list
+    ] == batches
+
+
+def build_batch_plan() -> list[sut.PlannedAction]:
+    return [
+        sut.PlannedAction(
+            action=sut.ACTION_APPLIED,
+            reason=sut.PLAN_REASON_NEW,
+            cluster="cs1",
+            namespace=namespace,
+            kind="test-kind",
+            name=name,
+            privileged=False,
+            resource=build_openshift_resource(
+                "test-kind", "v1", name, None, caller_name="saas-test"
+            ),
+        )
+        for namespace, name in [("ns1", "a"), ("ns1", "b"), ("ns2", "c")]
+    ]
+
+
+def test_execute_actions_batch_apply(
+    mocker: MockerFixture,
+    oc_map: oc.OC_Map,
+    apply_options: sut.ApplyOptions,
+) -> None:
+    apply_mock = mocker.patch.object(sut, "apply", autospec=True)
+    oc_cli = mocker.create_autospec(oc.OCCli, instance=True)
+    oc_map.get_cluster.return_value = oc_cli  # type: ignore[attr-defined]
+    apply_options.dry_run = False
+    apply_options.batch_apply = True
+    plan = build_batch_plan()
+
+    actions = sut.execute_actions(
+        oc_map, resource.ResourceInventory(), plan, apply_options
+    )
+
+    assert [a["name"] for a in actions] == ["a", "b", "c"]
+    oc_cli.apply_list.assert_called_once()
+    namespace, applied = oc_cli.apply_list.call_args.args
+    assert namespace == "ns1"
+    assert [r.name for r in applied] == ["a", "b"]
+    assert all("qontract.sha256sum" in r.annotations for r in applied)
+    assert oc_cli.recycle_pods.call_count == 2
+    # a single resource is applied on its own
+    apply_mock.assert_called_once()
+    assert apply_mock.call_args.kwargs["resource"] is plan[2].resource
+
+
+def test_execute_actions_batch_apply_error(
+    mocker: MockerFixture,
+    oc_map: oc.OC_Map,
+    apply_options: sut.ApplyOptions,
+) -> None:
+    apply_mock = mocker.patch.object(sut, "apply", autospec=True)
+    oc_cli = mocker.create_autospec(oc.OCCli, instance=True)
+    oc_map.get_cluster.return_value = oc_cli  # type: ignore[attr-defined]
+    oc_cli.apply_list.side_effect = oc.FieldIsImmutableError("immutable")
+    apply_options.dry_run = False
+    apply_options.batch_apply = True
+
+    sut.execute_actions(
+        oc_map, resource.ResourceInventory(), build_batch_plan(), apply_options
+    )
+
+    # apply handles the errors of every resource
+    assert [c.kwargs["resource"].name for c in apply_mock.call_args_list] == [
+        "a",
+        "b",
+        "c",
+    ]
+
+
+def test_execute_actions_batch_apply_dry_run(
+    mocker: MockerFixture,
+    oc_map: oc.OC_Map,
+    apply_options: sut.ApplyOptions,
+) -> None:
+    apply_mock = mocker.patch.object(sut, "apply", autospec=True)
+    oc_cli = mocker.create_autospec(oc.OCCli, instance=True)
+    oc_map.get_cluster.return_value = oc_cli  # type: ignore[attr-defined]
+    apply_options.batch_apply = True
+
+    sut.execute_actions(
+        oc_map, resource.ResourceInventory(), build_batch_plan(), apply_options
+    )
+
+    oc_cli.apply_list.assert_not_called()
+    assert apply_mock.call_count == 3
+
+
+def test_realize_data_prints_plan(
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture,
+    oc_map: oc.OC_Map,
+) -> None:
+    mocker.patch.object(sut, "apply", autospec=True)
+    mocker.patch.object(sut, "delete", autospec=True)
+    mocker.patch.object(
+        resource.OpenshiftResource, "has_qontract_annotations", autospec=True
+    ).return_value = True
+    monkeypatch.setenv(sut.PRINT_PLAN_ENV, "true")
+
+    sut.realize_data(True, oc_map, build_planned_inventory(), 2)
+
+    plan = json.loads(capsys.readouterr().out)
+    assert [(a["action"], a["reason"], a["name"]) for a in plan] == [
+        ("applied", "new", "new"),
+        ("applied", "modified", "changed"),
+        ("deleted", "not_desired", "obsolete"),
+    ]
+
+
+def test_realize_data_prints_no_plan_without_dry_run(
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture,
+    oc_map: oc.OC_Map,
+) -> None:
+    mocker.patch.object(sut, "apply", autospec=True)
+    mocker.patch.object(sut, "delete", autospec=True)
+    monkeypatch.setenv(sut.PRINT_PLAN_ENV, "true")
+
+    sut.realize_data(False, oc_map, build_planned_inventory(), 2)
+
+    assert not capsys.readouterr().out
+
+
+def test_realize_data_returns_actions(mocker: MockerFixture, oc_map: oc.OC_Map) -> None:
+    mocker.patch.object(sut, "apply", autospec=True)
+    mocker.patch.object(sut, "delete", autospec=True)
+    mocker.patch.object(
+        resource.OpenshiftResource, "has_qontract_annotations", autospec=True
+    ).return_value = True
+
+    actions = sut.realize_data(True, oc_map, build_planned_inventory(), 2)
+
+    assert actions == [
+        {
+            "action": "applied",
+            "cluster": "test-cluster",
+            "namespace": "ns1",
+            "kind": "test-kind",
+            "name": "new",
+            "privileged": False,
+        },
+        {
+            "action": "applied",
+            "cluster": "test-cluster",
+            "namespace": "ns1",
+            "kind": "test-kind",
+            "name": "changed",
+            "privileged": True,
+        },
+        {
+            "action": "deleted",
+            "cluster": "test-cluster",
+            "namespace": "ns2",
+            "kind": "test-kind",
+            "name": "obsolete",
+            "privileged": False,
+        },
+    ]
+
+
 def test_get_state_count_combinations():
     state = [
         {"cluster": "c1"},
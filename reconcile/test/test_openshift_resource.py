@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
 from reconcile.utils.openshift_resource import (
@@ -94,6 +96,81 @@ def test_obj_intersect_equal_status_depth_not_0():
     assert d_item != c_item
 
 
+def deployment_body(image: str, cpu: str = "1") -> dict:
+    return {
+        "apiVersion": "apps/v1",
+        "kind": "Deployment",
+        "metadata": {"name": "name", "labels": {"app": "name"}},
+        "spec": {
+            "template": {
+                "spec": {
+                    "containers": [
+                        {"name": "sidecar", "image": "sidecar"},
+                        {
+                            "name": "app",
+                            "image": image,
+                            "env": [{"name": "EMPTY"}],
+                            "resources": {"limits": {"cpu": cpu}},
+                        },
+                    ],
+                    "imagePullSecrets": [{"name": "pull"}],
+                },
+            },
+        },
+    }
+
+
+def test_obj_intersect_difference():
+    d_item = OR(deployment_body("app:1", cpu="1"), TEST_INT, TEST_INT_VER)
+    current = deployment_body("app:2", cpu="1000m")
+    current["metadata"]["uid"] = "123"
+    current["spec"]["template"]["spec"]["containers"][1]["env"] = [
+        {"name": "EMPTY", "value": ""}
+    ]
+    current["spec"]["template"]["spec"]["imagePullSecrets"].append({
+        "name": "default-dockercfg-abc"
+    })
+
+    assert (
+        d_item.obj_intersect_difference(d_item.body, current)
+        == "spec.template.spec.containers[1].image"
+    )
+
+    current["spec"]["template"]["spec"]["containers"][1]["image"] = "app:1"
+    assert d_item.obj_intersect_difference(d_item.body, current) is None
+    assert d_item.obj_intersect_equal(d_item.body, current)
+
+    current["metadata"]["labels"]["other"] = "label"
+    assert (
+        d_item.obj_intersect_difference(d_item.body, current) == "metadata.labels.other"
+    )
+    assert d_item.obj_intersect_difference({"kind": "a"}, []) == "."
+
+
+def test_obj_intersect_equal_canonically_identical_subtree(mocker):
+    d_item = OR(deployment_body("app:1"), TEST_INT, TEST_INT_VER)
+    current = deployment_body("app:1")
+    cpu_equal = mocker.spy(OR, "cpu_equal")
+
+    assert d_item.obj_intersect_equal(d_item.body, current)
+    cpu_equal.assert_not_called()
+
+
+def test_obj_intersect_equal_deeply_nested():
+    desired: dict = {}
+    current: dict = {}
+    d, c = desired, current
+    for _ in range(5000):
+        d["a"] = {}
+        c["a"] = {}
+        d, c = d["a"], c["a"]
+    d["b"] = 1
+    c["b"] = 2
+    d_item = OR({"kind": "kind", "metadata": {"name": "name"}}, TEST_INT, TEST_INT_VER)
+
+    assert not d_item.obj_intersect_equal({"spec": [desired]}, {"spec": [current]})
+
+
 def test_verify_valid_k8s_object():
     resource = fxt.get_anymarkup("valid_resource.yml")
     openshift_resource = OR(resource, TEST_INT, TEST_INT_VER)
@@ -189,6 +266,29 @@ def test_sha256sum():
     assert not annotated.has_valid_sha256sum()
 
 
+def test_sha256sum_is_memoized(mocker):
+    resource = fxt.get_anymarkup("sha256sum.yml")
+    openshift_resource = OR(resource, TEST_INT, TEST_INT_VER)
+    canonicalize = mocker.spy(OR, "canonicalize")
+
+    sha256sum = openshift_resource.sha256sum()
+    annotated = openshift_resource.annotate()
+
+    assert openshift_resource.sha256sum() == sha256sum
+    assert annotated.sha256sum() == sha256sum
+    assert canonicalize.call_count == 1
+
+    openshift_resource.body = {**resource, "data": {"other": "value"}}
+    assert openshift_resource.sha256sum() != sha256sum
+    assert canonicalize.call_count == 2
+
+    openshift_resource.body = resource
+    assert openshift_resource.sha256sum() == sha256sum
+    openshift_resource.body["data"] = {"changed": "in place"}
+    openshift_resource.invalidate_cache()
+    assert openshift_resource.sha256sum() != sha256sum
+
+
 def test_has_owner_reference_true():
     resource = {
         "kind": "kind",
@@ -441,3 +541,117 @@ def test_resource_inventory_add_desired_resource_mixed_kinds():
             assert resource["desired"].get("foo")
         elif resource_type == "Deployment":
             assert len(resource["desired"]) == 0
+
+
+def test_resource_inventory_compact():
+    ri = ResourceInventory(compact=True)
+    ri.initialize_resource_type(cluster="cl", namespace="ns", resource_type="Secret")
+    ri.initialize_resource_type(cluster="cl", namespace="ns2", resource_type="Secret")
+    desired = build_secret("name", "int", "int-v", {"key": "value"})
+    sha256sum = desired.sha256sum()
+    other = build_secret("name", "int", "int-v", {"key": "value"})
+    current = build_secret("name", "int", "int-v", {"key": "other"})
+    ri.add_desired_resource("cl", "ns", desired)
+    ri.add_desired_resource("cl", "ns2", other)
+    ri.add_current("cl", "ns", "Secret", "name", current)
+
+    desired_size = desired.size_bytes()
+    assert desired_size
+    assert ri.size_bytes("cl", "desired") == 2 * desired_size
+    assert ri.size_bytes("other", "desired") == 0
+    assert desired.sha256sum() == sha256sum
+
+    assert ri.get_current("cl", "ns", "Secret", "name").body["data"] == {
+        "key": "b3RoZXI="
+    }
+    desired.body["data"]["key"] = "Y2hhbmdlZA=="
+    assert desired.body["data"]["key"] == "Y2hhbmdlZA=="
+    assert other.body["data"]["key"] == "dmFsdWU="
+
+
+def test_resource_inventory_size_bytes_not_compact():
+    ri = ResourceInventory(compact=False)
+    ri.initialize_resource_type(cluster="cl", namespace="ns", resource_type="Secret")
+    # not JSON serializable
+    desired = build_secret("name", "int", "int-v", {"key": "value"})
+    desired.body["data"] = {"key": b"value"}
+    ri.add_desired_resource("cl", "ns", desired)
+
+    assert desired.size_bytes() is None
+    assert ri.size_bytes("cl", "desired") is None
+
+
+def test_resource_inventory_compact_resource_type(tmp_path):
+    ri = ResourceInventory(spill_dir=str(tmp_path))
+    ri.initialize_resource_type(cluster="cl", namespace="ns", resource_type="Secret")
+    desired = build_secret("name", "int", "int-v", {"key": "value"})
+    current = build_secret("name", "int", "int-v", {"key": "other"})
+    ri.add_desired_resource("cl", "ns", desired)
+    ri.add_current("cl", "ns", "Secret", "name", current)
+
+    # loaded bodies are dropped again, and loaded anew from the store
+    body = current.body
+    assert current.body is body
+    ri.compact_resource_type("cl", "ns", "Secret")
+    assert current.body is not body
+    assert current.body == body
+
+    # changes made in place are kept once the compressed copy is invalidated
+    desired.body["data"]["key"] = "Y2hhbmdlZA=="
+    desired.invalidate_cache()
+    ri.compact_resource_type("cl", "ns", "Secret")
+    assert desired.body["data"] == {"key": "Y2hhbmdlZA=="}
+
+
+def test_resource_inventory_entry():
+    ri = ResourceInventory()
+    ri.initialize_resource_type(
+        cluster="cl", namespace="ns", resource_type="Deployment", managed_names=["a"]
+    )
+    _, _, _, entry = next(iter(ri))
+
+    assert entry["managed_names"] == ["a"]
+    assert entry["current"] == entry["desired"] == {}
+    with pytest.raises(KeyError):
+        entry["other"]
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_resource_inventory_parallel_add(compact):
+    ri = ResourceInventory(compact=compact)
+    namespaces = [f"ns-{i}" for i in range(16)]
+    for namespace in namespaces:
+        ri.initialize_resource_type("cl", namespace, "Deployment")
+
+    def populate(namespace):
+        for i in range(50):
+            ri.add_desired_resource(
+                "cl", namespace, build_resource("Deployment", "apps/v1", f"d-{i}")
+            )
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(populate, namespaces))
+
+    assert {
+        namespace: len(data["desired"]) for _, namespace, _, data in ri
+    } == dict.fromkeys(namespaces, 50)
+    if compact:
+        # the identical bodies share one compressed copy
+        assert len(ri._store) == 50
+
+
+def test_resource_inventory_spill(tmp_path):
+    ri = ResourceInventory(spill_dir=str(tmp_path))
+    ri.initialize_resource_type(cluster="cl", namespace="ns", resource_type="Secret")
+    desired = build_secret("name", "int", "int-v", {"key": "value"})
+    current = build_secret("name", "int", "int-v", {"key": "other"})
+    ri.add_desired_resource("cl", "ns", desired)
+    ri.add_current("cl", "ns", "Secret", "name", current)
+
+    assert ri.compact
+    assert len(list(tmp_path.iterdir())) == 1
+    desired_size = desired.size_bytes()
+    assert desired_size
+    assert ri.size_bytes("cl", "desired") == desired_size
+    assert current.body["data"] == {"key": "b3RoZXI="}
+    assert ri.get_desired("cl", "ns", "Secret", "name") == desired
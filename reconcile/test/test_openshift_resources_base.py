@@ -36,7 +36,7 @@ def oc_cs1(self) -> oc.OCClient:
         "Template": ["template.openshift.io/v1"],
         "Subscription": ["apps.open-cluster-management.io/v1", "operators.coreos.com"],
     }
-    client.get_items = lambda kind, **kwargs: []
+    client.iter_items = lambda kind, **kwargs: iter([])  # type: ignore[method-assign]
     return client
 
 
@@ -124,7 +124,7 @@ def test_fetch_current_state_ri_not_initialized(
     oc_cs1: oc.OCClient, tmpl1: dict[str, Any]
 ):
     ri = ResourceInventory()
-    oc_cs1.get_items = lambda kind, **kwargs: [tmpl1]  # type: ignore[method-assign]
+    oc_cs1.iter_items = lambda kind, **kwargs: iter([tmpl1])  # type: ignore[method-assign]
     ri.initialize_resource_type("cs1", "wrong_namespace", "Template")
     ri.initialize_resource_type("wrong_cluster", "ns1", "Template")
     ri.initialize_resource_type("cs1", "ns1", "wrong_kind")
@@ -145,7 +145,7 @@ def test_fetch_current_state_ri_not_initialized(
 def test_fetch_current_state_ri_initialized(oc_cs1: oc.OCClient, tmpl1: dict[str, Any]):
     ri = ResourceInventory()
     ri.initialize_resource_type("cs1", "ns1", "Template")
-    oc_cs1.get_items = lambda kind, **kwargs: [tmpl1]  # type: ignore[method-assign]
+    oc_cs1.iter_items = lambda kind, **kwargs: iter([tmpl1])  # type: ignore[method-assign]
     orb.fetch_current_state(
         oc=oc_cs1,
         ri=ri,
@@ -168,7 +168,7 @@ def test_fetch_current_state_kind_not_supported(
 ):
     ri = ResourceInventory()
     ri.initialize_resource_type("cs1", "ns1", "AnUnsupportedKind")
-    oc_cs1.get_items = lambda kind, **kwargs: [tmpl1]
+    oc_cs1.iter_items = lambda kind, **kwargs: iter([tmpl1])  # type: ignore[method-assign]
     orb.fetch_current_state(
         oc=oc_cs1,
         ri=ri,
@@ -185,7 +185,7 @@ def test_fetch_current_state_kind_not_supported(
 def test_fetch_current_state_long_kind(oc_cs1: oc.OCClient, tmpl1: dict[str, Any]):
     ri = ResourceInventory()
     ri.initialize_resource_type("cs1", "ns1", "Template.template.openshift.io")
-    oc_cs1.get_items = lambda kind, **kwargs: [tmpl1]  # type: ignore
+    oc_cs1.iter_items = lambda kind, **kwargs: iter([tmpl1])  # type: ignore
     orb.fetch_current_state(
         oc=oc_cs1,
         ri=ri,
@@ -208,7 +208,7 @@ def test_fetch_current_state_long_kind_not_supported(
 ):
     ri = ResourceInventory()
     ri.initialize_resource_type("cs1", "ns1", "UnknownKind.mysterious.io")
-    oc_cs1.get_items = lambda kind, **kwargs: [tmpl1]
+    oc_cs1.iter_items = lambda kind, **kwargs: iter([tmpl1])  # type: ignore[method-assign]
     orb.fetch_current_state(
         oc=oc_cs1,
         ri=ri,
@@ -225,7 +225,7 @@ def test_fetch_current_state_long_kind_not_supported(
 def test_fetch_states(current_state_spec: CurrentStateSpec, tmpl1: dict[str, Any]):
     ri = ResourceInventory()
     ri.initialize_resource_type("cs1", "ns1", "Template")
-    current_state_spec.oc.get_items = lambda kind, **kwargs: [tmpl1]  # type: ignore[method-assign]
+    current_state_spec.oc.iter_items = lambda kind, **kwargs: iter([tmpl1])  # type: ignore[method-assign]
     orb.fetch_states(ri=ri, spec=current_state_spec)
     _, _, _, resource = next(iter(ri))
     assert len(resource["current"]) == 1
@@ -243,7 +243,7 @@ def test_fetch_states_unknown_kind(current_state_spec: CurrentStateSpec):
 
 
 def test_fetch_states_oc_error(current_state_spec: CurrentStateSpec):
-    current_state_spec.oc.get_items = Mock(  # type: ignore[method-assign]
+    current_state_spec.oc.iter_items = Mock(  # type: ignore[method-assign]
         side_effect=oc.StatusCodeError("something wrong with openshift")
     )
     ri = ResourceInventory()
@@ -476,3 +476,22 @@ def test_secret_keys(test_parameters, exception_expected):
             orb.assert_valid_secret_keys(test_parameters)
     else:
         orb.assert_valid_secret_keys(test_parameters)
+
+
+def test_referenced_resource_paths(oc_cs1: oc.OCNative):
+    def spec(provider: str, content: str) -> ob.DesiredStateSpec:
+        return ob.DesiredStateSpec(
+            oc=oc_cs1,
+            cluster="cs1",
+            namespace="ns1",
+            resource={"provider": provider, "resource": {"content": content}},
+            parent={},
+        )
+
+    specs = [
+        spec("resource-template", "{{ query('/a.gql') }} {{ query( \"/b.gql\" ) }}"),
+        spec("prometheus-rule", "{{{ query('/c.gql', x=1) }}}"),
+        spec("resource", "{{ query('/ignored.gql') }}"),
+    ]
+
+    assert orb.referenced_resource_paths(specs) == {"/a.gql", "/b.gql", "/c.gql"}
@@ -1,5 +1,7 @@
 import pytest
+from pytest_mock import MockerFixture
 
+from reconcile.utils import three_way_diff_strategy
 from reconcile.utils.openshift_resource import OpenshiftResource as OR
 from reconcile.utils.three_way_diff_strategy import (
     is_cpu_mutation,
@@ -129,3 +131,16 @@ def test_3wpd_diff_detects_switch_integration(deployment):
     c_item = OR(deployment, "same-integration", "").annotate(canonicalize=False)
 
     assert three_way_diff_using_hash(c_item, d_item) is False
+
+
+def test_3wpd_identical_objects_skip_patch(deployment, mocker: MockerFixture):
+    d_item = OR(deployment, "", "")
+    c_item = d_item.annotate(canonicalize=False)
+    from_diff = mocker.spy(three_way_diff_strategy.jsonpatch.JsonPatch, "from_diff")
+
+    assert three_way_diff_using_hash(c_item, d_item) is True
+    from_diff.assert_not_called()
+
+    c_item.body["spec"]["manual_added_attr"] = 5
+    assert three_way_diff_using_hash(c_item, d_item) is True
+    from_diff.assert_called_once()
@@ -5,7 +5,10 @@ import pytest
 from pytest_mock import MockerFixture
 
 from reconcile.utils.jobcontroller.controller import K8sJobController
-from reconcile.utils.oc import OCCli
+from reconcile.utils.oc import (
+    OCCli,
+    OCNative,
+)
 
 
 @pytest.fixture
@@ -45,6 +48,22 @@ def controller(oc: OCCli, mocker: MockerFixture) -> K8sJobController:
     return controller
 
 
+@pytest.fixture
+def watching_controller(mocker: MockerFixture) -> K8sJobController:
+    controller = K8sJobController(
+        oc=mocker.create_autospec(OCNative),
+        cluster="some-cluster",
+        namespace="some-ns",
+        integration="some-integration",
+        integration_version="0.1",
+        dry_run=False,
+        time_module=TimeMock(),
+        watch_jobs=True,
+    )
+    mocker.patch.object(controller, "_lookup_job_uid", return_value="some-uid")
+    return controller
+
+
 class TimeMock:
     def __init__(self) -> None:
         self.current_time = 0.0
@@ -1,9 +1,13 @@
+from collections.abc import Iterator
 from typing import Any
 from unittest.mock import patch
 
 import pytest
 
-from reconcile.test.utils.jobcontroller.conftest import OCItemSetter
+from reconcile.test.utils.jobcontroller.conftest import (
+    OCItemSetter,
+    TimeMock,
+)
 from reconcile.test.utils.jobcontroller.fixtures import (
     SomeJob,
     build_job_resource,
@@ -15,6 +19,7 @@ from reconcile.utils.jobcontroller.models import (
     JobStatus,
     JobValidationError,
 )
+from reconcile.utils.oc import OCCli
 
 #
 # enqueue_job
@@ -293,6 +298,118 @@ def test_controller_wait_for_job_list_completion_no_timeout(
     assert controller.time_module.time() == 5
 
 
+#
+# watch
+#
+
+
+def test_controller_wait_for_job_list_completion_watch(
+    watching_controller: K8sJobController,
+) -> None:
+    controller = watching_controller
+    job1 = SomeJob(identifying_attribute="some-id-1", description="some-description")
+    job2 = SomeJob(identifying_attribute="some-id-2", description="some-description")
+    controller.oc.list_items.return_value = (  # type: ignore[attr-defined]
+        [
+            build_job_resource(job1, build_job_status(active=1)),
+            build_job_resource(job2, build_job_status(active=1)),
+        ],
+        "10",
+    )
+    controller.oc.watch_items.return_value = iter([  # type: ignore[attr-defined]
+        ("MODIFIED", build_job_resource(job1, build_job_status(succeeded=1))),
+        ("MODIFIED", build_job_resource(job2, build_job_status(failed=7))),
+    ])
+
+    expected = {
+        job1.name(): JobStatus.SUCCESS,
+        job2.name(): JobStatus.ERROR,
+    }
+    assert expected == controller.wait_for_job_list_completion(
+        {job1.name(), job2.name()},
+        check_interval_seconds=5,
+        timeout_seconds=10,
+    )
+    controller.oc.watch_items.assert_called_once_with(  # type: ignore[attr-defined]
+        kind="Job", namespace="some-ns", timeout_seconds=10, resource_version="10"
+    )
+    assert controller.time_module.time() == 0
+
+
+def test_controller_wait_for_completion_watch_continues_from_last_event(
+    watching_controller: K8sJobController,
+) -> None:
+    controller = watching_controller
+    job = SomeJob(identifying_attribute="some-id", description="some-description")
+    controller.oc.list_items.return_value = (  # type: ignore[attr-defined]
+        [build_job_resource(job, build_job_status(active=1))],
+        "10",
+    )
+    running = build_job_resource(job, build_job_status(active=1))
+    running["metadata"]["resourceVersion"] = "11"
+    controller.oc.watch_items.side_effect = [  # type: ignore[attr-defined]
+        iter([("MODIFIED", running)]),
+        iter([("MODIFIED", build_job_resource(job, build_job_status(succeeded=1)))]),
+    ]
+
+    assert controller.wait_for_job_completion(
+        job.name(), check_interval_seconds=5, timeout_seconds=-1
+    )
+    controller.oc.list_items.assert_called_once()  # type: ignore[attr-defined]
+    watch_calls = controller.oc.watch_items.call_args_list  # type: ignore[attr-defined]
+    assert [c.kwargs["resource_version"] for c in watch_calls] == ["10", "11"]
+
+
+def test_controller_wait_for_completion_watch_timeout(
+    watching_controller: K8sJobController,
+) -> None:
+    controller = watching_controller
+    job = SomeJob(identifying_attribute="some-id", description="some-description")
+    controller.oc.list_items.return_value = (  # type: ignore[attr-defined]
+        [build_job_resource(job, build_job_status(active=1))],
+        "10",
+    )
+
+    def watch_items(
+        kind: str, namespace: str, timeout_seconds: int, resource_version: str
+    ) -> Iterator[tuple[str, dict[str, Any]]]:
+        controller.time_module.sleep(timeout_seconds)
+        return iter([])
+
+    controller.oc.watch_items.side_effect = watch_items  # type: ignore[attr-defined]
+
+    with pytest.raises(TimeoutError):
+        controller.wait_for_job_completion(
+            job.name(), check_interval_seconds=5, timeout_seconds=4
+        )
+    assert controller.time_module.time() == 4
+
+
+def test_controller_watch_not_supported(
+    oc: OCCli, set_oc_get_items_side_effect: OCItemSetter
+) -> None:
+    controller = K8sJobController(
+        oc=oc,
+        cluster="some-cluster",
+        namespace="some-ns",
+        integration="some-integration",
+        integration_version="0.1",
+        time_module=TimeMock(),
+        watch_jobs=True,
+    )
+    job = SomeJob(identifying_attribute="some-id", description="some-description")
+    set_oc_get_items_side_effect([
+        [build_job_resource(job, build_job_status(active=1))],  # 0 seconds
+        [build_job_resource(job, build_job_status(succeeded=1))],  # 5 seconds
+    ])
+
+    assert not controller.watch_jobs
+    assert controller.wait_for_job_completion(
+        job.name(), check_interval_seconds=5, timeout_seconds=10
+    )
+    assert controller.time_module.time() == 5
+
+
 #
 # build secret
 #
@@ -0,0 +1,57 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from reconcile.utils.body_store import (
+    MemoryBodyStore,
+    SqliteBodyStore,
+)
+
+
+def test_sqlite_body_store_put_and_get(tmp_path: Path) -> None:
+    store = SqliteBodyStore(str(tmp_path))
+
+    spilled = store.put(b"body")
+
+    assert spilled.load() == b"body"
+    assert spilled.size == 4
+    assert store.put(b"body") is spilled
+    assert store.put(b"other").load() == b"other"
+    assert len(store) == 2
+    with pytest.raises(KeyError):
+        store.get(b"missing")
+
+
+def test_sqlite_body_store_threads(tmp_path: Path) -> None:
+    store = SqliteBodyStore(str(tmp_path))
+    bodies = [str(i % 50).encode() for i in range(500)]
+
+    with ThreadPoolExecutor(8) as pool:
+        spilled = list(pool.map(store.put, bodies))
+
+    assert [s.load() for s in spilled] == bodies
+    assert len(store) == 50
+
+
+def test_sqlite_body_store_close(tmp_path: Path) -> None:
+    store = SqliteBodyStore(str(tmp_path))
+    assert os.path.exists(store.path)
+
+    store.close()
+
+    assert not os.path.exists(store.path)
+    assert not list(tmp_path.iterdir())
+
+
+def test_memory_body_store_threads() -> None:
+    store = MemoryBodyStore()
+    bodies = [f"body-{i % 50}".encode() for i in range(500)]
+
+    with ThreadPoolExecutor(8) as pool:
+        stored = list(pool.map(store.put, bodies))
+
+    assert stored == bodies
+    assert stored[0] is stored[50]
+    assert len(store) == 50
@@ -0,0 +1,47 @@
+import json
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
+
+from reconcile.utils import canonical_json
+
+DOCUMENTS: list[Any] = [
+    {
+        "kind": "Deployment",
+        "metadata": {"name": "app", "labels": {"b": "2", "a": "1"}},
+        "spec": {"replicas": 3, "paused": False, "selector": None},
+    },
+    {"data": {"ключ": "значение", "emoji": "\U0001f600", "tab": "a\tb\n"}},
+    {"floats": [0.1, 1e16, -0.0, 1.5e-7, float("inf"), float("nan")]},
+    {"ints": [0, -1, 2**64], "nested": [[{"z": 1, "y": [2]}]], "empty": {}},
+    ["list", "at", "top"],
+    "string",
+    42,
+    None,
+]
+
+
+@pytest.fixture
+def backend(request: pytest.FixtureRequest) -> Iterator[str]:
+    name: str = request.param
+    canonical_json.set_backend(name)
+    yield name
+    canonical_json.set_backend("c" if "c" in canonical_json.backends() else "json")
+
+
+@pytest.mark.parametrize("backend", canonical_json.backends(), indirect=True)
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_canonical_json_dumps(backend: str, document: Any) -> None:
+    assert canonical_json.dumps(document) == json.dumps(document, sort_keys=True)
+
+
+@pytest.mark.parametrize("backend", canonical_json.backends(), indirect=True)
+def test_canonical_json_dumps_not_serializable(backend: str) -> None:
+    with pytest.raises(TypeError):
+        canonical_json.dumps({"a": object()})
+
+
+def test_canonical_json_unknown_backend() -> None:
+    with pytest.raises(ValueError, match="unknown canonical JSON backend"):
+        canonical_json.set_backend("unknown")
@@ -0,0 +1,102 @@
+import operator
+import threading
+from collections import defaultdict
+
+import pytest
+
+from reconcile.utils.cluster_scheduler import (
+    ClusterDeadlineExceededError,
+    ClusterScheduler,
+)
+
+cluster_of = operator.itemgetter(0)
+
+
+class TimeMock:
+    def __init__(self) -> None:
+        self.current_time = 0.0
+
+    def time(self) -> float:
+        return self.current_time
+
+
+def test_cluster_scheduler_results_in_order() -> None:
+    items = [("a", 1), ("b", 2), ("a", 3), ("c", 4)]
+    scheduler = ClusterScheduler(thread_pool_size=3)
+
+    results = scheduler.run(
+        lambda item, factor: item[1] * factor, items, cluster_of, factor=10
+    )
+
+    assert results == [10, 20, 30, 40]
+    assert scheduler.stats["a"].tasks == 2
+
+
+def test_cluster_scheduler_round_robin() -> None:
+    items = [("a", 1), ("a", 2), ("a", 3), ("b", 4), ("b", 5)]
+    order: list[tuple[str, int]] = []
+
+    ClusterScheduler(thread_pool_size=1).run(order.append, items, cluster_of)
+
+    assert order == [("a", 1), ("b", 4), ("a", 2), ("b", 5), ("a", 3)]
+
+
+def test_cluster_scheduler_max_workers_per_cluster() -> None:
+    items = [("a", i) for i in range(6)] + [("b", i) for i in range(6)]
+    lock = threading.Lock()
+    running: dict[str, int] = defaultdict(int)
+    max_running: dict[str, int] = defaultdict(int)
+    barrier = threading.Barrier(2, timeout=5)
+
+    def func(item: tuple[str, int]) -> None:
+        cluster = item[0]
+        with lock:
+            running[cluster] += 1
+            max_running[cluster] = max(max_running[cluster], running[cluster])
+        # both clusters run at the same time
+        barrier.wait()
+        with lock:
+            running[cluster] -= 1
+
+    ClusterScheduler(thread_pool_size=4, max_workers_per_cluster=1).run(
+        func, items, cluster_of
+    )
+
+    assert max_running == {"a": 1, "b": 1}
+
+
+def test_cluster_scheduler_deadline() -> None:
+    time_mock = TimeMock()
+    items = [("a", 1), ("b", 2), ("a", 3), ("a", 4)]
+
+    def func(item: tuple[str, int]) -> int:
+        if item[0] == "a":
+            time_mock.current_time += 10
+        return item[1]
+
+    scheduler = ClusterScheduler(
+        thread_pool_size=1, cluster_deadline_seconds=5, time_module=time_mock
+    )
+    results = scheduler.run(func, items, cluster_of)
+
+    assert results[:2] == [1, 2]
+    assert all(isinstance(r, ClusterDeadlineExceededError) for r in results[2:])
+    assert results[2].cluster == "a"
+    assert scheduler.stats["a"].skipped == 2
+    assert scheduler.stats["b"].queue_seconds == 10
+
+
+def test_cluster_scheduler_raises() -> None:
+    def func(item: tuple[str, int]) -> int:
+        if item[1] == 2:
+            raise ValueError("boom")
+        return item[1]
+
+    with pytest.raises(ValueError, match="boom"):
+        ClusterScheduler(thread_pool_size=2).run(func, [("a", 1), ("b", 2)], cluster_of)
+
+    results = ClusterScheduler(thread_pool_size=2).run(
+        func, [("a", 1), ("b", 2)], cluster_of, return_exceptions=True
+    )
+    assert results[0] == 1
+    assert isinstance(results[1], ValueError)
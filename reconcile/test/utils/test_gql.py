@@ -1,12 +1,26 @@
+import threading
+import time
+
 import pytest
 import requests
 from gql.transport.exceptions import TransportQueryError
 
+from reconcile.status import RunningState
+from reconcile.utils import gql
 from reconcile.utils.gql import (
     GqlApi,
     GqlApiError,
     GqlApiErrorForbiddenSchema,
     GqlApiIntegrationNotFound,
+    GqlApiSingleton,
+    GqlGetResourceError,
+    GqlResultCache,
+    parse_query,
+)
+from reconcile.utils.metrics import (
+    gql_document_cache_hits,
+    gql_document_cache_misses,
+    gql_result_cache_hits,
 )
 
 TEST_QUERY = """
@@ -79,3 +93,258 @@ def test_gqlapi_throws_gqlapierrorforbiddenschema_exception(mocker):
     with pytest.raises(GqlApiErrorForbiddenSchema):
         gql_api = GqlApi("test_url", "test_token", "INTEGRATION", validate_schemas=True)
         gql_api.query.__wrapped__(gql_api, TEST_QUERY)
+
+
+def test_parse_query_is_cached(mocker):
+    mocker.patch.object(gql, "_documents", gql.OrderedDict())
+    mocker.patch.object(gql, "DOCUMENT_CACHE_SIZE", 2)
+    parse = mocker.spy(gql, "gql")
+    hits = gql_document_cache_hits.labels(integration=RunningState().integration)
+    misses = gql_document_cache_misses.labels(integration=RunningState().integration)
+    hits_before, misses_before = hits._value.get(), misses._value.get()
+
+    document = parse_query(TEST_QUERY)
+    assert parse_query(TEST_QUERY) is document
+    assert parse.call_count == 1
+    assert hits._value.get() == hits_before + 1
+    assert misses._value.get() == misses_before + 1
+
+    # the least recently used document is dropped
+    parse_query("{ a }")
+    parse_query(TEST_QUERY)
+    parse_query("{ b }")
+    assert list(gql._documents) == [TEST_QUERY, "{ b }"]
+
+
+def test_gqlapi_query_uses_parsed_document(mocker):
+    patched_client = mocker.patch("reconcile.utils.gql.Client.execute", autospec=True)
+    patched_client.return_value.formatted = {"data": {"integrations": []}}
+    gql_api = GqlApi("test_url", "test_token", validate_schemas=False)
+
+    gql_api.query(TEST_QUERY)
+    gql_api.query(TEST_QUERY)
+
+    assert patched_client.call_args_list[0].args[1] is parse_query(TEST_QUERY)
+    assert patched_client.call_args_list[1].args[1] is parse_query(TEST_QUERY)
+
+
+def test_gql_result_cache_evicts_least_recently_used(tmp_path):
+    cache = GqlResultCache(str(tmp_path))
+    result = {"data": {"a": "x" * 100}}
+    keys = [GqlResultCache.key("sha", "url", TEST_QUERY, {"i": i}) for i in range(3)]
+    cache.put(keys[0], result)
+    cache.max_bytes = (
+        2 * cache._connection.execute("SELECT size FROM results").fetchone()[0]
+    )
+
+    cache.put(keys[1], result)
+    assert cache.get(keys[0]) == result
+    cache.put(keys[2], result)
+
+    assert cache.get(keys[0]) == result
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) == result
+    # the running total follows replaced and evicted results
+    cache.put(keys[2], result)
+    assert cache._connection.execute("SELECT size FROM total").fetchone() == (
+        cache.max_bytes,
+    )
+    # shared with other processes through the directory
+    assert GqlResultCache(str(tmp_path)).get(keys[2]) == result
+
+
+def test_gqlapi_query_uses_result_cache(mocker, monkeypatch, tmp_path):
+    monkeypatch.setenv(gql.RESULT_CACHE_DIR_ENV, str(tmp_path))
+    mocker.patch.object(gql, "_result_cache", None)
+    mocker.patch.object(gql, "_result_cache_disabled", False)
+    patched_client = mocker.patch("reconcile.utils.gql.Client.execute", autospec=True)
+    patched_client.return_value.formatted = {"data": {"integrations": []}}
+    hits = gql_result_cache_hits.labels(integration=RunningState().integration)
+    hits_before = hits._value.get()
+
+    gql_api = GqlApi("test_url", validate_schemas=False, commit="sha")
+    assert gql_api.query(TEST_QUERY) == {"integrations": []}
+    assert GqlApi("test_url", validate_schemas=False, commit="sha").query(
+        TEST_QUERY
+    ) == {"integrations": []}
+    assert patched_client.call_count == 1
+    assert hits._value.get() == hits_before + 1
+
+    # different variables, or results without a known commit aren't cached
+    gql_api.query(TEST_QUERY, {"a": "b"})
+    GqlApi("test_url", validate_schemas=False).query(TEST_QUERY)
+    GqlApi("test_url", validate_schemas=False).query(TEST_QUERY)
+    assert patched_client.call_count == 4
+
+
+def test_gqlapi_query_result_cache_unavailable(mocker, monkeypatch, tmp_path):
+    not_a_directory = tmp_path / "file"
+    not_a_directory.write_text("")
+    monkeypatch.setenv(gql.RESULT_CACHE_DIR_ENV, str(not_a_directory))
+    mocker.patch.object(gql, "_result_cache", None)
+    mocker.patch.object(gql, "_result_cache_disabled", False)
+    patched_client = mocker.patch("reconcile.utils.gql.Client.execute", autospec=True)
+    patched_client.return_value.formatted = {"data": {"integrations": []}}
+    cache_class = mocker.spy(gql, "GqlResultCache")
+
+    gql_api = GqlApi("test_url", validate_schemas=False, commit="sha")
+    assert gql_api.query(TEST_QUERY) == {"integrations": []}
+    assert gql_api.query(TEST_QUERY) == {"integrations": []}
+    assert patched_client.call_count == 2
+    # the cache is disabled after the first failure
+    assert cache_class.call_count == 1
+
+
+def test_gqlapi_get_resources(mocker):
+    mocker.patch.object(gql, "PATHS_PER_QUERY", 2)
+    patched_query = mocker.patch.object(GqlApi, "query", autospec=True)
+    patched_query.side_effect = lambda self, query, variables, **kwargs: {
+        alias: [{"path": path, "content": path}] if path != "/missing" else []
+        for alias, path in variables.items()
+    }
+    gql_api = GqlApi("test_url", validate_schemas=False)
+
+    resources = gql_api.get_resources(["/a", "/b", "/a", "/c"])
+
+    assert resources == {p: {"path": p, "content": p} for p in ["/a", "/b", "/c"]}
+    assert patched_query.call_count == 2
+    assert patched_query.call_args_list[0].args[2] == {"p0": "/a", "p1": "/b"}
+    assert "p1: resources_v1(path: $p1)" in patched_query.call_args_list[0].args[1]
+    # already fetched resources aren't queried again
+    assert gql_api.get_resource("/b") == {"path": "/b", "content": "/b"}
+    assert patched_query.call_count == 2
+
+    with pytest.raises(GqlGetResourceError):
+        gql_api.get_resources(["/a", "/missing"])
+
+
+def test_gqlapi_prefetch_resources(mocker):
+    patched_query = mocker.patch.object(GqlApi, "query", autospec=True)
+    patched_query.side_effect = lambda self, query, variables, **kwargs: {
+        alias: [{"path": path, "content": path}] if path != "/missing" else []
+        for alias, path in variables.items()
+    }
+    gql_api = GqlApi("test_url", validate_schemas=False)
+
+    gql_api.prefetch_resources(["/a", "/missing"])
+    assert gql_api.get_resource("/a") == {"path": "/a", "content": "/a"}
+    assert patched_query.call_count == 1
+    # left to get_resource to report
+    patched_query.side_effect = None
+    patched_query.return_value = {"resources": []}
+    with pytest.raises(GqlGetResourceError):
+        gql_api.get_resource("/missing")
+
+    patched_query.side_effect = GqlApiError("down")
+    gql_api.prefetch_resources(["/b"])
+
+
+def test_gqlapi_get_templates(mocker):
+    patched_query = mocker.patch.object(GqlApi, "query", autospec=True)
+    patched_query.return_value = {
+        "p0": [{"path": "/a", "template": "a"}],
+        "p1": [{"path": "/b", "template": "b"}],
+    }
+    gql_api = GqlApi("test_url", validate_schemas=False)
+
+    assert gql_api.get_templates(["/a", "/b"]) == {
+        "/a": {"path": "/a", "template": "a"},
+        "/b": {"path": "/b", "template": "b"},
+    }
+    patched_query.return_value = {"p0": []}
+    with pytest.raises(GqlGetResourceError):
+        gql_api.get_templates(["/c"])
+
+
+def run_concurrently(gql_api, patched_client, threads):
+    """Runs TEST_QUERY in threads while the first execution is blocked until
+    all other threads wait for it."""
+    release = threading.Event()
+    execute = patched_client.side_effect
+
+    def blocked_execute(*args, **kwargs):
+        release.wait(timeout=5)
+        return execute(*args, **kwargs)
+
+    patched_client.side_effect = blocked_execute
+    results = [None] * threads
+    errors = [None] * threads
+
+    def run(i):
+        try:
+            results[i] = gql_api.query.__wrapped__(gql_api, TEST_QUERY)
+        except Exception as e:
+            errors[i] = e
+
+    workers = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        flights = list(gql_api._flights.values())
+        if flights and flights[0].waiters == threads - 1:
+            break
+        time.sleep(0.01)
+    release.set()
+    for worker in workers:
+        worker.join()
+    return results, errors
+
+
+def test_gqlapi_query_single_flight(mocker):
+    patched_client = mocker.patch("reconcile.utils.gql.Client.execute", autospec=True)
+    patched_client.side_effect = lambda *args, **kwargs: mocker.Mock(
+        formatted={"data": {"integrations": [{"name": "a"}]}}
+    )
+    gql_api = GqlApi("test_url", validate_schemas=False)
+
+    results, errors = run_concurrently(gql_api, patched_client, 4)
+
+    assert errors == [None] * 4
+    assert patched_client.call_count == 1
+    assert results == [{"integrations": [{"name": "a"}]}] * 4
+    # every thread gets its own result
+    assert len({id(r["integrations"]) for r in results}) == 4
+    assert not gql_api._flights
+
+
+def test_gqlapi_query_single_flight_error(mocker):
+    patched_client = mocker.patch("reconcile.utils.gql.Client.execute", autospec=True)
+
+    def fail(*args, **kwargs):
+        raise TransportQueryError("Error in GraphQL payload")
+
+    patched_client.side_effect = fail
+    gql_api = GqlApi("test_url", validate_schemas=False)
+
+    _, errors = run_concurrently(gql_api, patched_client, 3)
+
+    assert patched_client.call_count == 1
+    assert all(isinstance(e, GqlApiError) for e in errors)
+    assert not gql_api._flights
+
+
+def test_gqlapi_singleton_memo(mocker, monkeypatch):
+    patched_client = mocker.patch("reconcile.utils.gql.Client.execute", autospec=True)
+    patched_client.side_effect = lambda *args, **kwargs: mocker.Mock(
+        formatted={"data": {"integrations": []}}
+    )
+
+    gql_api = GqlApiSingleton.create("test_url")
+    gql_api.query(TEST_QUERY)
+    gql_api.query(TEST_QUERY)
+    assert patched_client.call_count == 2
+
+    monkeypatch.setenv(gql.QUERY_MEMO_ENV, "true")
+    gql_api = GqlApiSingleton.create("test_url")
+    first = gql_api.query(TEST_QUERY)
+    first["integrations"].append("changed")
+    assert gql_api.query(TEST_QUERY) == {"integrations": []}
+    assert gql_api.query(TEST_QUERY, {"a": "b"}) == {"integrations": []}
+    assert patched_client.call_count == 4
+
+    # the memo ends with the instance
+    gql_api = GqlApiSingleton.create("test_url")
+    gql_api.query(TEST_QUERY)
+    assert patched_client.call_count == 5
+    GqlApiSingleton.close()
@@ -1,11 +1,22 @@
+import json
 import logging
 import os
 from unittest import TestCase
 from unittest.mock import patch
 
 import pytest
+from kubernetes.client.exceptions import ApiException
 from kubernetes.dynamic import Resource
-from kubernetes.dynamic.exceptions import ResourceNotFoundError
+from kubernetes.dynamic.exceptions import (
+    BadRequestError,
+    ConflictError,
+    DynamicApiError,
+    GoneError,
+    NotFoundError,
+    ResourceNotFoundError,
+    UnprocessibleEntityError,
+)
+from pytest_mock import MockerFixture
 
 import reconcile.utils.oc
 from reconcile.utils.oc import (
@@ -14,13 +25,20 @@ from reconcile.utils.oc import (
     LABEL_MAX_KEY_PREFIX_LENGTH,
     LABEL_MAX_VALUE_LENGTH,
     OC,
+    DeploymentFieldIsImmutableError,
+    FieldIsImmutableError,
+    MetaDataAnnotationsTooLongApplyError,
+    ObjectHasBeenModifiedError,
     OC_Map,
     OCCli,
     OCLogMsg,
     OCNative,
+    PodIndex,
     PodNotReadyError,
+    RequestEntityTooLargeError,
     StatusCodeError,
     equal_spec_template,
+    take_over_client_side_apply,
     validate_labels,
 )
 from reconcile.utils.openshift_resource import OpenshiftResource as OR
@@ -1002,6 +1020,52 @@ def test_is_kind_not_namespaced_full_name(oc_api_resources):
     assert not oc_api_resources.is_kind_namespaced("kind2.group2")
 
 
+API_RESOURCES_OUTPUT = b"""deployments   deploy   apps/v1   true   Deployment
+namespaces    ns       v1        false  Namespace"""
+
+
+@pytest.fixture
+def oc_discovery_cache(monkeypatch, tmp_path) -> OCCli:
+    monkeypatch.setenv("USE_NATIVE_CLIENT", "False")
+    monkeypatch.setenv("OC_DISCOVERY_CACHE_DIR", str(tmp_path))
+    return OC("cluster", "server", "token", local=True)  # type: ignore[return-value]
+
+
+def test_get_api_resources_writes_discovery_cache(
+    oc_discovery_cache: OCCli, mocker: MockerFixture
+) -> None:
+    mocker.patch.object(oc_discovery_cache, "_run", return_value=API_RESOURCES_OUTPUT)
+    oc_discovery_cache.get_api_resources()
+    assert not oc_discovery_cache.api_resources_from_cache
+
+    oc: OCCli = OC("cluster", "server", "token", local=True)  # type: ignore[assignment]
+    run = mocker.patch.object(oc, "_run")
+    api_resources = oc.get_api_resources()
+    run.assert_not_called()
+    assert oc.api_resources_from_cache
+    assert api_resources["Deployment"][0].group_version == "apps/v1"
+    assert not oc.is_kind_namespaced("Namespace")
+
+
+def test_unknown_kind_refreshes_discovery_cache(
+    oc_discovery_cache: OCCli, mocker: MockerFixture
+) -> None:
+    mocker.patch.object(oc_discovery_cache, "_run", return_value=API_RESOURCES_OUTPUT)
+    oc_discovery_cache.get_api_resources()
+
+    oc: OCCli = OC("cluster", "server", "token", local=True)  # type: ignore[assignment]
+    run = mocker.patch.object(
+        oc,
+        "_run",
+        return_value=API_RESOURCES_OUTPUT
+        + b"\nwidgets   w   example.com/v1   true   Widget",
+    )
+    oc.get_api_resources()
+    assert oc.is_kind_supported("Widget")
+    run.assert_called_once_with(["api-resources", "--no-headers"])
+    assert not oc.api_resources_from_cache
+
+
 @pytest.fixture
 def oc_native(
     monkeypatch,
@@ -1068,3 +1132,705 @@ def test_oc_native_get_all(oc_native: OCNative) -> None:
     oc_native.client.resources.get.return_value.get.assert_called_once_with(
         _request_timeout=60,
     )
+
+
+def test_oc_native_iter_items_paginates(oc_native: OCNative) -> None:
+    obj_client = oc_native.client.resources.get.return_value
+    obj_client.get.return_value.to_dict.side_effect = [
+        {"items": [{"metadata": {"name": "a"}}], "metadata": {"continue": "token"}},
+        {"items": [{"metadata": {"name": "b"}}], "metadata": {}},
+    ]
+
+    items = oc_native.iter_items("kind1", labels={"label1": "value1"}, page_size=1)
+
+    assert [i["metadata"]["name"] for i in items] == ["a", "b"]
+    assert obj_client.get.call_count == 2
+    obj_client.get.assert_called_with(
+        namespace="",
+        label_selector="label1=value1",
+        limit=1,
+        _continue="token",
+        _request_timeout=60,
+    )
+
+
+def test_oc_native_list_items(oc_native: OCNative) -> None:
+    obj_client = oc_native.client.resources.get.return_value
+    obj_client.get.return_value.to_dict.side_effect = [
+        {
+            "items": [{"metadata": {"name": "a"}}],
+            "metadata": {"continue": "token", "resourceVersion": "42"},
+        },
+        {"items": [{"metadata": {"name": "b"}}], "metadata": {}},
+    ]
+
+    items, resource_version = oc_native.list_items("kind1", page_size=1)
+
+    assert [i["metadata"]["name"] for i in items] == ["a", "b"]
+    assert resource_version == "42"
+
+
+def test_oc_native_iter_items_is_lazy(oc_native: OCNative) -> None:
+    obj_client = oc_native.client.resources.get.return_value
+    obj_client.get.return_value.to_dict.return_value = {
+        "items": [{"metadata": {"name": "a"}}],
+        "metadata": {"continue": "token"},
+    }
+
+    items = oc_native.iter_items("kind1")
+    next(items)
+
+    obj_client.get.assert_called_once()
+
+
+def test_oc_native_iter_items_missing_namespace(
+    oc_native: OCNative, mocker: MockerFixture
+) -> None:
+    mocker.patch.object(oc_native, "project_exists", return_value=False)
+
+    assert list(oc_native.iter_items("kind1", namespace="namespace")) == []
+    oc_native.client.resources.get.return_value.get.assert_not_called()
+
+
+def test_oc_native_iter_items_expired_continue_token(oc_native: OCNative) -> None:
+    obj_client = oc_native.client.resources.get.return_value
+    obj_client.get.side_effect = GoneError(ApiException(status=410))
+
+    with pytest.raises(StatusCodeError):
+        list(oc_native.iter_items("kind1"))
+
+
+@pytest.fixture
+def oc_native_writes(monkeypatch, mocker, api_resources: dict) -> OCNative:
+    monkeypatch.setenv("USE_NATIVE_CLIENT", "True")
+    monkeypatch.setenv("USE_NATIVE_WRITES", "True")
+    get_api_resources = mocker.patch.object(OCCli, "get_api_resources", autospec=True)
+    get_api_resources.return_value = api_resources
+    mocker.patch.object(OCNative, "_get_client", autospec=True)
+    mocker.patch.object(OCNative, "_run", autospec=True)
+    mocker.patch("reconcile.utils.oc.RunningState").return_value.timestamp = "0"
+    oc: OCNative = OC("cluster", "server", "token", local=True)  # type: ignore[assignment]
+    obj_client = oc.client.resources.get.return_value
+    obj_client.get.return_value.to_dict.return_value = {"metadata": {"name": "d"}}
+    return oc
+
+
+def api_error(
+    error_class: type[DynamicApiError], status: int, body: dict
+) -> DynamicApiError:
+    e = ApiException(status=status, reason="reason")
+    e.body = json.dumps(body)
+    return error_class(e)
+
+
+def deployment_resource() -> OR:
+    return OR(
+        {"apiVersion": "apps/v1", "kind": "Deployment", "metadata": {"name": "d"}},
+        "integration",
+        "1.0.0",
+    )
+
+
+def test_oc_native_writes_disabled(monkeypatch, mocker, api_resources: dict) -> None:
+    monkeypatch.setenv("USE_NATIVE_CLIENT", "True")
+    monkeypatch.setenv("USE_NATIVE_WRITES", "False")
+    mocker.patch.object(
+        OCCli, "get_api_resources", autospec=True, return_value=api_resources
+    )
+    mocker.patch.object(OCNative, "_get_client", autospec=True)
+    run = mocker.patch.object(OCNative, "_run", autospec=True)
+    mocker.patch("reconcile.utils.oc.RunningState").return_value.timestamp = "0"
+    oc: OCNative = OC("cluster", "server", "token", local=True)  # type: ignore[assignment]
+
+    oc.apply("namespace", deployment_resource())
+
+    run.assert_called_once()
+    oc.client.resources.get.assert_not_called()
+
+
+def test_oc_native_apply(oc_native_writes: OCNative) -> None:
+    resource = deployment_resource()
+
+    oc_native_writes.apply("namespace", resource)
+
+    oc_native_writes.client.resources.get.assert_called_once_with(
+        api_version="apps/v1", kind="Deployment"
+    )
+    obj_client = oc_native_writes.client.resources.get.return_value
+    obj_client.server_side_apply.assert_called_once_with(
+        body=resource.body,
+        namespace="namespace",
+        field_manager="qontract-reconcile",
+        force_conflicts=True,
+        _request_timeout=60,
+    )
+    oc_native_writes._run.assert_not_called()
+    obj_client.patch.assert_not_called()
+
+
+def test_oc_native_apply_drops_server_populated_metadata(
+    oc_native_writes: OCNative,
+) -> None:
+    body = {
+        "apiVersion": "apps/v1",
+        "kind": "ReplicaSet",
+        "metadata": {
+            "name": "rs",
+            "labels": {"app": "a"},
+            "managedFields": [{"manager": "kube-controller-manager"}],
+            "resourceVersion": "1",
+            "uid": "uid",
+            "creationTimestamp": "2024-01-01T00:00:00Z",
+            "generation": 1,
+        },
+        "spec": {"replicas": 0},
+    }
+
+    oc_native_writes.apply("namespace", OR(body, "", ""))
+
+    obj_client = oc_native_writes.client.resources.get.return_value
+    obj_client.server_side_apply.assert_called_once_with(
+        body={
+            "apiVersion": "apps/v1",
+            "kind": "ReplicaSet",
+            "metadata": {"name": "rs", "labels": {"app": "a"}},
+            "spec": {"replicas": 0},
+        },
+        namespace="namespace",
+        field_manager="qontract-reconcile",
+        force_conflicts=True,
+        _request_timeout=60,
+    )
+    assert "managedFields" in body["metadata"]
+
+
+def test_take_over_client_side_apply() -> None:
+    managed_fields = [
+        {
+            "manager": "kubectl-client-side-apply",
+            "operation": "Update",
+            "apiVersion": "apps/v1",
+            "fieldsType": "FieldsV1",
+            "fieldsV1": {"f:spec": {"f:replicas": {}, "f:paused": {}}},
+        },
+        {
+            "manager": "kube-controller-manager",
+            "operation": "Update",
+            "fieldsV1": {"f:status": {}},
+        },
+        {
+            "manager": "qontract-reconcile",
+            "operation": "Apply",
+            "fieldsV1": {"f:spec": {"f:replicas": {}, "f:template": {}}},
+        },
+    ]
+
+    assert take_over_client_side_apply(managed_fields) == [
+        {
+            "manager": "kube-controller-manager",
+            "operation": "Update",
+            "fieldsV1": {"f:status": {}},
+        },
+        {
+            "manager": "qontract-reconcile",
+            "operation": "Apply",
+            "fieldsV1": {
+                "f:spec": {"f:replicas": {}, "f:template": {}, "f:paused": {}}
+            },
+        },
+    ]
+    assert take_over_client_side_apply(managed_fields[1:]) is None
+
+
+def test_oc_native_apply_takes_over_client_side_apply(
+    oc_native_writes: OCNative,
+) -> None:
+    obj_client = oc_native_writes.client.resources.get.return_value
+    obj_client.get.return_value.to_dict.return_value = {
+        "metadata": {
+            "name": "d",
+            "resourceVersion": "5",
+            "managedFields": [
+                {
+                    "manager": "kubectl-client-side-apply",
+                    "operation": "Update",
+                    "apiVersion": "apps/v1",
+                    "fieldsType": "FieldsV1",
+                    "fieldsV1": {"f:spec": {"f:paused": {}}},
+                }
+            ],
+        }
+    }
+
+    oc_native_writes.apply("namespace", deployment_resource())
+
+    obj_client.patch.assert_called_once_with(
+        body=[
+            {"op": "test", "path": "/metadata/resourceVersion", "value": "5"},
+            {
+                "op": "replace",
+                "path": "/metadata/managedFields",
+                "value": [
+                    {
+                        "manager": "qontract-reconcile",
+                        "operation": "Apply",
+                        "apiVersion": "apps/v1",
+                        "fieldsType": "FieldsV1",
+                        "fieldsV1": {"f:spec": {"f:paused": {}}},
+                    }
+                ],
+            },
+        ],
+        name="d",
+        namespace="namespace",
+        content_type="application/json-patch+json",
+        _request_timeout=60,
+    )
+    obj_client.server_side_apply.assert_called_once()
+
+
+def test_oc_native_apply_new_object(oc_native_writes: OCNative) -> None:
+    obj_client = oc_native_writes.client.resources.get.return_value
+    obj_client.get.side_effect = api_error(NotFoundError, 404, {"reason": "NotFound"})
+
+    oc_native_writes.apply("namespace", deployment_resource())
+
+    obj_client.patch.assert_not_called()
+    obj_client.server_side_apply.assert_called_once()
+
+
+def test_oc_native_delete_orphan(oc_native_writes: OCNative) -> None:
+    oc_native_writes.delete("namespace", "kind1", "name", cascade=False)
+
+    obj_client = oc_native_writes.client.resources.get.return_value
+    obj_client.delete.assert_called_once_with(
+        name="name",
+        namespace="namespace",
+        propagation_policy="Orphan",
+        _request_timeout=60,
+    )
+
+
+def test_oc_native_recycle(oc_native_writes: OCNative) -> None:
+    oc_native_writes.recycle(False, "namespace", "kind1", {"metadata": {"name": "d"}})
+
+    obj_client = oc_native_writes.client.resources.get.return_value
+    obj_client.patch.assert_called_once()
+    kwargs = obj_client.patch.call_args.kwargs
+    assert kwargs["name"] == "d"
+    assert kwargs["namespace"] == "namespace"
+    assert (
+        "recycle.time" in kwargs["body"]["spec"]["template"]["metadata"]["annotations"]
+    )
+    obj_client.get.assert_not_called()
+    oc_native_writes._run.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (
+            api_error(
+                UnprocessibleEntityError,
+                422,
+                {
+                    "reason": "Invalid",
+                    "message": 'Deployment.apps "d" is invalid',
+                    "details": {
+                        "kind": "Deployment",
+                        "causes": [
+                            {
+                                "reason": "FieldValueInvalid",
+                                "message": "Invalid value: {}: field is immutable",
+                                "field": "spec.selector",
+                            }
+                        ],
+                    },
+                },
+            ),
+            DeploymentFieldIsImmutableError,
+        ),
+        (
+            api_error(
+                UnprocessibleEntityError,
+                422,
+                {
+                    "reason": "Invalid",
+                    "details": {
+                        "kind": "Service",
+                        "causes": [
+                            {
+                                "reason": "FieldValueInvalid",
+                                "message": "Invalid value: x: field is immutable",
+                            }
+                        ],
+                    },
+                },
+            ),
+            FieldIsImmutableError,
+        ),
+        (
+            api_error(
+                UnprocessibleEntityError,
+                422,
+                {
+                    "reason": "Invalid",
+                    "details": {
+                        "causes": [
+                            {
+                                "reason": "FieldValueTooLong",
+                                "message": "Too long: must have at most 262144 bytes",
+                                "field": "metadata.annotations",
+                            }
+                        ]
+                    },
+                },
+            ),
+            MetaDataAnnotationsTooLongApplyError,
+        ),
+        (
+            api_error(DynamicApiError, 413, {"reason": "RequestEntityTooLarge"}),
+            RequestEntityTooLargeError,
+        ),
+        (
+            api_error(ConflictError, 409, {"reason": "Conflict"}),
+            ObjectHasBeenModifiedError,
+        ),
+        (
+            api_error(BadRequestError, 400, {"reason": "BadRequest"}),
+            StatusCodeError,
+        ),
+    ],
+)
+def test_oc_native_apply_error_mapping(
+    oc_native_writes: OCNative, error: DynamicApiError, expected: type[Exception]
+) -> None:
+    obj_client = oc_native_writes.client.resources.get.return_value
+    obj_client.server_side_apply.side_effect = error
+
+    with pytest.raises(expected):
+        oc_native_writes.apply("namespace", deployment_resource())
+
+
+def test_oc_native_new_project_already_exists(oc_native_writes: OCNative) -> None:
+    obj_client = oc_native_writes.client.resources.get.return_value
+    obj_client.create.side_effect = api_error(
+        ConflictError, 409, {"reason": "AlreadyExists"}
+    )
+
+    oc_native_writes.new_project("namespace")
+
+    obj_client.create.assert_called_once_with(
+        body={
+            "apiVersion": "v1",
+            "kind": "Namespace",
+            "metadata": {"name": "namespace"},
+        },
+        _request_timeout=60,
+    )
+
+
+def test_oc_native_label_no_overwrite(oc_native_writes: OCNative) -> None:
+    obj_client = oc_native_writes.client.resources.get.return_value
+    obj_client.get.return_value.to_dict.return_value = {
+        "metadata": {"name": "name", "labels": {"a": "b"}}
+    }
+
+    with pytest.raises(StatusCodeError):
+        oc_native_writes.label("namespace", "kind1", "name", {"a": "c"})
+    obj_client.patch.assert_not_called()
+
+    oc_native_writes.label("namespace", "kind1", "name", {"a": None, "d": "e"})
+    obj_client.patch.assert_called_once_with(
+        body={"metadata": {"labels": {"a": None, "d": "e"}}},
+        name="name",
+        namespace="namespace",
+        content_type="application/merge-patch+json",
+        _request_timeout=60,
+    )
+
+
+@pytest.fixture
+def oc_projects(monkeypatch, mocker, api_resources: dict) -> OCCli:
+    monkeypatch.setenv("USE_NATIVE_CLIENT", "False")
+    mocker.patch.object(
+        OCCli, "get_api_resources", autospec=True, return_value=api_resources
+    )
+    mocker.patch("reconcile.utils.oc.RunningState").return_value.timestamp = "0"
+    return OC("cluster", "server", "token", local=True)  # type: ignore[return-value]
+
+
+def test_project_exists_lists_projects_on_first_use(
+    oc_projects: OCCli, mocker: MockerFixture
+) -> None:
+    get_all = mocker.patch.object(
+        oc_projects, "get_all", return_value={"items": [{"metadata": {"name": "ns1"}}]}
+    )
+    get = mocker.patch.object(
+        oc_projects,
+        "get",
+        side_effect=[StatusCodeError("NotFound"), {}],
+    )
+
+    assert oc_projects.project_exists("ns1")
+    assert oc_projects.project_exists("ns1")
+    assert not oc_projects.project_exists("ns2")
+    # created by someone else in the meantime
+    assert oc_projects.project_exists("ns2")
+    assert oc_projects.project_exists("ns2")
+    get_all.assert_called_once_with("Namespace")
+    assert get.call_count == 2
+
+
+def test_project_exists_init_projects(
+    monkeypatch, mocker: MockerFixture, api_resources: dict
+) -> None:
+    monkeypatch.setenv("USE_NATIVE_CLIENT", "False")
+    mocker.patch.object(
+        OCCli, "get_api_resources", autospec=True, return_value=api_resources
+    )
+    get_all = mocker.patch.object(
+        OCCli,
+        "get_all",
+        autospec=True,
+        return_value={"items": [{"metadata": {"name": "ns1"}}]},
+    )
+    get = mocker.patch.object(
+        OCCli, "get", autospec=True, side_effect=StatusCodeError("NotFound")
+    )
+    oc: OCCli = OC(  # type: ignore[assignment]
+        "cluster", "server", "token", local=True, init_projects=True
+    )
+
+    assert oc.project_exists("ns1")
+    assert not oc.project_exists("ns2")
+    get_all.assert_called_once_with(oc, "Namespace")
+    get.assert_called_once()
+
+
+def test_projects_index_follows_new_and_delete_project(
+    oc_projects: OCCli, mocker: MockerFixture
+) -> None:
+    mocker.patch.object(oc_projects, "_run")
+    mocker.patch.object(
+        oc_projects, "get_all", return_value={"items": [{"metadata": {"name": "ns1"}}]}
+    )
+    mocker.patch.object(oc_projects, "get", side_effect=StatusCodeError("NotFound"))
+
+    assert oc_projects.project_exists("ns1")
+    oc_projects.new_project("ns2")
+    assert oc_projects.project_exists("ns2")
+    oc_projects.delete_project("ns1")
+    assert not oc_projects.project_exists("ns1")
+
+
+def test_project_exists_list_forbidden(
+    monkeypatch, mocker: MockerFixture, api_resources: dict
+) -> None:
+    monkeypatch.setenv("USE_NATIVE_CLIENT", "False")
+    mocker.patch.object(
+        OCCli, "get_api_resources", autospec=True, return_value=api_resources
+    )
+    get_all = mocker.patch.object(
+        OCCli, "get_all", autospec=True, side_effect=StatusCodeError("Forbidden")
+    )
+    get = mocker.patch.object(
+        OCCli, "get", autospec=True, side_effect=[{}, StatusCodeError("NotFound")]
+    )
+    oc: OCCli = OC(  # type: ignore[assignment]
+        "cluster", "server", "token", local=True, init_projects=True
+    )
+
+    assert oc.project_exists("ns1")
+    assert not oc.project_exists("ns2")
+    get_all.assert_called_once()
+    assert get.call_count == 2
+
+
+def test_oc_native_watch_items(oc_native: OCNative) -> None:
+    oc_native.client.watch.return_value = iter([
+        {"type": "ADDED", "raw_object": {"metadata": {"name": "a"}}},
+        {"type": "DELETED", "raw_object": {"metadata": {"name": "a"}}},
+        {"type": "ERROR", "raw_object": {"message": "too old resource version"}},
+    ])
+
+    events = oc_native.watch_items(
+        "kind1.group1", timeout_seconds=10, namespace="ns", labels={"a": "b"}
+    )
+    assert next(events) == ("ADDED", {"metadata": {"name": "a"}})
+    assert next(events) == ("DELETED", {"metadata": {"name": "a"}})
+    with pytest.raises(StatusCodeError, match="too old resource version"):
+        next(events)
+    oc_native.client.watch.assert_called_once_with(
+        oc_native.client.resources.get.return_value,
+        namespace="ns",
+        label_selector="a=b",
+        resource_version=None,
+        timeout=10,
+    )
+
+
+def test_oc_native_get_metadata(oc_native: OCNative) -> None:
+    obj_client = oc_native.client.resources.get.return_value
+    obj_client.group_version = "group1/v1"
+    obj_client.kind = "kind1"
+    obj_client.get.return_value.to_dict.return_value = {
+        "apiVersion": "meta.k8s.io/v1",
+        "kind": "PartialObjectMetadata",
+        "metadata": {"name": "a"},
+    }
+
+    assert oc_native.get_metadata("ns", "kind1", "a") == {
+        "apiVersion": "group1/v1",
+        "kind": "kind1",
+        "metadata": {"name": "a"},
+    }
+    obj_client.get.assert_called_once_with(
+        name="a",
+        namespace="ns",
+        header_params={"Accept": reconcile.utils.oc.PARTIAL_OBJECT_METADATA_ACCEPT},
+        _request_timeout=60,
+    )
+
+
+def test_oc_native_get_metadata_not_found(oc_native: OCNative) -> None:
+    obj_client = oc_native.client.resources.get.return_value
+    obj_client.get.side_effect = api_error(NotFoundError, 404, {})
+
+    assert oc_native.get_metadata("ns", "kind1", "a", allow_not_found=True) == {}
+
+
+def test_oc_native_get_items_metadata(
+    oc_native: OCNative, mocker: MockerFixture
+) -> None:
+    mocker.patch.object(oc_native, "project_exists", return_value=True)
+    obj_client = oc_native.client.resources.get.return_value
+    obj_client.group_version = "group1/v1"
+    obj_client.kind = "kind1"
+    obj_client.get.return_value.to_dict.return_value = {
+        "kind": "PartialObjectMetadataList",
+        "items": [{"metadata": {"name": "a"}}],
+    }
+
+    assert oc_native.get_items_metadata("kind1", namespace="ns", labels={"a": "b"}) == [
+        {"apiVersion": "group1/v1", "kind": "kind1", "metadata": {"name": "a"}}
+    ]
+    obj_client.get.assert_called_once_with(
+        namespace="ns",
+        label_selector="a=b",
+        header_params={
+            "Accept": reconcile.utils.oc.PARTIAL_OBJECT_METADATA_LIST_ACCEPT
+        },
+        _request_timeout=60,
+    )
+
+
+def test_oc_cli_apply_list(oc_cli: OCCli, mocker: MockerFixture) -> None:
+    run = mocker.patch.object(oc_cli, "_run", autospec=True)
+    applied = mocker.patch.object(oc_cli, "_applied_from_list", autospec=True)
+    resources = [
+        OR({"kind": "ConfigMap", "metadata": {"name": name}}, "", "")
+        for name in ["a", "b"]
+    ]
+
+    oc_cli.apply_list("ns", resources)
+
+    run.assert_called_once()
+    assert run.call_args.args[0] == ["apply", "-n", "ns", "-f", "-"]
+    assert run.call_args.kwargs["apply"]
+    assert json.loads(run.call_args.kwargs["stdin"]) == {
+        "apiVersion": "v1",
+        "kind": "List",
+        "items": [r.body for r in resources],
+    }
+    assert applied.call_count == 2
+
+
+def owned(kind: str, name: str, owner: dict | None = None, **extra) -> dict:
+    obj = {"kind": kind, "metadata": {"name": name}, **extra}
+    if owner:
+        obj["metadata"]["ownerReferences"] = [
+            {
+                "kind": owner["kind"],
+                "name": owner["metadata"]["name"],
+                "controller": True,
+            }
+        ]
+    return obj
+
+
+def pod_using(name: str, owner: dict | None, secret: str, configmap: str = "") -> dict:
+    volumes = [{"name": "s", "secret": {"secretName": secret}}]
+    if configmap:
+        volumes.append({"name": "c", "configMap": {"name": configmap}})
+    return owned(
+        "Pod", name, owner, spec={"volumes": volumes, "containers": [{"name": "c"}]}
+    )
+
+
+@pytest.fixture
+def pod_index_oc(oc_cli: OCCli, mocker: MockerFixture) -> OCCli:
+    deployment = owned("Deployment", "d1")
+    replicaset = owned("ReplicaSet", "rs1", deployment)
+    statefulset = owned("StatefulSet", "ss1")
+    pods = [
+        pod_using("p1", replicaset, "s1"),
+        pod_using("p2", replicaset, "s1", "cm1"),
+        pod_using("p3", statefulset, "s1", "cm1"),
+        pod_using("p4", None, "s1"),
+        pod_using("p5", owned("Job", "gone"), "s2"),
+    ]
+    listed = {"ReplicaSet": [replicaset], "Deployment": [deployment]}
+    mocker.patch.object(
+        oc_cli, "get_items_metadata", side_effect=lambda kind, **_: listed[kind]
+    )
+    mocker.patch.object(oc_cli, "get", return_value={"items": pods})
+    mocker.patch.object(
+        oc_cli,
+        "get_metadata",
+        side_effect=lambda ns, kind, name, **_: statefulset if name == "ss1" else {},
+    )
+    return oc_cli
+
+
+def test_pod_index(pod_index_oc: OCCli) -> None:
+    index = PodIndex(pod_index_oc, "ns")
+
+    assert [o["metadata"]["name"] for o in index.owners_using("Secret", "s1")] == [
+        "d1",
+        "ss1",
+        "p4",
+    ]
+    assert [o["metadata"]["name"] for o in index.owners_using("ConfigMap", "cm1")] == [
+        "d1",
+        "ss1",
+    ]
+    # owner not found
+    assert [o["metadata"]["name"] for o in index.owners_using("Secret", "s2")] == ["p5"]
+    assert not index.owners_using("Secret", "unused")
+    # only owners that were not listed are fetched, once each
+    assert pod_index_oc.get_metadata.call_count == 2  # type: ignore[attr-defined]
+
+
+def test_recycle_pods_uses_pod_index(
+    pod_index_oc: OCCli, mocker: MockerFixture
+) -> None:
+    recycle = mocker.patch.object(pod_index_oc, "recycle", autospec=True)
+    secret = OR(
+        {
+            "kind": "Secret",
+            "metadata": {"name": "s1", "annotations": {"qontract.recycle": "true"}},
+        },
+        "",
+        "",
+    )
+
+    pod_index_oc.recycle_pods(True, "ns", "Secret", secret)
+    pod_index_oc.recycle_pods(True, "ns", "Secret", secret)
+
+    assert [c.args[1:3] for c in recycle.call_args_list] == [
+        ("ns", "Deployment"),
+        ("ns", "StatefulSet"),
+    ] * 2
+    # the pods are listed anew for every call
+    assert pod_index_oc.get.call_count == 2  # type: ignore[attr-defined]
@@ -0,0 +1,106 @@
+from typing import Any
+
+import pytest
+from pydantic import ValidationError
+from pytest_mock import MockerFixture
+
+from reconcile.gql_definitions.glitchtip_project_alerts import glitchtip_project
+from reconcile.gql_definitions.glitchtip_project_alerts.glitchtip_project import (
+    GlitchtipProjectAlertRecipientEmailV1,
+    GlitchtipProjectAlertRecipientWebhookV1,
+    GlitchtipProjectsWithAlertsQueryData,
+)
+from reconcile.gql_definitions.slo_documents.slo_documents import SLODocumentV1
+from reconcile.utils import trusted_models
+from reconcile.utils.trusted_models import (
+    TRUSTED_MODELS_INTEGRATIONS_ENV,
+    construct,
+)
+
+
+@pytest.fixture
+def glitchtip_projects() -> dict[str, Any]:
+    return {
+        "glitchtip_projects": [
+            {
+                "name": "project",
+                "projectId": None,
+                "organization": {"name": "org", "instance": {"name": "instance"}},
+                "alerts": [
+                    {
+                        "name": "alert",
+                        "description": "alert",
+                        "quantity": 1,
+                        "timespanMinutes": 5,
+                        "recipients": [
+                            {"provider": "email"},
+                            {
+                                "provider": "webhook",
+                                "url": "https://example.com",
+                                "urlSecret": None,
+                            },
+                        ],
+                    }
+                ],
+                "jira": None,
+            }
+        ]
+    }
+
+
+def test_construct(glitchtip_projects: dict[str, Any]) -> None:
+    data = construct(GlitchtipProjectsWithAlertsQueryData, glitchtip_projects)
+
+    assert data == GlitchtipProjectsWithAlertsQueryData(**glitchtip_projects)
+    assert data.glitchtip_projects
+    assert data.glitchtip_projects[0].alerts
+    recipients = data.glitchtip_projects[0].alerts[0].recipients
+    assert isinstance(recipients[0], GlitchtipProjectAlertRecipientEmailV1)
+    assert isinstance(recipients[1], GlitchtipProjectAlertRecipientWebhookV1)
+
+
+def test_construct_validates_mismatches(glitchtip_projects: dict[str, Any]) -> None:
+    alert = glitchtip_projects["glitchtip_projects"][0]["alerts"][0]
+    alert["quantity"] = "1"
+    data = construct(GlitchtipProjectsWithAlertsQueryData, glitchtip_projects)
+    assert data == GlitchtipProjectsWithAlertsQueryData(**glitchtip_projects)
+    assert data.glitchtip_projects
+    assert data.glitchtip_projects[0].alerts
+    assert data.glitchtip_projects[0].alerts[0].quantity == 1
+
+    del alert["name"]
+    with pytest.raises(ValidationError):
+        construct(GlitchtipProjectsWithAlertsQueryData, glitchtip_projects)
+
+
+def test_construct_parses_json() -> None:
+    document = {
+        "name": "slo-document",
+        "labels": '{"service": "api"}',
+        "app": {"name": "app", "parentApp": None},
+        "namespaces": [],
+        "slos": None,
+    }
+
+    data = construct(SLODocumentV1, document)
+
+    assert data == SLODocumentV1(**document)
+    assert data.labels == {"service": "api"}
+
+
+def test_query(mocker: MockerFixture, monkeypatch: pytest.MonkeyPatch) -> None:
+    query_func = mocker.Mock(return_value={"glitchtip_projects": []})
+    build = mocker.spy(trusted_models, "construct")
+
+    monkeypatch.setenv(TRUSTED_MODELS_INTEGRATIONS_ENV, "other-integration")
+    data = trusted_models.query(glitchtip_project.query, query_func)
+    assert data == GlitchtipProjectsWithAlertsQueryData(glitchtip_projects=[])
+    build.assert_not_called()
+
+    monkeypatch.setenv(TRUSTED_MODELS_INTEGRATIONS_ENV, "all")
+    data = trusted_models.query(glitchtip_project.query, query_func, variables={})
+    assert data == GlitchtipProjectsWithAlertsQueryData(glitchtip_projects=[])
+    build.assert_called_once_with(
+        GlitchtipProjectsWithAlertsQueryData, {"glitchtip_projects": []}
+    )
+    query_func.assert_called_with(glitchtip_project.DEFINITION, variables={})
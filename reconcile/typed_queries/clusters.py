@@ -2,7 +2,10 @@ from reconcile.gql_definitions.common.clusters import (
     ClusterV1,
     query,
 )
-from reconcile.utils import gql
+from reconcile.utils import (
+    gql,
+    trusted_models,
+)
 from reconcile.utils.gql import GqlApi
 
 
@@ -14,5 +17,5 @@ def get_clusters(
     if name:
         variables["name"] = name
     api = gql_api or gql.get_api()
-    data = query(query_func=api.query, variables=variables)
+    data = trusted_models.query(query, api.query, variables=variables)
     return list(data.clusters or [])
@@ -2,10 +2,13 @@ from reconcile.gql_definitions.common.namespaces import (
     NamespaceV1,
     query,
 )
-from reconcile.utils import gql
+from reconcile.utils import (
+    gql,
+    trusted_models,
+)
 
 
 def get_namespaces() -> list[NamespaceV1]:
     gqlapi = gql.get_api()
-    data = query(gqlapi.query)
+    data = trusted_models.query(query, gqlapi.query)
     return list(data.namespaces or [])
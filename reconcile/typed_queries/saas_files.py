@@ -42,7 +42,10 @@ from reconcile.gql_definitions.common.saasherder_settings import (
 from reconcile.gql_definitions.fragments.saas_target_namespace import (
     SaasTargetNamespace,
 )
-from reconcile.utils import gql
+from reconcile.utils import (
+    gql,
+    trusted_models,
+)
 from reconcile.utils.exceptions import (
     AppInterfaceSettingsError,
     ParameterError,
@@ -147,7 +150,9 @@ class SaasFileList:
         if not query_func:
             query_func = gql.get_api().query
         if not namespaces:
-            namespaces = namespaces_query(query_func).namespaces or []
+            namespaces = (
+                trusted_models.query(namespaces_query, query_func).namespaces or []
+            )
         self.namespaces = namespaces
         self.cluster_namespaces = {
             (ns.cluster.name, ns.name): ns for ns in self.namespaces
@@ -155,7 +160,9 @@ class SaasFileList:
 
         self._init_caches()
 
-        self.saas_files_v2 = saas_files_query(query_func).saas_files or []
+        self.saas_files_v2 = (
+            trusted_models.query(saas_files_query, query_func).saas_files or []
+        )
         if name:
             self.saas_files_v2 = [sf for sf in self.saas_files_v2 if sf.name == name]
         self.saas_files = self._resolve_namespace_selectors()
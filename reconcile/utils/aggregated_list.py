@@ -3,6 +3,8 @@ import logging
 from collections.abc import Callable, KeysView
 from typing import Any, TypedDict
 
+from reconcile.utils import canonical_json
+
 Action = Callable[[Any, list[Any]], bool]
 Cond = Callable[[Any], bool]
 
@@ -93,7 +95,7 @@ class AggregatedList:
 
     @staticmethod
     def hash_params(params: Any) -> int:
-        return hash(json.dumps(params, sort_keys=True))
+        return hash(canonical_json.dumps(params))
 
 
 class AggregatedDiffRunner:
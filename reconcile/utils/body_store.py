@@ -0,0 +1,105 @@
+"""
+Keeps the compressed bodies of OpenshiftResources, deduplicated in memory
+or on disk, see OpenshiftResource.compact and ResourceInventory.
+"""
+
+import contextlib
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import weakref
+
+
+class SpilledBody:
+    """Reference to a body in a SqliteBodyStore."""
+
+    __slots__ = ("key", "size", "store")
+
+    def __init__(self, store: "SqliteBodyStore", key: bytes, size: int) -> None:
+        self.store = store
+        self.key = key
+        self.size = size
+
+    def load(self) -> bytes:
+        return self.store.get(self.key)
+
+
+class MemoryBodyStore:
+    """
+    Compressed bodies in memory. Identical bodies are stored once, put
+    returns the shared copy. Safe to use from several threads.
+    """
+
+    def __init__(self) -> None:
+        self._bodies: dict[bytes, bytes] = {}
+        self._lock = threading.Lock()
+
+    def put(self, body: bytes) -> bytes:
+        with self._lock:
+            return self._bodies.setdefault(body, body)
+
+    def __len__(self) -> int:
+        return len(self._bodies)
+
+
+def _close(connection: sqlite3.Connection, path: str) -> None:
+    connection.close()
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
+
+
+class SqliteBodyStore:
+    """
+    Compressed bodies in a sqlite database in a temporary file, which is
+    removed once the store and all references to it are gone. Identical
+    bodies are stored once and share a SpilledBody.
+
+    The database only lives as long as the process, so it is written
+    without journal and syncs.
+    """
+
+    def __init__(self, directory: str | None = None) -> None:
+        fd, self.path = tempfile.mkstemp(
+            prefix="resource-inventory-", suffix=".sqlite", dir=directory
+        )
+        os.close(fd)
+        self._connection = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode = OFF")
+        self._connection.execute("PRAGMA synchronous = OFF")
+        self._connection.execute(
+            "CREATE TABLE bodies (key BLOB PRIMARY KEY, body BLOB NOT NULL)"
+        )
+        self._bodies: dict[bytes, SpilledBody] = {}
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, _close, self._connection, self.path)
+
+    def put(self, body: bytes) -> SpilledBody:
+        key = hashlib.blake2b(body, digest_size=16).digest()
+        with self._lock:
+            if spilled := self._bodies.get(key):
+                return spilled
+            self._connection.execute(
+                "INSERT INTO bodies (key, body) VALUES (?, ?)", (key, body)
+            )
+            spilled = self._bodies[key] = SpilledBody(self, key, len(body))
+            return spilled
+
+    def get(self, key: bytes) -> bytes:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT body FROM bodies WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return row[0]
+
+    def __len__(self) -> int:
+        return len(self._bodies)
+
+    def close(self) -> None:
+        """Removes the database. Bodies that weren't loaded are lost."""
+        self._finalizer()
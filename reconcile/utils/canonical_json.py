@@ -0,0 +1,89 @@
+"""
+Canonical JSON serialization of objects that are hashed or compared as
+text, e.g. the qontract.sha256sum annotation of OpenshiftResources.
+
+The output is byte-identical to json.dumps(obj, sort_keys=True), so hashes
+calculated before stay valid. Backends:
+
+* json: json.dumps(obj, sort_keys=True)
+* c: the C encoder json.dumps uses, built once instead of per call. It
+  doesn't check for circular references, which raise RecursionError
+  instead of ValueError.
+
+The c backend is used if available. CANONICAL_JSON_BACKEND selects another
+registered backend.
+"""
+
+import json
+import os
+from collections.abc import Callable
+from json import encoder as json_encoder
+from typing import Any
+
+CANONICAL_JSON_BACKEND_ENV = "CANONICAL_JSON_BACKEND"
+
+Serializer = Callable[[Any], str]
+
+
+def _json_dumps(obj: Any) -> str:
+    return json.dumps(obj, sort_keys=True)
+
+
+def _make_c_dumps() -> Serializer | None:
+    # not part of the public json API, missing without the C extension
+    c_make_encoder = getattr(json_encoder, "c_make_encoder", None)
+    if c_make_encoder is None:
+        return None
+    # same arguments as JSONEncoder(sort_keys=True).iterencode
+    encoder = c_make_encoder(
+        None,  # markers, no circular reference check
+        json_encoder.JSONEncoder().default,
+        json_encoder.encode_basestring_ascii,
+        None,  # indent
+        ": ",
+        ", ",
+        True,  # sort_keys
+        False,  # skipkeys
+        True,  # allow_nan
+    )
+
+    def c_dumps(obj: Any) -> str:
+        return "".join(encoder(obj, 0))
+
+    return c_dumps
+
+
+_backends: dict[str, Serializer] = {"json": _json_dumps}
+if c_dumps := _make_c_dumps():
+    _backends["c"] = c_dumps
+
+
+def register_backend(name: str, serializer: Serializer) -> None:
+    """Registers a serializer. It must produce the same output as
+    json.dumps(obj, sort_keys=True)."""
+    _backends[name] = serializer
+
+
+def backends() -> dict[str, Serializer]:
+    return dict(_backends)
+
+
+def set_backend(name: str) -> None:
+    global _dumps  # noqa: PLW0603
+    try:
+        _dumps = _backends[name]
+    except KeyError:
+        raise ValueError(
+            f"unknown canonical JSON backend {name}, available: {list(_backends)}"
+        ) from None
+
+
+def dumps(obj: Any) -> str:
+    """obj as JSON with sorted keys."""
+    return _dumps(obj)
+
+
+_dumps = _backends["json"]
+set_backend(
+    os.environ.get(CANONICAL_JSON_BACKEND_ENV, "c" if "c" in _backends else "json")
+)
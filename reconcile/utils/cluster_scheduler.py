@@ -0,0 +1,198 @@
+import logging
+import os
+import time
+from collections import (
+    defaultdict,
+    deque,
+)
+from collections.abc import (
+    Callable,
+    Iterable,
+)
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Protocol,
+    TypeVar,
+)
+
+from reconcile.utils.metrics import (
+    cluster_queue_time,
+    cluster_run_time,
+)
+
+T = TypeVar("T")
+
+
+class TimeProtocol(Protocol):
+    def time(self) -> float: ...
+
+
+class ClusterDeadlineExceededError(Exception):
+    def __init__(self, cluster: str, deadline_seconds: float | None) -> None:
+        super().__init__(
+            f"[{cluster}] deadline of {deadline_seconds}s exceeded, "
+            "remaining work for the cluster was skipped"
+        )
+        self.cluster = cluster
+
+
+@dataclass
+class ClusterStats:
+    # seconds from the start of the run until the first task of the cluster started
+    queue_seconds: float = 0.0
+    # seconds from the start of the first task until the end of the last task
+    run_seconds: float = 0.0
+    tasks: int = 0
+    skipped: int = 0
+
+
+class ClusterScheduler:
+    """
+    Runs work items on a thread pool like threaded.run, but schedules them
+    per cluster, so a single slow or unreachable cluster can't occupy all
+    workers while the work of healthy clusters waits.
+
+    * thread_pool_size is the global worker budget
+    * at most max_workers_per_cluster items of the same cluster run at once
+      (no cap if None)
+    * clusters with pending work are served round-robin
+    * once cluster_deadline_seconds have passed since the first item of a
+      cluster started, its remaining items are skipped. Their result is a
+      ClusterDeadlineExceededError, running items are not interrupted.
+
+    Queue and run time of each cluster are recorded as metrics and are
+    available in the stats attribute after a run.
+    """
+
+    def __init__(
+        self,
+        thread_pool_size: int | None,
+        max_workers_per_cluster: int | None = None,
+        cluster_deadline_seconds: float | None = None,
+        name: str = "",
+        time_module: TimeProtocol = time,
+    ) -> None:
+        # same default as ThreadPoolExecutor
+        self.thread_pool_size = thread_pool_size or min(32, (os.cpu_count() or 1) + 4)
+        self.max_workers_per_cluster = max_workers_per_cluster
+        self.cluster_deadline_seconds = cluster_deadline_seconds
+        self.name = name
+        self.time_module = time_module
+        self.stats: dict[str, ClusterStats] = {}
+
+    def run(
+        self,
+        func: Callable[..., Any],
+        iterable: Iterable[T],
+        cluster_of: Callable[[T], str],
+        return_exceptions: bool = False,
+        **kwargs: Any,
+    ) -> list[Any]:
+        """
+        Applies func to each item and returns the results in the order of
+        the items. Like threaded.run, exceptions raised by func are re-raised
+        unless return_exceptions is set.
+        """
+        items = list(iterable)
+        results: list[Any] = [None] * len(items)
+        queues: dict[str, deque[int]] = {}
+        for index, item in enumerate(items):
+            queues.setdefault(cluster_of(item), deque()).append(index)
+        rotation = deque(queues)
+        running: dict[str, int] = defaultdict(int)
+        first_started: dict[str, float] = {}
+        pending: dict[Future, tuple[str, int]] = {}
+        error: BaseException | None = None
+        self.stats = {cluster: ClusterStats() for cluster in queues}
+
+        start_time = self.time_module.time()
+        with ThreadPoolExecutor(self.thread_pool_size) as pool:
+            while pending or (rotation and error is None):
+                while error is None and len(pending) < self.thread_pool_size:
+                    cluster = self._next_cluster(rotation, queues, running)
+                    if cluster is None:
+                        break
+                    index = queues[cluster].popleft()
+                    now = self.time_module.time()
+                    if cluster not in first_started:
+                        first_started[cluster] = now
+                        self.stats[cluster].queue_seconds = now - start_time
+                    if self._deadline_exceeded(first_started[cluster], now):
+                        results[index] = ClusterDeadlineExceededError(
+                            cluster, self.cluster_deadline_seconds
+                        )
+                        self.stats[cluster].skipped += 1
+                        continue
+                    running[cluster] += 1
+                    self.stats[cluster].tasks += 1
+                    future = pool.submit(func, items[index], **kwargs)
+                    pending[future] = (cluster, index)
+
+                if not pending:
+                    continue
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                now = self.time_module.time()
+                for future in done:
+                    cluster, index = pending.pop(future)
+                    running[cluster] -= 1
+                    self.stats[cluster].run_seconds = now - first_started[cluster]
+                    exception = future.exception()
+                    if exception is None:
+                        results[index] = future.result()
+                    elif return_exceptions:
+                        results[index] = exception
+                    elif error is None:
+                        # stop scheduling and re-raise once running work is done
+                        error = exception
+
+        self._record_stats()
+        if error is not None:
+            raise error
+        return results
+
+    def _next_cluster(
+        self,
+        rotation: deque[str],
+        queues: dict[str, deque[int]],
+        running: dict[str, int],
+    ) -> str | None:
+        for _ in range(len(rotation)):
+            cluster = rotation[0]
+            if not queues[cluster]:
+                rotation.popleft()
+                continue
+            rotation.rotate(-1)
+            if (
+                self.max_workers_per_cluster is None
+                or running[cluster] < self.max_workers_per_cluster
+            ):
+                return cluster
+        return None
+
+    def _deadline_exceeded(self, first_started: float, now: float) -> bool:
+        return (
+            self.cluster_deadline_seconds is not None
+            and now - first_started > self.cluster_deadline_seconds
+        )
+
+    def _record_stats(self) -> None:
+        for cluster, stats in self.stats.items():
+            cluster_queue_time.labels(name=self.name, cluster=cluster).observe(
+                stats.queue_seconds
+            )
+            cluster_run_time.labels(name=self.name, cluster=cluster).observe(
+                stats.run_seconds
+            )
+            logging.debug(f"[{cluster}] {self.name}: {stats}")
+            if stats.skipped:
+                logging.warning(
+                    f"[{cluster}] {self.name}: skipped {stats.skipped} items "
+                    f"after the deadline of {self.cluster_deadline_seconds}s"
+                )
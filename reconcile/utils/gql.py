@@ -1,7 +1,19 @@
 import contextlib
+import hashlib
+import json
 import logging
+import os
+import sqlite3
 import textwrap
 import threading
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import (
+    Iterable,
+    Iterator,
+    Mapping,
+)
 from datetime import (
     UTC,
     datetime,
@@ -17,13 +29,21 @@ from gql import (
 from gql.transport.exceptions import TransportQueryError
 from gql.transport.requests import RequestsHTTPTransport
 from gql.transport.requests import log as requests_logger
+from graphql import DocumentNode
 from requests.auth import AuthBase
 from requests.cookies import RequestsCookieJar
 from sentry_sdk import capture_exception
 from sretoolbox.utils import retry
 
 from reconcile.status import RunningState
+from reconcile.utils import canonical_json
 from reconcile.utils.config import get_config
+from reconcile.utils.metrics import (
+    gql_document_cache_hits,
+    gql_document_cache_misses,
+    gql_result_cache_hits,
+    gql_result_cache_misses,
+)
 
 INTEGRATIONS_QUERY = """
 {
@@ -37,6 +57,197 @@ INTEGRATIONS_QUERY = """
 
 requests_logger.setLevel(logging.WARNING)
 
+# number of paths looked up by one query of get_resources and get_templates
+PATHS_PER_QUERY = 50
+RESOURCE_FIELDS = "path content sha256sum"
+TEMPLATE_FIELDS = "path template"
+
+# number of parsed query documents kept by parse_query
+DOCUMENT_CACHE_SIZE = 512
+
+_documents: OrderedDict[str, DocumentNode] = OrderedDict()
+_documents_lock = threading.Lock()
+
+
+def parse_query(query: str) -> DocumentNode:
+    """
+    The parsed document of a query. The documents of the most recently used
+    queries are kept for all GqlApi instances of the process, as many
+    queries, e.g. the generated ones in reconcile.gql_definitions, are run
+    over and over.
+    """
+    with _documents_lock:
+        document = _documents.get(query)
+        if document is not None:
+            _documents.move_to_end(query)
+    integration = RunningState().integration
+    if document is not None:
+        gql_document_cache_hits.labels(integration=integration).inc()
+        return document
+
+    gql_document_cache_misses.labels(integration=integration).inc()
+    document = gql(query)
+    with _documents_lock:
+        _documents[query] = document
+        if len(_documents) > DOCUMENT_CACHE_SIZE:
+            _documents.popitem(last=False)
+    return document
+
+
+QUERY_MEMO_ENV = "GQL_QUERY_MEMO"
+RESULT_CACHE_DIR_ENV = "GQL_RESULT_CACHE_DIR"
+RESULT_CACHE_MAX_BYTES_ENV = "GQL_RESULT_CACHE_MAX_BYTES"
+DEFAULT_RESULT_CACHE_MAX_BYTES = 1024**3
+
+
+class GqlResultCache:
+    """
+    Results of queries against a bundle of a known commit, which never
+    change. They are kept compressed in a sqlite database in a directory
+    that can be shared by all processes of a node, e.g. the integrations of
+    a dry-run PR check.
+
+    Results are keyed by the commit, the server url, the query and its
+    variables. The total size of the results is kept next to them, once it
+    is more than max_bytes, the least recently used results are removed.
+    """
+
+    def __init__(
+        self, directory: str, max_bytes: int = DEFAULT_RESULT_CACHE_MAX_BYTES
+    ) -> None:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        self.path = os.path.join(directory, "gql-results.sqlite")
+        self.max_bytes = max_bytes
+        self._connection = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._lock = threading.Lock()
+        with self._transaction():
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key BLOB PRIMARY KEY, result BLOB NOT NULL, "
+                "size INTEGER NOT NULL, used_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_used_at ON results (used_at)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS total ("
+                "id INTEGER PRIMARY KEY CHECK (id = 0), size INTEGER NOT NULL)"
+            )
+            self._connection.execute(
+                "INSERT OR IGNORE INTO total (id, size) "
+                "SELECT 0, COALESCE(SUM(size), 0) FROM results"
+            )
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[None]:
+        # shared with other processes, which must not interleave
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    @staticmethod
+    def key(
+        commit: str, url: str, query: str, variables: dict[str, Any] | None
+    ) -> bytes:
+        return hashlib.blake2b(
+            canonical_json.dumps([commit, url, query, variables]).encode(),
+            digest_size=16,
+        ).digest()
+
+    def get(self, key: bytes) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT result FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE results SET used_at = ? WHERE key = ?", (time.time(), key)
+            )
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key: bytes, result: Mapping[str, Any]) -> None:
+        blob = zlib.compress(json.dumps(result).encode())
+        with self._lock, self._transaction():
+            row = self._connection.execute(
+                "SELECT size FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results (key, result, size, used_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time()),
+            )
+            self._add_to_total(len(blob) - (row[0] if row else 0))
+            (total,) = self._connection.execute(
+                "SELECT size FROM total WHERE id = 0"
+            ).fetchone()
+            if total > self.max_bytes:
+                self._evict(total - self.max_bytes)
+
+    def _add_to_total(self, size: int) -> None:
+        self._connection.execute(
+            "UPDATE total SET size = size + ? WHERE id = 0", (size,)
+        )
+
+    def _evict(self, size: int) -> None:
+        """Removes the least recently used results that take at least size
+        bytes."""
+        count = freed = 0
+        for (result_size,) in self._connection.execute(
+            "SELECT size FROM results ORDER BY used_at"
+        ):
+            if freed >= size:
+                break
+            count += 1
+            freed += result_size
+        self._connection.execute(
+            "DELETE FROM results WHERE key IN ("
+            "SELECT key FROM results ORDER BY used_at LIMIT ?)",
+            (count,),
+        )
+        self._add_to_total(-freed)
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+_result_cache: GqlResultCache | None = None
+_result_cache_disabled = False
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> GqlResultCache | None:
+    """The result cache of the process, enabled by setting
+    GQL_RESULT_CACHE_DIR to the directory of the cache. If the cache can't
+    be opened, it stays disabled for the process."""
+    global _result_cache, _result_cache_disabled  # noqa: PLW0603
+    directory = os.environ.get(RESULT_CACHE_DIR_ENV)
+    if not directory:
+        return None
+    with _result_cache_lock:
+        if _result_cache is None and not _result_cache_disabled:
+            try:
+                _result_cache = GqlResultCache(
+                    directory,
+                    max_bytes=int(
+                        os.environ.get(
+                            RESULT_CACHE_MAX_BYTES_ENV,
+                            str(DEFAULT_RESULT_CACHE_MAX_BYTES),
+                        )
+                    ),
+                )
+            except (sqlite3.Error, OSError) as e:
+                logging.debug(f"unable to open GraphQL result cache: {e}")
+                _result_cache_disabled = True
+        return _result_cache
+
 
 def capture_and_forget(error):
     """fire-and-forget an exception to sentry
@@ -80,6 +291,17 @@ class GqlGetResourceError(Exception):
         super().__init__(f"Error getting resource from path {path}: {msg!s}")
 
 
+class _Flight:
+    """A query being sent, see GqlApi._shared_result."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.waiters = 0
+        # the result as JSON, if threads wait for it
+        self.text = ""
+        self.error: Exception | None = None
+
+
 class GqlApi:
     _valid_schemas: list[str] = []
     _queried_schemas: set[Any] = set()
@@ -92,6 +314,7 @@ class GqlApi:
         validate_schemas=False,
         commit: str | None = None,
         commit_timestamp: str | None = None,
+        memoize: bool = False,
     ) -> None:
         self.url = url
         self.token = token
@@ -100,6 +323,13 @@ class GqlApi:
         self.commit = commit
         self.commit_timestamp = commit_timestamp
         self.client = self._init_gql_client()
+        # resources fetched by get_resources and prefetch_resources
+        self._resources: dict[str, dict[str, Any]] = {}
+        # queries being sent and, if memoize is set, the results of the queries
+        # sent, both keyed by query and variables
+        self._flights: dict[tuple[str, str], _Flight] = {}
+        self._flights_lock = threading.Lock()
+        self._memo: dict[tuple[str, str], str] | None = {} if memoize else None
 
         if validate_schemas and not int_name:
             raise Exception(
@@ -136,20 +366,7 @@ class GqlApi:
     def query(
         self, query: str, variables=None, skip_validation=False
     ) -> dict[str, Any] | None:
-        try:
-            result = self.client.execute(
-                gql(query), variables, get_execution_result=True
-            ).formatted
-        except requests.exceptions.ConnectionError as e:
-            raise GqlApiError(f"Could not connect to GraphQL server ({e})") from None
-        except TransportQueryError as e:
-            raise GqlApiError(f"`error` returned with GraphQL response {e}") from None
-        except AssertionError:
-            raise GqlApiError(
-                "`data` field missing from GraphQL response payload"
-            ) from None
-        except Exception as e:
-            raise GqlApiError("Unexpected error occurred") from e
+        result = self._shared_result(query, variables)
 
         # show schemas if log level is debug
         query_schemas = result.get("extensions", {}).get("schemas", [])
@@ -172,6 +389,117 @@ class GqlApi:
 
         return result["data"]
 
+    def _shared_result(
+        self, query: str, variables: dict[str, Any] | None
+    ) -> Mapping[str, Any]:
+        """
+        The result of a query, sent once for all threads that run it at the
+        same time. The threads waiting for it get their own copy, as do
+        later calls if results are memoized.
+        """
+        key = (query, canonical_json.dumps(variables))
+        with self._flights_lock:
+            if self._memo is not None and (text := self._memo.get(key)):
+                return json.loads(text)
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                leader = True
+            else:
+                flight.waiters += 1
+                leader = False
+        if not leader:
+            flight.done.wait()
+            if flight.error:
+                raise flight.error
+            return json.loads(flight.text)
+
+        try:
+            result = self._execute(query, variables)
+        except Exception as e:
+            with self._flights_lock:
+                del self._flights[key]
+            flight.error = e
+            flight.done.set()
+            raise
+        text = json.dumps(result) if self._memo is not None else ""
+        with self._flights_lock:
+            del self._flights[key]
+            if self._memo is not None:
+                self._memo[key] = text
+            # no thread can start waiting for the flight anymore
+            waiters = flight.waiters
+        if waiters and not text:
+            text = json.dumps(result)
+        flight.text = text
+        flight.done.set()
+        return result
+
+    def _execute(
+        self, query: str, variables: dict[str, Any] | None
+    ) -> Mapping[str, Any]:
+        result: Mapping[str, Any] | None = self._cached_result(query, variables)
+        if result is None:
+            try:
+                result = self.client.execute(
+                    parse_query(query), variables, get_execution_result=True
+                ).formatted
+            except requests.exceptions.ConnectionError as e:
+                raise GqlApiError(
+                    f"Could not connect to GraphQL server ({e})"
+                ) from None
+            except TransportQueryError as e:
+                raise GqlApiError(
+                    f"`error` returned with GraphQL response {e}"
+                ) from None
+            except AssertionError:
+                raise GqlApiError(
+                    "`data` field missing from GraphQL response payload"
+                ) from None
+            except Exception as e:
+                raise GqlApiError("Unexpected error occurred") from e
+            self._cache_result(query, variables, result)
+        return result
+
+    def _result_cache_key(
+        self, query: str, variables: dict[str, Any] | None
+    ) -> tuple[GqlResultCache, bytes] | None:
+        # only results of a known commit never change
+        if not self.commit or (cache := get_result_cache()) is None:
+            return None
+        return cache, cache.key(self.commit, self.url, query, variables)
+
+    def _cached_result(
+        self, query: str, variables: dict[str, Any] | None
+    ) -> dict[str, Any] | None:
+        if (cache_key := self._result_cache_key(query, variables)) is None:
+            return None
+        cache, key = cache_key
+        integration = RunningState().integration
+        try:
+            result = cache.get(key)
+        except sqlite3.Error as e:
+            logging.debug(f"unable to read GraphQL result cache: {e}")
+            result = None
+        if result is None:
+            gql_result_cache_misses.labels(integration=integration).inc()
+        else:
+            gql_result_cache_hits.labels(integration=integration).inc()
+        return result
+
+    def _cache_result(
+        self, query: str, variables: dict[str, Any] | None, result: Mapping[str, Any]
+    ) -> None:
+        if result.get("data") is None or result.get("errors"):
+            return
+        if (cache_key := self._result_cache_key(query, variables)) is None:
+            return
+        cache, key = cache_key
+        try:
+            cache.put(key, result)
+        except sqlite3.Error as e:
+            logging.debug(f"unable to write GraphQL result cache: {e}")
+
     def get_template(self, path: str) -> dict[str, str]:
         query = """
         query Template($path: String) {
@@ -195,7 +523,24 @@ class GqlApi:
 
         return templates[0]
 
+    def get_templates(self, paths: Iterable[str]) -> dict[str, dict[str, str]]:
+        """Templates by path, looked up with one query per PATHS_PER_QUERY
+        paths instead of one per path."""
+        paths = list(dict.fromkeys(paths))
+        try:
+            found = self._query_paths("template_v1", TEMPLATE_FIELDS, paths)
+        except GqlApiError:
+            raise GqlGetResourceError(", ".join(paths), "Template not found.") from None
+
+        for path, templates in found.items():
+            if len(templates) != 1:
+                raise GqlGetResourceError(path, "Expecting one and only one template.")
+        return {path: templates[0] for path, templates in found.items()}
+
     def get_resource(self, path: str) -> dict[str, Any]:
+        if resource := self._resources.get(path):
+            return dict(resource)
+
         query = """
         query Resource($path: String) {
             resources: resources_v1 (path: $path) {
@@ -220,6 +565,75 @@ class GqlApi:
 
         return resources[0]
 
+    def get_resources(self, paths: Iterable[str]) -> dict[str, dict[str, Any]]:
+        """Resources by path, looked up with one query per PATHS_PER_QUERY
+        paths instead of one per path. They are kept, so get_resource doesn't
+        query them again."""
+        paths = list(dict.fromkeys(paths))
+        missing = [path for path in paths if path not in self._resources]
+        try:
+            found = self._query_paths(
+                "resources_v1", RESOURCE_FIELDS, missing, skip_validation=True
+            )
+        except GqlApiError:
+            raise GqlGetResourceError(
+                ", ".join(missing), "Resource not found."
+            ) from None
+
+        for path, resources in found.items():
+            if len(resources) != 1:
+                raise GqlGetResourceError(path, "Expecting one and only one resource.")
+            self._resources[path] = resources[0]
+        return {path: dict(self._resources[path]) for path in paths}
+
+    def prefetch_resources(self, paths: Iterable[str]) -> None:
+        """
+        Fetches the resources of paths in batches ahead of the get_resource
+        calls for them, e.g. before threads look them up one by one. Paths
+        that can't be fetched are left to get_resource to report.
+        """
+        missing = [path for path in dict.fromkeys(paths) if path not in self._resources]
+        try:
+            found = self._query_paths(
+                "resources_v1", RESOURCE_FIELDS, missing, skip_validation=True
+            )
+        except GqlApiError as e:
+            logging.debug(f"unable to prefetch resources: {e}")
+            return
+
+        for path, resources in found.items():
+            if len(resources) == 1:
+                self._resources[path] = resources[0]
+
+    def _query_paths(
+        self,
+        field: str,
+        fields: str,
+        paths: list[str],
+        skip_validation: bool = False,
+    ) -> dict[str, list[dict[str, Any]]]:
+        """The objects of field for each path, queried as aliases of one
+        query per chunk of paths."""
+        found: dict[str, list[dict[str, Any]]] = {}
+        for start in range(0, len(paths), PATHS_PER_QUERY):
+            chunk = paths[start : start + PATHS_PER_QUERY]
+            # full chunks have the same query text, which is parsed once
+            arguments = ", ".join(f"$p{i}: String" for i in range(len(chunk)))
+            aliases = "\n".join(
+                f"  p{i}: {field}(path: $p{i}) {{ {fields} }}"
+                for i in range(len(chunk))
+            )
+            result = self.query(
+                f"query Paths({arguments}) {{\n{aliases}\n}}",
+                {f"p{i}": path for i, path in enumerate(chunk)},
+                skip_validation=skip_validation,
+            )
+            if result is None:
+                raise GqlApiError("`data` not received in GraphQL payload")
+            for i, path in enumerate(chunk):
+                found[path] = result[f"p{i}"] or []
+        return found
+
     def get_resources_by_schema(self, schema: str) -> list[dict[str, str]]:
         """Return all resources (resources_v1) filtered by given schema."""
         query = """
@@ -253,6 +667,10 @@ class GqlApiSingleton:
 
     @classmethod
     def create(cls, *args, **kwargs) -> GqlApi:
+        # results are memoized for the life of the instance, i.e. one run
+        kwargs.setdefault(
+            "memoize", os.environ.get(QUERY_MEMO_ENV, "false").lower() == "true"
+        )
         with cls.gqlapi_lock:
             if cls.gql_api:
                 logging.debug("Resestting GqlApi instance")
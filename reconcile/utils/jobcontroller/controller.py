@@ -19,11 +19,18 @@ from reconcile.utils.jobcontroller.models import (
     JobValidationError,
     K8sJob,
 )
-from reconcile.utils.oc import OCCli
+from reconcile.utils.oc import (
+    OCCli,
+    OCNative,
+    StatusCodeError,
+)
 from reconcile.utils.oc_map import init_oc_map_from_clusters
 from reconcile.utils.openshift_resource import OpenshiftResource
 from reconcile.utils.secret_reader import SecretReaderBase
 
+# upper bound for a single watch request, the job cache is resynced in between
+WATCH_WINDOW_SECONDS = 300
+
 
 def build_job_controller(
     integration: str,
@@ -42,6 +49,9 @@ def build_job_controller(
     is expected to exist in the cluster.
 
     If dry_run is set to True, the controller will not perform any changes to the cluster.
+
+    The controller waits for jobs by watching them, which falls back to polling
+    if the cluster client does not support watches.
     """
     clusters = get_clusters_minimal(name=cluster)
     oc_map = init_oc_map_from_clusters(
@@ -59,6 +69,7 @@ def build_job_controller(
         integration=integration,
         integration_version=integration_version,
         dry_run=dry_run,
+        watch_jobs=True,
     )
 
 
@@ -78,7 +89,14 @@ class K8sJobController:
         integration_version: str,
         dry_run: bool = False,
         time_module: TimeProtocol = time,
+        watch_jobs: bool = False,
     ) -> None:
+        """
+        If watch_jobs is set to True, waiting for jobs is driven by watch events
+        instead of polling the job list every check interval. Polling is used
+        if the client doesn't support watching, and as a fallback if watching
+        fails.
+        """
         self.cluster = cluster
         self.namespace = namespace
         self.integration = integration
@@ -86,7 +104,15 @@ class K8sJobController:
         self.oc = oc
         self.dry_run = dry_run
         self.time_module = time_module
+        # the client to watch jobs with, only the native client can watch
+        self._watch_oc = oc if watch_jobs and isinstance(oc, OCNative) else None
         self._cache: dict[str, OpenshiftResource] | None = None
+        # resourceVersion of the cached jobs, watched from when watch_jobs
+        self._resource_version = ""
+
+    @property
+    def watch_jobs(self) -> bool:
+        return self._watch_oc is not None
 
     @property
     def cache(self) -> dict[str, OpenshiftResource]:
@@ -99,10 +125,13 @@ class K8sJobController:
         Updates the cache with the latest jobs in the namespace.
         """
         new_cache = {}
-        for item in self.oc.get_items(
-            kind="Job",
-            namespace=self.namespace,
-        ):
+        if self._watch_oc is not None:
+            items, self._resource_version = self._watch_oc.list_items(
+                kind="Job", namespace=self.namespace
+            )
+        else:
+            items = self.oc.get_items(kind="Job", namespace=self.namespace)
+        for item in items:
             openshift_resource = OpenshiftResource(
                 body=item,
                 integration=self.integration,
@@ -183,6 +212,20 @@ class K8sJobController:
         )
 
         start_time = self.time_module.time()
+        if self._watch_oc is not None and self._watch_until_finished(
+            self._watch_oc, job_names, start_time, timeout_seconds
+        ):
+            for job_name in job_names:
+                job_statuses[job_name] = self.get_job_status(job_name)
+            jobs_left = {
+                job_name
+                for job_name, status in job_statuses.items()
+                if status not in {JobStatus.SUCCESS, JobStatus.ERROR}
+            }
+            if jobs_left:
+                logging.warning(f"Timeout waiting for jobs to complete: {jobs_left}")
+            return job_statuses
+
         while jobs_left:
             self.update_cache()
             for job_name in list(jobs_left):
@@ -269,7 +312,7 @@ class K8sJobController:
         return False
 
     def _lookup_job_uid(self, job_name: str) -> str | None:
-        job_resource = self.oc.get(
+        job_resource = self.oc.get_metadata(
             self.namespace, "Job", job_name, allow_not_found=True
         )
         if not job_resource:
@@ -362,6 +405,16 @@ class K8sJobController:
         the function will wait indefinitely. If a timeout occures, a TimeoutError will be raised.
         """
         start_time = self.time_module.time()
+        if self._watch_oc is not None and self._watch_until_finished(
+            self._watch_oc, {job_name}, start_time, timeout_seconds
+        ):
+            match self.get_job_status(job_name):
+                case JobStatus.SUCCESS:
+                    return True
+                case JobStatus.ERROR:
+                    return False
+            raise TimeoutError(f"Timeout waiting for job {job_name} to complete")
+
         while True:
             self.update_cache()
             status = self.get_job_status(job_name)
@@ -377,6 +430,70 @@ class K8sJobController:
                 elapsed_time, timeout_seconds, check_interval_seconds
             )
 
+    def _jobs_finished(self, job_names: set[str]) -> bool:
+        return all(
+            self.get_job_status(job_name) in {JobStatus.SUCCESS, JobStatus.ERROR}
+            for job_name in job_names
+        )
+
+    def _watch_until_finished(
+        self,
+        oc: OCNative,
+        job_names: set[str],
+        start_time: float,
+        timeout_seconds: int,
+    ) -> bool:
+        """
+        Keeps the cache up to date with Job watch events until all given jobs
+        finished or the timeout is reached. Returns False if watching fails,
+        in which case the caller has to poll instead.
+
+        The jobs are listed once, every watch continues from the
+        resourceVersion of the list or of the last event, so no change is
+        missed between watches.
+        """
+        try:
+            self.update_cache()
+            while not self._jobs_finished(job_names):
+                elapsed_time = self.time_module.time() - start_time
+                if timeout_seconds >= 0 and elapsed_time >= timeout_seconds:
+                    break
+                window_seconds = WATCH_WINDOW_SECONDS
+                if timeout_seconds >= 0:
+                    window_seconds = max(
+                        1, min(window_seconds, int(timeout_seconds - elapsed_time))
+                    )
+                logging.info(
+                    f"Waiting for {job_names} to complete. Watching for up to {window_seconds} seconds"
+                )
+                for event_type, item in oc.watch_items(
+                    kind="Job",
+                    namespace=self.namespace,
+                    timeout_seconds=window_seconds,
+                    resource_version=self._resource_version,
+                ):
+                    self._update_cache_from_event(event_type, item)
+                    if self._jobs_finished(job_names):
+                        return True
+        except StatusCodeError as e:
+            logging.warning(f"Watching jobs failed, falling back to polling: {e}")
+            return False
+        return True
+
+    def _update_cache_from_event(self, event_type: str, item: dict) -> None:
+        if event_type == "DELETED":
+            self.cache.pop(item["metadata"]["name"], None)
+        elif event_type in {"ADDED", "MODIFIED"}:
+            openshift_resource = OpenshiftResource(
+                body=item,
+                integration=self.integration,
+                integration_version=self.integration_version,
+            )
+            self.cache[openshift_resource.name] = openshift_resource
+        self._resource_version = item["metadata"].get(
+            "resourceVersion", self._resource_version
+        )
+
     def _sleep_until_timeout(
         self,
         elapsed_time: float,
@@ -1,9 +1,13 @@
+import logging
 import os
 import random
 import shutil
 import tempfile
 import threading
+import time
+from collections.abc import Callable
 from dataclasses import dataclass
+from typing import Protocol
 
 from sshtunnel import SSHTunnelForwarder
 
@@ -14,6 +18,9 @@ from reconcile.utils.helpers import toggle_logger
 # https://www.iana.org/assignments/service-names-port-numbers/service-names-port-numbers.xhtml
 DYNAMIC_PORT_MIN = 49152
 DYNAMIC_PORT_MAX = 65535
+# seconds an unused tunnel is kept open to be reused by later clients,
+# e.g. by the next run of a long-running integration (see run_integration)
+TUNNEL_KEEPALIVE_ENV = "JUMPHOST_TUNNEL_KEEPALIVE_SECONDS"
 
 
 class HTTPStatusCodeError(Exception):
@@ -32,6 +39,104 @@ class JumphostParameters:
     key: str
 
 
+class TimeProtocol(Protocol):
+    def time(self) -> float: ...
+
+
+# jumphost, remote host, remote port
+TunnelKey = tuple[str, str, int | None]
+
+
+@dataclass
+class _PooledTunnel:
+    tunnel: SSHTunnelForwarder
+    local_port: int
+    references: int = 0
+    released_at: float = 0.0
+
+
+class TunnelPool:
+    """
+    SSH tunnels shared by all clients that connect through the same
+    jumphost to the same remote address.
+
+    Tunnels are reference counted. A tunnel without references is closed
+    once it was unused for keepalive_seconds, so clients created later in
+    the same process (e.g. by the next run of an integration) reuse it
+    instead of opening a new SSH connection. A tunnel whose SSH transport
+    went down is started again on the same local port when it is acquired.
+    """
+
+    def __init__(
+        self,
+        keepalive_seconds: float = 0,
+        time_module: TimeProtocol = time,
+    ) -> None:
+        self.keepalive_seconds = keepalive_seconds
+        self.time_module = time_module
+        self._tunnels: dict[TunnelKey, _PooledTunnel] = {}
+        self._lock = threading.Lock()
+
+    def local_port(self, key: TunnelKey) -> int | None:
+        with self._lock:
+            pooled = self._tunnels.get(key)
+            return pooled.local_port if pooled else None
+
+    def acquire(
+        self,
+        key: TunnelKey,
+        local_port: int,
+        start_tunnel: Callable[[int], SSHTunnelForwarder],
+    ) -> int:
+        """
+        Returns the local port of the tunnel for key. start_tunnel is called
+        with the local port to use if the tunnel is not open yet or is down.
+        """
+        with self._lock:
+            self._close_idle()
+            pooled = self._tunnels.get(key)
+            if pooled is None:
+                pooled = _PooledTunnel(start_tunnel(local_port), local_port)
+                self._tunnels[key] = pooled
+            elif not pooled.tunnel.is_active:
+                logging.info(
+                    f"tunnel to {key[0]} on port {pooled.local_port} is down, "
+                    "restarting it"
+                )
+                pooled.tunnel.close()
+                pooled.tunnel = start_tunnel(pooled.local_port)
+            pooled.references += 1
+            return pooled.local_port
+
+    def release(self, key: TunnelKey) -> None:
+        with self._lock:
+            pooled = self._tunnels.get(key)
+            if pooled is None or pooled.references == 0:
+                return
+            pooled.references -= 1
+            pooled.released_at = self.time_module.time()
+            self._close_idle()
+
+    def close_all(self) -> None:
+        with self._lock:
+            for key in list(self._tunnels):
+                self._close(key)
+
+    def _close_idle(self) -> None:
+        now = self.time_module.time()
+        for key, pooled in list(self._tunnels.items()):
+            if (
+                pooled.references == 0
+                and now - pooled.released_at >= self.keepalive_seconds
+            ):
+                self._close(key)
+
+    def _close(self, key: TunnelKey) -> None:
+        pooled = self._tunnels.pop(key)
+        pooled.tunnel.close()
+        JumpHostSSH.release_port(pooled.local_port)
+
+
 class JumpHostBase:
     def __init__(self, parameters: JumphostParameters):
         self._hostname = parameters.hostname
@@ -54,7 +159,9 @@ class JumpHostBase:
 
 
 class JumpHostSSH(JumpHostBase):
-    bastion_tunnel: dict[int, SSHTunnelForwarder] = {}
+    tunnel_pool = TunnelPool(
+        keepalive_seconds=float(os.environ.get(TUNNEL_KEEPALIVE_ENV, "0"))
+    )
     local_ports: list[int] = []
     tunnel_lock = threading.Lock()
 
@@ -72,11 +179,22 @@ class JumpHostSSH(JumpHostBase):
             else parameters.local_port
         )
         self._remote_port = parameters.remote_port
+        self._tunnel_acquired = False
 
     @property
     def local_port(self) -> int | None:
         return self._local_port
 
+    @property
+    def tunnel_key(self) -> TunnelKey:
+        return (self._hostname, "localhost", self._remote_port)
+
+    @staticmethod
+    def get_tunnel_port(hostname: str, remote_port: int | None) -> int:
+        """The local port of an open tunnel to the jumphost, or a new one."""
+        port = JumpHostSSH.tunnel_pool.local_port((hostname, "localhost", remote_port))
+        return port or JumpHostSSH.get_unique_random_port()
+
     @staticmethod
     def get_unique_random_port() -> int:
         with JumpHostSSH.tunnel_lock:
@@ -86,6 +204,12 @@ class JumpHostSSH(JumpHostBase):
             JumpHostSSH.local_ports.append(port)
             return port
 
+    @staticmethod
+    def release_port(port: int) -> None:
+        with JumpHostSSH.tunnel_lock:
+            if port in JumpHostSSH.local_ports:
+                JumpHostSSH.local_ports.remove(port)
+
     def _get_known_hosts(self, known_hosts_path: str) -> str:
         try:
             known_hosts = self._gql_api.get_resource(known_hosts_path)
@@ -123,28 +247,36 @@ class JumpHostSSH(JumpHostBase):
         ]
 
     def create_ssh_tunnel(self) -> None:
-        with JumpHostSSH.tunnel_lock:
-            if self._local_port not in JumpHostSSH.bastion_tunnel:
-                # Hide connect messages from sshtunnel
-                with toggle_logger():
-                    # equivalent to: ssh -i identity_file -L localhost:local_port:localhost:remote_port user@bastion
-                    # localhost:local_port -> bastion:22 -> bastion_localhost:remote_port(tinyproxy) -> cluster_host:6443
-                    tunnel = SSHTunnelForwarder(
-                        ssh_address_or_host=self._hostname,
-                        ssh_port=self._port,
-                        ssh_username=self._user,
-                        ssh_pkey=self._identity_file,
-                        remote_bind_address=("localhost", self._remote_port),
-                        local_bind_address=("localhost", self._local_port),
-                    )
-                    tunnel.start()
-                JumpHostSSH.bastion_tunnel[self._local_port] = tunnel
+        if self._tunnel_acquired:
+            return
+        port = JumpHostSSH.tunnel_pool.acquire(
+            self.tunnel_key, self._local_port, self._start_ssh_tunnel
+        )
+        if port != self._local_port:
+            # another client opened the tunnel first, e.g. both got a new
+            # port from get_tunnel_port before either tunnel was open
+            JumpHostSSH.release_port(self._local_port)
+            self._local_port = port
+        self._tunnel_acquired = True
+
+    def _start_ssh_tunnel(self, local_port: int) -> SSHTunnelForwarder:
+        # Hide connect messages from sshtunnel
+        with toggle_logger():
+            # equivalent to: ssh -i identity_file -L localhost:local_port:localhost:remote_port user@bastion
+            # localhost:local_port -> bastion:22 -> bastion_localhost:remote_port(tinyproxy) -> cluster_host:6443
+            tunnel = SSHTunnelForwarder(
+                ssh_address_or_host=self._hostname,
+                ssh_port=self._port,
+                ssh_username=self._user,
+                ssh_pkey=self._identity_file,
+                remote_bind_address=("localhost", self._remote_port),
+                local_bind_address=("localhost", local_port),
+            )
+            tunnel.start()
+        return tunnel
 
     def cleanup(self) -> None:
         JumpHostBase.cleanup(self)
-        with JumpHostSSH.tunnel_lock:
-            tunnels = JumpHostSSH.bastion_tunnel
-            if self._local_port in tunnels:
-                tunnel = tunnels.pop(self._local_port)
-                tunnel.close()
-                JumpHostSSH.local_ports.remove(self._local_port)
+        if self._tunnel_acquired:
+            JumpHostSSH.tunnel_pool.release(self.tunnel_key)
+            self._tunnel_acquired = False
@@ -71,6 +71,18 @@ reconcile_time = Histogram(
     buckets=(60.0, 150.0, 300.0, 600.0, 1200.0, 1800.0, 2400.0, 3000.0, float("inf")),
 )
 
+cluster_queue_time = Histogram(
+    name="qontract_reconcile_cluster_queue_seconds",
+    documentation="Seconds until the first work item of a cluster was scheduled",
+    labelnames=["name", "cluster"],
+)
+
+cluster_run_time = Histogram(
+    name="qontract_reconcile_cluster_run_seconds",
+    documentation="Seconds from the first to the last work item of a cluster",
+    labelnames=["name", "cluster"],
+)
+
 registry_reachouts = Counter(
     name="qontract_reconcile_registry_get_manifest_total",
     documentation="Number of GET requests on image registries",
@@ -119,6 +131,30 @@ slack_request = Counter(
     labelnames=["resource", "verb"],
 )
 
+gql_document_cache_hits = Counter(
+    name="qontract_reconcile_gql_document_cache_hits_total",
+    documentation="Number of GraphQL queries run with a cached parsed document",
+    labelnames=["integration"],
+)
+
+gql_document_cache_misses = Counter(
+    name="qontract_reconcile_gql_document_cache_misses_total",
+    documentation="Number of GraphQL queries parsed before they were run",
+    labelnames=["integration"],
+)
+
+gql_result_cache_hits = Counter(
+    name="qontract_reconcile_gql_result_cache_hits_total",
+    documentation="Number of GraphQL query results read from the result cache",
+    labelnames=["integration"],
+)
+
+gql_result_cache_misses = Counter(
+    name="qontract_reconcile_gql_result_cache_misses_total",
+    documentation="Number of cacheable GraphQL queries sent to the server",
+    labelnames=["integration"],
+)
+
 
 #
 # Class based metrics
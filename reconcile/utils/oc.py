@@ -1,4 +1,5 @@
 import copy
+import hashlib
 import json
 import logging
 import os
@@ -8,11 +9,17 @@ import subprocess
 import threading
 import time
 from collections.abc import (
+    Generator,
     Iterable,
+    Iterator,
     Mapping,
+    Sequence,
 )
 from contextlib import suppress
-from dataclasses import dataclass
+from dataclasses import (
+    asdict,
+    dataclass,
+)
 from datetime import datetime
 from functools import wraps
 from subprocess import Popen
@@ -24,18 +31,23 @@ from kubernetes.client import (  # type: ignore[attr-defined]
     ApiClient,
     Configuration,
 )
+from kubernetes.client.exceptions import ApiException
 from kubernetes.dynamic.client import DynamicClient
 from kubernetes.dynamic.discovery import (
     LazyDiscoverer,
     ResourceGroup,
 )
 from kubernetes.dynamic.exceptions import (
+    DynamicApiError,
     ForbiddenError,
+    GoneError,
     InternalServerError,
     NotFoundError,
     ResourceNotFoundError,
     ResourceNotUniqueError,
     ServerTimeoutError,
+    ServiceUnavailableError,
+    TooManyRequestsError,
 )
 from kubernetes.dynamic.resource import ResourceList
 from prometheus_client import Counter
@@ -51,6 +63,7 @@ from reconcile.utils.jump_host import (
 )
 from reconcile.utils.metrics import reconcile_time
 from reconcile.utils.oc_connection_parameters import OCConnectionParameters
+from reconcile.utils.oc_discovery_cache import DiscoveryCache
 from reconcile.utils.openshift_resource import OpenshiftResource as OR
 from reconcile.utils.secret_reader import (
     SecretNotFound,
@@ -61,6 +74,19 @@ from reconcile.utils.unleash import get_feature_toggle_state
 urllib3.disable_warnings()
 
 GET_REPLICASET_MAX_ATTEMPTS = 20
+# number of objects requested per LIST call when paginating with limit/continue
+LIST_PAGE_SIZE = 500
+# ask the API server for the metadata of objects only. Servers that don't
+# support partial object metadata return the complete objects instead.
+PARTIAL_OBJECT_METADATA_ACCEPT = (
+    "application/json;as=PartialObjectMetadata;g=meta.k8s.io;v=v1,application/json"
+)
+PARTIAL_OBJECT_METADATA_LIST_ACCEPT = (
+    "application/json;as=PartialObjectMetadataList;g=meta.k8s.io;v=v1,application/json"
+)
+# names of the entries in the discovery cache
+API_RESOURCES_CACHE_NAME = "api-resources"
+DYNAMIC_CLIENT_CACHE_NAME = "dynamic-client"
 
 
 oc_run_execution_counter = Counter(
@@ -255,6 +281,64 @@ class OCCliApiResource:
         return self.api_version
 
 
+class PodIndex:
+    """
+    The root owners of the pods of a namespace, by the Secrets and
+    ConfigMaps the pods use, e.g. to find what to recycle when a Secret
+    changes.
+
+    Built with one listing of the pods and one of each kind in
+    PREFETCHED_OWNER_KINDS, which own most pods. Other owners are fetched
+    once each, however many pods they own. Owner chains are followed like
+    OCCli.get_obj_root_owner(allow_not_found=True) does.
+    """
+
+    PREFETCHED_OWNER_KINDS = ("ReplicaSet", "Deployment")
+
+    def __init__(self, oc: "OCCli", namespace: str) -> None:
+        self._oc = oc
+        self._namespace = namespace
+        # owner metadata by (kind, name), {} if not found
+        self._owners: dict[tuple[str, str], dict[str, Any]] = {}
+        for kind in self.PREFETCHED_OWNER_KINDS:
+            try:
+                items = oc.get_items_metadata(kind, namespace=namespace)
+            except StatusCodeError as e:
+                logging.debug(f"[{namespace}] unable to list {kind}: {e}")
+                continue
+            for item in items:
+                self._owners[kind, item["metadata"]["name"]] = item
+
+        # root owners by (kind, name) of the used resource and of the owner
+        self._used_by: dict[tuple[str, str], dict[tuple[str, str], Any]] = {}
+        for pod in oc.get(namespace, "Pod")["items"]:
+            root = self._root_owner(pod)
+            root_key = (root["kind"], root["metadata"]["name"])
+            for kind in ("Secret", "ConfigMap"):
+                for name in oc.get_resources_used_in_pod_spec(pod["spec"], kind):
+                    self._used_by.setdefault((kind, name), {})[root_key] = root
+
+    def _owner(self, kind: str, name: str) -> dict[str, Any]:
+        key = (kind, name)
+        if key not in self._owners:
+            self._owners[key] = self._oc.get_metadata(
+                self._namespace, kind, name, allow_not_found=True
+            )
+        return self._owners[key]
+
+    def _root_owner(self, obj: dict[str, Any]) -> dict[str, Any]:
+        for ref in obj["metadata"].get("ownerReferences", []):
+            if ref.get("controller"):
+                owner = self._owner(ref["kind"], ref["name"])
+                if owner:
+                    return self._root_owner(owner)
+        return obj
+
+    def owners_using(self, kind: str, name: str) -> list[dict[str, Any]]:
+        """Root owners of the pods using the Secret or ConfigMap."""
+        return list(self._used_by.get((kind, name), {}).values())
+
+
 class OCCli:  # pylint: disable=too-many-public-methods
     def __init__(
         self,
@@ -323,7 +407,8 @@ class OCCli:  # pylint: disable=too-many-public-methods
             token (string): Token to use for authentication
             jh (dict, optional): Info to initiate JumpHostSSH
             settings (dict, optional): App-interface settings
-            init_projects (bool, optional): Initiate projects
+            init_projects (bool, optional): List projects upfront instead
+                of on first use
             init_api_resources (bool, optional): Initiate api-resources
             local (bool, optional): Use oc locally
         """
@@ -357,23 +442,20 @@ class OCCli:  # pylint: disable=too-many-public-methods
         self.oc_base_cmd = oc_base_cmd
 
         # calling get_version to check if cluster is reachable
+        # the output is also part of the discovery cache key
+        self.server_version = ""
         if not local:
-            self.get_version()
+            self.server_version = self.get_version().decode("utf-8")
 
+        self.discovery_cache = DiscoveryCache.from_env()
         self.api_resources_lock = threading.RLock()
         self.init_api_resources = init_api_resources
         self.api_resources = {}
-        self.projects = set()
+        self.api_resources_from_cache = False
         if self.init_api_resources:
             self.api_resources = self.get_api_resources()
 
-        self.init_projects = init_projects
-        if self.init_projects:
-            if self.is_kind_supported("Project"):
-                kind = "Project.project.openshift.io"
-            else:
-                kind = "Namespace"
-            self.projects = {p["metadata"]["name"] for p in self.get_all(kind)["items"]}
+        self._init_projects_index(init_projects)
 
         self.slow_oc_reconcile_threshold = float(
             os.environ.get("SLOW_OC_RECONCILE_THRESHOLD", "600")
@@ -430,23 +512,20 @@ class OCCli:  # pylint: disable=too-many-public-methods
         self.oc_base_cmd = oc_base_cmd
 
         # calling get_version to check if cluster is reachable
+        # the output is also part of the discovery cache key
+        self.server_version = ""
         if not local:
-            self.get_version()
+            self.server_version = self.get_version().decode("utf-8")
 
+        self.discovery_cache = DiscoveryCache.from_env()
         self.api_resources_lock = threading.RLock()
         self.init_api_resources = init_api_resources
         self.api_resources = {}
-        self.projects = set()
+        self.api_resources_from_cache = False
         if self.init_api_resources:
             self.api_resources = self.get_api_resources()
 
-        self.init_projects = init_projects
-        if self.init_projects:
-            if self.is_kind_supported("Project"):
-                kind = "Project.project.openshift.io"
-            else:
-                kind = "Namespace"
-            self.projects = {p["metadata"]["name"] for p in self.get_all(kind)["items"]}
+        self._init_projects_index(init_projects)
 
         self.slow_oc_reconcile_threshold = float(
             os.environ.get("SLOW_OC_RECONCILE_THRESHOLD", "600")
@@ -474,6 +553,8 @@ class OCCli:  # pylint: disable=too-many-public-methods
                 if not self.project_exists(namespace):
                     return []
                 cmd.extend(["-n", namespace])
+        elif kwargs.get("all_namespaces"):
+            cmd.append("--all-namespaces")
 
         if "labels" in kwargs:
             labels_list = [f"{k}={v}" for k, v in kwargs.get("labels").items()]
@@ -497,6 +578,16 @@ class OCCli:  # pylint: disable=too-many-public-methods
 
         return items
 
+    def iter_items(
+        self, kind, page_size: int = LIST_PAGE_SIZE, **kwargs
+    ) -> Iterator[dict[str, Any]]:
+        """Same as get_items, but yields the items one by one.
+
+        The oc binary always returns the complete list, so this is only a
+        generator facade. OCNative overrides it with a paginated LIST.
+        """
+        yield from self.get_items(kind, **kwargs)
+
     def get(self, namespace, kind, name=None, allow_not_found=False):
         cmd = ["get", "-o", "json", kind]
         if name:
@@ -505,6 +596,18 @@ class OCCli:  # pylint: disable=too-many-public-methods
             cmd.extend(["-n", namespace])
         return self._run_json(cmd, allow_not_found=allow_not_found)
 
+    def get_metadata(self, namespace, kind, name, allow_not_found=False):
+        """Same as get for a single object, for callers that only need its
+        metadata, apiVersion and kind. The oc binary returns the complete
+        object, OCNative only fetches the metadata."""
+        return self.get(namespace, kind, name, allow_not_found=allow_not_found)
+
+    def get_items_metadata(self, kind, **kwargs):
+        """Same as get_items, for callers that only need the metadata,
+        apiVersion and kind of the objects. The oc binary returns the
+        complete objects, OCNative only fetches the metadata."""
+        return self.get_items(kind, **kwargs)
+
     def get_all(self, kind, all_namespaces=False):
         cmd = ["get", "-o", "json", kind]
         if all_namespaces:
@@ -551,6 +654,26 @@ class OCCli:  # pylint: disable=too-many-public-methods
         self._run(cmd, stdin=resource.toJSON(), apply=True)
         return self._msg_to_process_reconcile_time(namespace, resource)
 
+    def apply_list(self, namespace: str, resources: Sequence[OR]) -> None:
+        """
+        Applies resources with a single oc apply of a List. If any of them
+        fails, the error of apply is raised for the whole list, and the
+        other resources may or may not have been applied.
+        """
+        cmd = ["apply", "-n", namespace, "-f", "-"]
+        manifest = ", ".join(resource.toJSON() for resource in resources)
+        self._run(
+            cmd,
+            stdin=f'{{"apiVersion": "v1", "items": [{manifest}], "kind": "List"}}',
+            apply=True,
+        )
+        for resource in resources:
+            self._applied_from_list(namespace, resource)
+
+    @OCDecorators.process_reconcile_time
+    def _applied_from_list(self, namespace: str, resource: OR):
+        return self._msg_to_process_reconcile_time(namespace, resource)
+
     @OCDecorators.process_reconcile_time
     def create(self, namespace, resource):
         cmd = ["create", "-n", namespace, "-f", "-"]
@@ -597,18 +720,57 @@ class OCCli:  # pylint: disable=too-many-public-methods
         resource = OR({"kind": kind, "metadata": {"name": name}}, "", "")
         return self._msg_to_process_reconcile_time(namespace, resource)
 
+    def _init_projects_index(self, init_projects: bool) -> None:
+        # names of projects known to exist: listed once, upfront if
+        # init_projects is set or else on the first project_exists, and
+        # added by project_exists and new_project. A missing name is looked
+        # up again, as the project may have been created by someone else
+        # since. A project deleted by someone else stays in the index.
+        self.projects: set[str] = set()
+        self.projects_lock = threading.RLock()
+        self.projects_listed = False
+        self.init_projects = init_projects
+        if self.init_projects:
+            self._list_projects()
+
+    def _projects_kind(self) -> str:
+        if self.is_kind_supported("Project"):
+            return "Project.project.openshift.io"
+        return "Namespace"
+
+    def _list_projects(self) -> None:
+        with self.projects_lock:
+            if self.projects_listed:
+                return
+            try:
+                items = self.get_all(self._projects_kind())["items"]
+            except StatusCodeError as e:
+                if "Forbidden" not in str(e):
+                    raise e
+                # fall back to a GET per project
+                items = []
+            self.projects.update(p["metadata"]["name"] for p in items)
+            self.projects_listed = True
+
+    def _update_projects_index(self, name: str, exists: bool) -> None:
+        with self.projects_lock:
+            if exists:
+                self.projects.add(name)
+            else:
+                self.projects.discard(name)
+
     def project_exists(self, name):
+        if not self.projects_listed:
+            self._list_projects()
         if name in self.projects:
             return True
         try:
-            if self.is_kind_supported("Project"):
-                self.get(None, "Project.project.openshift.io", name)
-            else:
-                self.get(None, "Namespace", name)
+            self.get_metadata(None, self._projects_kind(), name)
         except StatusCodeError as e:
             if "NotFound" in str(e):
                 return False
             raise e
+        self._update_projects_index(name, exists=True)
         return True
 
     @OCDecorators.process_reconcile_time
@@ -622,6 +784,7 @@ class OCCli:  # pylint: disable=too-many-public-methods
         except StatusCodeError as e:
             if "AlreadyExists" not in str(e):
                 raise e
+        self._update_projects_index(namespace, exists=True)
 
         # This return will be removed by the last decorator
         resource = OR({"kind": "Namespace", "metadata": {"name": namespace}}, "", "")
@@ -634,6 +797,7 @@ class OCCli:  # pylint: disable=too-many-public-methods
         else:
             cmd = ["delete", "namespace", namespace]
         self._run(cmd)
+        self._update_projects_index(namespace, exists=False)
 
         # This return will be removed by the last decorator
         resource = OR({"kind": "Namespace", "metadata": {"name": namespace}}, "", "")
@@ -682,6 +846,16 @@ class OCCli:  # pylint: disable=too-many-public-methods
 
     def get_api_resources(self):
         with self.api_resources_lock:
+            if not self.api_resources and self.discovery_cache:
+                cached = self.discovery_cache.read(
+                    self.server, self.server_version, API_RESOURCES_CACHE_NAME
+                )
+                if cached:
+                    self.api_resources = {
+                        kind: [OCCliApiResource(**r) for r in resources]
+                        for kind, resources in cached.items()
+                    }
+                    self.api_resources_from_cache = True
             if not self.api_resources:
                 cmd = ["api-resources", "--no-headers"]
                 results = self._run(cmd).decode("utf-8").split("\n")
@@ -698,9 +872,35 @@ class OCCli:  # pylint: disable=too-many-public-methods
                     obj = OCCliApiResource(kind, group, api_version, namespaced)
                     d = self.api_resources.setdefault(kind, [])
                     d.append(obj)
+                if self.discovery_cache:
+                    self.discovery_cache.write(
+                        self.server,
+                        self.server_version,
+                        API_RESOURCES_CACHE_NAME,
+                        {
+                            kind: [asdict(r) for r in resources]
+                            for kind, resources in self.api_resources.items()
+                        },
+                    )
 
         return self.api_resources
 
+    def _refresh_cached_api_resources(self) -> bool:
+        """Drop api resources loaded from the discovery cache, e.g. because a
+        kind is unknown to them, and fetch them from the cluster again.
+        Returns True if they have been refreshed."""
+        with self.api_resources_lock:
+            if not self.api_resources_from_cache:
+                return False
+            if self.discovery_cache:
+                self.discovery_cache.invalidate(
+                    self.server, self.server_version, API_RESOURCES_CACHE_NAME
+                )
+            self.api_resources_from_cache = False
+            self.api_resources = {}
+            self.get_api_resources()
+            return True
+
     def get_version(self):
         # this is actually a 10 second timeout, because: oc reasons
         cmd = ["version", "--request-timeout=5"]
@@ -785,7 +985,9 @@ class OCCli:  # pylint: disable=too-many-public-methods
         pods = self.get(namespace, "Pod")["items"]
         owned_pods = []
         for p in pods:
-            owner = self.get_obj_root_owner(namespace, p, allow_not_found=True)
+            owner = self.get_obj_root_owner(
+                namespace, p, allow_not_found=True, metadata_only=True
+            )
             if (resource.kind, resource.name) == (
                 owner["kind"],
                 owner["metadata"]["name"],
@@ -797,7 +999,9 @@ class OCCli:  # pylint: disable=too-many-public-methods
     def get_owned_replicasets(self, namespace, resource: dict) -> list[dict]:
         owned_replicasets = []
         for rs in self.get(namespace, "ReplicaSet")["items"]:
-            owner = self.get_obj_root_owner(namespace, rs, allow_not_found=True)
+            owner = self.get_obj_root_owner(
+                namespace, rs, allow_not_found=True, metadata_only=True
+            )
             if (resource["kind"], resource["metadata"]["name"]) == (
                 owner["kind"],
                 owner["metadata"]["name"],
@@ -909,45 +1113,18 @@ class OCCli:  # pylint: disable=too-many-public-methods
             ])
             return
 
-        dep_name = dep_resource.name
-        pods = self.get(namespace, "Pod")["items"]
-
-        if dep_kind == "Secret":
-            pods_to_recycle = [
-                pod for pod in pods if self.secret_used_in_pod(dep_name, pod)
-            ]
-        elif dep_kind == "ConfigMap":
-            pods_to_recycle = [
-                pod for pod in pods if self.configmap_used_in_pod(dep_name, pod)
-            ]
-        else:
-            raise RecyclePodsUnsupportedKindError(dep_kind)
-
-        recyclables = {}
-        supported_recyclables = [
+        supported_recyclables = {
             "Deployment",
             "DeploymentConfig",
             "StatefulSet",
             "DaemonSet",
-        ]
-        for pod in pods_to_recycle:
-            owner = self.get_obj_root_owner(namespace, pod, allow_not_found=True)
-            kind = owner["kind"]
-            if kind not in supported_recyclables:
-                continue
-            recyclables.setdefault(kind, [])
-            exists = False
-            for obj in recyclables[kind]:
-                owner_name = owner["metadata"]["name"]
-                if obj["metadata"]["name"] == owner_name:
-                    exists = True
-                    break
-            if not exists:
-                recyclables[kind].append(owner)
-
-        for kind, objs in recyclables.items():
-            for obj in objs:
-                self.recycle(dry_run, namespace, kind, obj)
+        }
+        # built for each call, pods and their owners change with rollouts
+        # and writes of other clients
+        owners = PodIndex(self, namespace).owners_using(dep_kind, dep_resource.name)
+        for owner in owners:
+            if owner["kind"] in supported_recyclables:
+                self.recycle(dry_run, namespace, owner["kind"], owner)
 
     @retry(exceptions=ObjectHasBeenModifiedError)
     def recycle(self, dry_run, namespace, kind, obj):
@@ -963,20 +1140,27 @@ class OCCli:  # pylint: disable=too-many-public-methods
         if not dry_run:
             now = datetime.now()
             recycle_time = now.strftime("%d/%m/%Y %H:%M:%S")
-
-            # get the object in case it was modified
-            obj = self.get(namespace, kind, name)
-            # honor update strategy by setting annotations to force
-            # a new rollout
-            a = obj["spec"]["template"]["metadata"].get("annotations", {})
-            a["recycle.time"] = recycle_time
-            obj["spec"]["template"]["metadata"]["annotations"] = a
-            cmd = ["apply", "-n", namespace, "-f", "-"]
-            stdin = json.dumps(obj, sort_keys=True)
-            self._run(cmd, stdin=stdin, apply=True)
+            self._set_recycle_time(namespace, kind, name, recycle_time)
+
+    def _set_recycle_time(self, namespace, kind, name, recycle_time):
+        # get the object in case it was modified
+        obj = self.get(namespace, kind, name)
+        # honor update strategy by setting annotations to force
+        # a new rollout
+        a = obj["spec"]["template"]["metadata"].get("annotations", {})
+        a["recycle.time"] = recycle_time
+        obj["spec"]["template"]["metadata"]["annotations"] = a
+        cmd = ["apply", "-n", namespace, "-f", "-"]
+        stdin = json.dumps(obj, sort_keys=True)
+        self._run(cmd, stdin=stdin, apply=True)
 
     def get_obj_root_owner(
-        self, ns, obj, allow_not_found=False, allow_not_controller=False
+        self,
+        ns,
+        obj,
+        allow_not_found=False,
+        allow_not_controller=False,
+        metadata_only=False,
     ):
         """Get object root owner (recursively find the top level owner).
         - Returns obj if it has no ownerReferences
@@ -992,14 +1176,16 @@ class OCCli:  # pylint: disable=too-many-public-methods
             obj (dict): representation of the object
             allow_not_found (bool, optional): allow owner to be not found
             allow_not_controller (bool, optional): allow non-controller owner
+            metadata_only (bool, optional): only fetch the metadata of owners
 
         Returns:
             dict: representation of the object's owner
         """
+        get = self.get_metadata if metadata_only else self.get
         refs = obj["metadata"].get("ownerReferences", [])
         for r in refs:
             if r.get("controller") or allow_not_controller:
-                controller_obj = self.get(
+                controller_obj = get(
                     ns, r["kind"], r["name"], allow_not_found=allow_not_found
                 )
                 if controller_obj:
@@ -1008,6 +1194,7 @@ class OCCli:  # pylint: disable=too-many-public-methods
                         controller_obj,
                         allow_not_found=allow_not_found,
                         allow_not_controller=allow_not_controller,
+                        metadata_only=metadata_only,
                     )
         return obj
 
@@ -1149,6 +1336,8 @@ class OCCli:  # pylint: disable=too-many-public-methods
 
         kind_group = kind_name.split(".", 1)
         kind = kind_group[0]
+        if kind not in self.api_resources:
+            self._refresh_cached_api_resources()
         if kind in self.api_resources:
             group_version = self.api_resources[kind][0].group_version
         else:
@@ -1188,6 +1377,8 @@ class OCCli:  # pylint: disable=too-many-public-methods
             except StatusCodeError:
                 return False
         else:
+            if kind not in self.api_resources:
+                self._refresh_cached_api_resources()
             return kind in self.api_resources
 
     def is_kind_namespaced(self, kind: str) -> bool:
@@ -1214,6 +1405,80 @@ class OCCli:  # pylint: disable=too-many-public-methods
 
 
 REQUEST_TIMEOUT = 60
+# field manager used for server-side apply
+FIELD_MANAGER = "qontract-reconcile"
+# field manager of oc apply (client-side apply)
+CLIENT_SIDE_APPLY_FIELD_MANAGER = "kubectl-client-side-apply"
+# metadata set by the API server, e.g. on an object read with get. A
+# server-side apply of it is rejected or fails on a stale precondition.
+SERVER_POPULATED_METADATA = (
+    "managedFields",
+    "resourceVersion",
+    "uid",
+    "creationTimestamp",
+    "generation",
+    "selfLink",
+)
+
+
+def server_side_apply_body(body: dict[str, Any]) -> dict[str, Any]:
+    """body without the metadata populated by the API server"""
+    metadata = body.get("metadata") or {}
+    if not any(key in metadata for key in SERVER_POPULATED_METADATA):
+        return body
+    return body | {
+        "metadata": {
+            k: v for k, v in metadata.items() if k not in SERVER_POPULATED_METADATA
+        }
+    }
+
+
+def _merge_fields(fields: dict[str, Any], other: dict[str, Any]) -> None:
+    for key, value in other.items():
+        if isinstance(value, dict) and isinstance(fields.get(key), dict):
+            _merge_fields(fields[key], value)
+        else:
+            fields[key] = copy.deepcopy(value)
+
+
+def take_over_client_side_apply(
+    managed_fields: list[dict[str, Any]],
+) -> list[dict[str, Any]] | None:
+    """
+    managedFields with the fields owned by client-side apply owned by the
+    server-side apply of FIELD_MANAGER instead, None if there is nothing to
+    take over. This is what kubectl apply --server-side does with
+    --migrate-managed-fields (csaupgrade).
+    """
+    client_side = [
+        entry
+        for entry in managed_fields
+        if entry.get("manager") == CLIENT_SIDE_APPLY_FIELD_MANAGER
+        and entry.get("operation") == "Update"
+    ]
+    if not client_side:
+        return None
+    result: list[dict[str, Any]] = []
+    applied: dict[str, Any] | None = None
+    for entry in managed_fields:
+        if entry in client_side:
+            continue
+        entry = copy.deepcopy(entry)
+        if entry.get("manager") == FIELD_MANAGER and entry.get("operation") == "Apply":
+            applied = entry
+        result.append(entry)
+    if applied is None:
+        applied = {
+            "manager": FIELD_MANAGER,
+            "operation": "Apply",
+            "apiVersion": client_side[0].get("apiVersion"),
+            "fieldsType": "FieldsV1",
+            "fieldsV1": {},
+        }
+        result.append(applied)
+    for entry in client_side:
+        _merge_fields(applied.setdefault("fieldsV1", {}), entry.get("fieldsV1") or {})
+    return result
 
 
 class OCNative(OCCli):
@@ -1228,7 +1493,21 @@ class OCNative(OCCli):
         local: bool = False,
         insecure_skip_tls_verify: bool = False,
         connection_parameters: OCConnectionParameters | None = None,
+        native_writes: bool = False,
     ):
+        """
+        native_writes: run apply, create, replace, patch, delete, label and
+        new_project through the API (server-side apply) instead of forking oc.
+
+        A server-side apply removes only the fields owned by its own field
+        manager when they are dropped from the desired state. The fields of
+        objects last written by oc apply are owned by the client-side apply
+        manager, so before applying such an object the first time its
+        ownership is moved to FIELD_MANAGER, like
+        kubectl apply --server-side does. Otherwise fields removed from the
+        desired state would stay on the object.
+        """
+        self.native_writes = native_writes
         super().__init__(
             cluster_name,
             server,
@@ -1249,6 +1528,9 @@ class OCNative(OCCli):
 
             server = connection_parameters.server_url
 
+        # tells clients with different credentials apart, e.g. in caches of
+        # what they have read, without keeping the token
+        self.identity = hashlib.sha256((token or "").encode()).hexdigest()
         if server:
             self.client = self._get_client(server, token)
             self.api_resources = self.get_api_resources()
@@ -1257,14 +1539,7 @@ class OCNative(OCCli):
             raise Exception("A method relies on client/api_kind_version to be set")
 
         self.object_clients: dict[Any, Any] = {}
-        self.projects = set()
-        self.init_projects = init_projects
-        if self.init_projects:
-            if self.is_kind_supported("Project"):
-                kind = "Project.project.openshift.io"
-            else:
-                kind = "Namespace"
-            self.projects = {p["metadata"]["name"] for p in self.get_all(kind)["items"]}
+        self._init_projects_index(init_projects)
 
     def __enter__(self):
         return self
@@ -1303,8 +1578,15 @@ class OCNative(OCCli):
             setattr(configuration, k, v)
 
         k8s_client = ApiClient(configuration)
+        cache_file = None
+        if self.discovery_cache:
+            cache_file = self.discovery_cache.path(
+                server, self.server_version, DYNAMIC_CLIENT_CACHE_NAME
+            )
         try:
-            return DynamicClient(k8s_client, discoverer=OpenshiftLazyDiscoverer)
+            return DynamicClient(
+                k8s_client, cache_file=cache_file, discoverer=OpenshiftLazyDiscoverer
+            )
         except urllib3.exceptions.MaxRetryError as e:
             raise StatusCodeError(f"[{self.server}]: {e}") from None
 
@@ -1364,6 +1646,383 @@ class OCNative(OCCli):
             raise Exception("Expecting items")
         return items
 
+    def iter_items(
+        self, kind, page_size: int = LIST_PAGE_SIZE, **kwargs
+    ) -> Iterator[dict[str, Any]]:
+        """Same as get_items, but lists the objects in chunks of page_size
+        (limit/continue) and yields them one by one. Only a single page is
+        held in memory at a time and the API server never has to serve the
+        complete list in one response.
+
+        Without a namespace the objects of all namespaces are listed."""
+        if kwargs.get("resource_names"):
+            yield from self.get_items(kind, **kwargs)
+            return
+
+        for page in self._iter_pages(kind, page_size, **kwargs):
+            yield from page["items"]
+
+    def list_items(
+        self, kind, page_size: int = LIST_PAGE_SIZE, **kwargs
+    ) -> tuple[list[dict[str, Any]], str]:
+        """Same as iter_items, but returns all items together with the
+        resourceVersion of the list. Changes made after the list was taken
+        can be watched for starting from this version."""
+        items: list[dict[str, Any]] = []
+        resource_version = ""
+        for page in self._iter_pages(kind, page_size, **kwargs):
+            items.extend(page["items"])
+            # all pages of a list share the resourceVersion of the first one
+            resource_version = resource_version or (page.get("metadata") or {}).get(
+                "resourceVersion", ""
+            )
+        return items, resource_version
+
+    def _iter_pages(self, kind, page_size: int, **kwargs) -> Iterator[dict[str, Any]]:
+        k, group_version = self._parse_kind(kind)
+        obj_client = self._get_obj_client(group_version=group_version, kind=k)
+
+        namespace = kwargs.get("namespace", "")
+        # for cluster scoped integrations
+        # currently only openshift-clusterrolebindings
+        if namespace and namespace != "cluster" and not self.project_exists(namespace):
+            return
+
+        labels = ",".join(
+            f"{key}={value}" for key, value in (kwargs.get("labels") or {}).items()
+        )
+
+        continue_token = None
+        while True:
+            page = self._list_page(
+                obj_client, namespace, labels, page_size, continue_token
+            )
+            if page.get("items") is None:
+                raise Exception("Expecting items")
+            yield page
+            continue_token = (page.get("metadata") or {}).get("continue")
+            if not continue_token:
+                return
+
+    @retry(max_attempts=5, exceptions=(ServerTimeoutError))
+    def _list_page(
+        self,
+        obj_client,
+        namespace: str,
+        labels: str,
+        limit: int,
+        continue_token: str | None,
+    ) -> dict[str, Any]:
+        try:
+            return obj_client.get(
+                namespace=namespace,
+                label_selector=labels,
+                limit=limit,
+                _continue=continue_token,
+                _request_timeout=REQUEST_TIMEOUT,
+            ).to_dict()
+        except (GoneError, ForbiddenError) as e:
+            # GoneError: the continue token expired, the list has to be restarted
+            raise StatusCodeError(f"[{self.server}]: {e}") from None
+
+    def watch_items(
+        self, kind, timeout_seconds: int, **kwargs
+    ) -> Generator[tuple[str, dict[str, Any]], None, None]:
+        """Streams (event type, object) tuples for changes to the objects of
+        a kind until timeout_seconds have passed. Accepts the namespace and
+        labels filters of get_items, and the resource_version to start from."""
+        k, group_version = self._parse_kind(kind)
+        obj_client = self._get_obj_client(group_version=group_version, kind=k)
+        labels = ",".join(
+            f"{key}={value}" for key, value in (kwargs.get("labels") or {}).items()
+        )
+        try:
+            # without a resource version the watch starts with an ADDED
+            # event for every existing object
+            for event in self.client.watch(
+                obj_client,
+                namespace=kwargs.get("namespace"),
+                label_selector=labels or None,
+                resource_version=kwargs.get("resource_version"),
+                timeout=timeout_seconds,
+            ):
+                if event["type"] == "ERROR":
+                    message = event["raw_object"].get("message")
+                    raise StatusCodeError(f"[{self.server}]: {message}")
+                yield event["type"], event["raw_object"]
+        except (ApiException, urllib3.exceptions.HTTPError) as e:
+            raise StatusCodeError(f"[{self.server}]: {e}") from None
+
+    def apply(self, namespace, resource):
+        if not self.native_writes:
+            return super().apply(namespace, resource)
+        return self._apply(namespace, resource)
+
+    def apply_list(self, namespace: str, resources: Sequence[OR]) -> None:
+        if not self.native_writes:
+            return super().apply_list(namespace, resources)
+        # the API has no request to apply a List, but no process is forked
+        for resource in resources:
+            self._apply(namespace, resource)
+        return None
+
+    def create(self, namespace, resource):
+        if not self.native_writes:
+            return super().create(namespace, resource)
+        return self._create(namespace, resource)
+
+    def replace(self, namespace, resource):
+        if not self.native_writes:
+            return super().replace(namespace, resource)
+        return self._replace(namespace, resource)
+
+    def patch(self, namespace, kind, name, patch):
+        if not self.native_writes:
+            return super().patch(namespace, kind, name, patch)
+        return self._patch(namespace, kind, name, patch)
+
+    def delete(self, namespace, kind, name, cascade=True):
+        if not self.native_writes:
+            return super().delete(namespace, kind, name, cascade=cascade)
+        return self._delete(namespace, kind, name, cascade=cascade)
+
+    def label(self, namespace, kind, name, labels, overwrite=False):
+        if not self.native_writes:
+            return super().label(namespace, kind, name, labels, overwrite=overwrite)
+        return self._label(namespace, kind, name, labels, overwrite=overwrite)
+
+    def new_project(self, namespace):
+        if not self.native_writes:
+            return super().new_project(namespace)
+        return self._new_project(namespace)
+
+    def _set_recycle_time(self, namespace, kind, name, recycle_time):
+        if not self.native_writes:
+            return super()._set_recycle_time(namespace, kind, name, recycle_time)
+        # a patch of the annotation only, the object doesn't have to be read
+        # first and can't have been modified in between
+        patch = {
+            "spec": {
+                "template": {
+                    "metadata": {"annotations": {"recycle.time": recycle_time}}
+                }
+            }
+        }
+        return self._patch(namespace, kind, name, patch)
+
+    @OCDecorators.process_reconcile_time
+    def _apply(self, namespace, resource):
+        obj_client = self._get_obj_client(
+            kind=resource.kind, group_version=resource.body["apiVersion"]
+        )
+        self._take_over_client_side_apply(obj_client, namespace, resource.name)
+        self._write(
+            obj_client.server_side_apply,
+            body=server_side_apply_body(resource.body),
+            namespace=namespace,
+            field_manager=FIELD_MANAGER,
+            force_conflicts=True,
+        )
+        return self._msg_to_process_reconcile_time(namespace, resource)
+
+    @OCDecorators.process_reconcile_time
+    def _create(self, namespace, resource):
+        obj_client = self._get_obj_client(
+            kind=resource.kind, group_version=resource.body["apiVersion"]
+        )
+        self._write(obj_client.create, body=resource.body, namespace=namespace)
+        return self._msg_to_process_reconcile_time(namespace, resource)
+
+    @OCDecorators.process_reconcile_time
+    def _replace(self, namespace, resource):
+        obj_client = self._get_obj_client(
+            kind=resource.kind, group_version=resource.body["apiVersion"]
+        )
+        self._write(obj_client.replace, body=resource.body, namespace=namespace)
+        return self._msg_to_process_reconcile_time(namespace, resource)
+
+    @OCDecorators.process_reconcile_time
+    def _patch(self, namespace, kind, name, patch):
+        k, group_version = self._parse_kind(kind)
+        obj_client = self._get_obj_client(group_version=group_version, kind=k)
+        self._write(obj_client.patch, body=patch, name=name, namespace=namespace)
+        resource = OR({"kind": kind, "metadata": {"name": name}}, "", "")
+        return self._msg_to_process_reconcile_time(namespace, resource)
+
+    @OCDecorators.process_reconcile_time
+    def _delete(self, namespace, kind, name, cascade=True):
+        k, group_version = self._parse_kind(kind)
+        obj_client = self._get_obj_client(group_version=group_version, kind=k)
+        self._write(
+            obj_client.delete,
+            name=name,
+            namespace=namespace,
+            propagation_policy="Background" if cascade else "Orphan",
+        )
+        resource = OR({"kind": kind, "metadata": {"name": name}}, "", "")
+        return self._msg_to_process_reconcile_time(namespace, resource)
+
+    @OCDecorators.process_reconcile_time
+    def _label(self, namespace, kind, name, labels, overwrite=False):
+        k, group_version = self._parse_kind(kind)
+        obj_client = self._get_obj_client(group_version=group_version, kind=k)
+        if not overwrite:
+            # same as oc label: refuse to change the value of an existing label
+            current = self.get(namespace, kind, name)["metadata"].get("labels") or {}
+            for key, value in labels.items():
+                if value is not None and current.get(key, value) != value:
+                    raise StatusCodeError(
+                        f"[{self.server}]: '{key}' already has a value "
+                        f"({current[key]}), and overwrite is false"
+                    )
+        # a null value removes the label in a JSON merge patch
+        self._write(
+            obj_client.patch,
+            body={"metadata": {"labels": labels}},
+            name=name,
+            namespace=namespace,
+            content_type="application/merge-patch+json",
+        )
+        resource = OR({"kind": kind, "metadata": {"name": name}}, "", "")
+        return self._msg_to_process_reconcile_time(namespace, resource)
+
+    @OCDecorators.process_reconcile_time
+    def _new_project(self, namespace):
+        if self.is_kind_supported("Project"):
+            # projects can't be created directly, oc new-project
+            # does the same by creating a ProjectRequest
+            obj_client = self._get_obj_client(
+                kind="ProjectRequest", group_version="project.openshift.io/v1"
+            )
+            body = {
+                "apiVersion": "project.openshift.io/v1",
+                "kind": "ProjectRequest",
+                "metadata": {"name": namespace},
+            }
+        else:
+            obj_client = self._get_obj_client(kind="Namespace", group_version="v1")
+            body = {
+                "apiVersion": "v1",
+                "kind": "Namespace",
+                "metadata": {"name": namespace},
+            }
+        try:
+            self._write(obj_client.create, body=body)
+        except StatusCodeError as e:
+            if "AlreadyExists" not in str(e):
+                raise e
+        self._update_projects_index(namespace, exists=True)
+
+        # This return will be removed by the last decorator
+        resource = OR({"kind": "Namespace", "metadata": {"name": namespace}}, "", "")
+        return self._msg_to_process_reconcile_time(namespace, resource)
+
+    def _take_over_client_side_apply(self, obj_client, namespace, name):
+        try:
+            obj = self._request(
+                obj_client.get,
+                name=name,
+                namespace=namespace,
+                header_params={"Accept": PARTIAL_OBJECT_METADATA_ACCEPT},
+            )
+        except NotFoundError:
+            return
+        metadata = obj.to_dict().get("metadata") or {}
+        managed_fields = take_over_client_side_apply(
+            metadata.get("managedFields") or []
+        )
+        if managed_fields is None:
+            return
+        patch = [
+            {
+                "op": "test",
+                "path": "/metadata/resourceVersion",
+                "value": metadata.get("resourceVersion"),
+            },
+            {
+                "op": "replace",
+                "path": "/metadata/managedFields",
+                "value": managed_fields,
+            },
+        ]
+        try:
+            self._request(
+                obj_client.patch,
+                body=patch,
+                name=name,
+                namespace=namespace,
+                content_type="application/json-patch+json",
+            )
+        except DynamicApiError as e:
+            # e.g. the object changed in between. The apply still works,
+            # the ownership is taken over on the next run.
+            logging.warning(
+                f"[{self.server}/{namespace}] failed to take over the fields "
+                f"of {obj_client.kind} {name} from client-side apply: {e.status}"
+            )
+
+    def _write(self, func, **kwargs):
+        try:
+            return self._request(func, **kwargs)
+        except DynamicApiError as e:
+            raise self._api_error_to_exception(e) from None
+
+    @retry(
+        max_attempts=5,
+        exceptions=(
+            ServerTimeoutError,
+            InternalServerError,
+            ServiceUnavailableError,
+            TooManyRequestsError,
+        ),
+    )
+    def _request(self, func, **kwargs):
+        return func(_request_timeout=REQUEST_TIMEOUT, **kwargs)
+
+    def _api_error_to_exception(self, e: DynamicApiError) -> Exception:
+        """Map an API error to the exceptions raised by OCCli._run.
+
+        OCCli classifies errors by parsing the stderr of oc. Here the
+        structured Status returned by the API server is used instead.
+        """
+        try:
+            status = json.loads(e.body)
+        except (TypeError, ValueError):
+            status = {}
+        reason = status.get("reason") or ""
+        message = status.get("message") or str(e)
+        err = f"[{self.server}]: {reason}: {message}"
+        details = status.get("details") or {}
+
+        if e.status == 413:
+            return RequestEntityTooLargeError(err)
+        if e.status == 415:
+            return UnsupportedMediaTypeError(err)
+        if e.status == 409 and reason == "Conflict":
+            return ObjectHasBeenModifiedError(err)
+        for cause in details.get("causes") or []:
+            cause_reason = cause.get("reason")
+            cause_message = cause.get("message") or ""
+            if cause_reason == "FieldValueTooLong" and cause.get("field") == (
+                "metadata.annotations"
+            ):
+                return MetaDataAnnotationsTooLongApplyError(err)
+            if cause_reason == "FieldValueForbidden" and (
+                "updates to statefulset spec for fields other than" in cause_message
+            ):
+                return StatefulSetUpdateForbidden(err)
+            if cause_reason != "FieldValueInvalid":
+                continue
+            if "field is immutable" in cause_message:
+                if details.get("kind") == "Deployment":
+                    return DeploymentFieldIsImmutableError(err)
+                return FieldIsImmutableError(err)
+            if "may not change once set" in cause_message:
+                return MayNotChangeOnceSetError(err)
+            if "primary clusterIP can not be unset" in cause_message:
+                return PrimaryClusterIPCanNotBeUnsetError(err)
+        return StatusCodeError(err)
+
     @retry(max_attempts=5, exceptions=(ServerTimeoutError, ForbiddenError))
     def get(self, namespace, kind, name=None, allow_not_found=False):
         k, group_version = self._parse_kind(kind)
@@ -1380,6 +2039,63 @@ class OCNative(OCCli):
                 return {}
             raise StatusCodeError(f"[{self.server}]: {e}") from None
 
+    @retry(max_attempts=5, exceptions=(ServerTimeoutError, ForbiddenError))
+    def get_metadata(self, namespace, kind, name, allow_not_found=False):
+        k, group_version = self._parse_kind(kind)
+        obj_client = self._get_obj_client(group_version=group_version, kind=k)
+        try:
+            obj = obj_client.get(
+                name=name,
+                namespace=namespace,
+                header_params={"Accept": PARTIAL_OBJECT_METADATA_ACCEPT},
+                _request_timeout=REQUEST_TIMEOUT,
+            )
+        except NotFoundError as e:
+            if allow_not_found:
+                return {}
+            raise StatusCodeError(f"[{self.server}]: {e}") from None
+        return self._set_type_meta(obj.to_dict(), obj_client)
+
+    @retry(max_attempts=5, exceptions=(ServerTimeoutError))
+    def get_items_metadata(self, kind, **kwargs):
+        k, group_version = self._parse_kind(kind)
+        obj_client = self._get_obj_client(group_version=group_version, kind=k)
+
+        namespace = kwargs.get("namespace", "")
+        # for cluster scoped integrations
+        # currently only openshift-clusterrolebindings
+        if namespace and namespace != "cluster" and not self.project_exists(namespace):
+            return []
+
+        resource_names = kwargs.get("resource_names")
+        if resource_names:
+            items = [
+                self.get_metadata(namespace, kind, name, allow_not_found=True)
+                for name in resource_names
+            ]
+            return [item for item in items if item]
+
+        labels = ",".join(
+            f"{key}={value}" for key, value in (kwargs.get("labels") or {}).items()
+        )
+        items_list = obj_client.get(
+            namespace=namespace,
+            label_selector=labels,
+            header_params={"Accept": PARTIAL_OBJECT_METADATA_LIST_ACCEPT},
+            _request_timeout=REQUEST_TIMEOUT,
+        ).to_dict()
+        items = items_list.get("items")
+        if items is None:
+            raise Exception("Expecting items")
+        return [self._set_type_meta(item, obj_client) for item in items]
+
+    @staticmethod
+    def _set_type_meta(obj: dict[str, Any], obj_client) -> dict[str, Any]:
+        # partial object metadata is returned as kind PartialObjectMetadata
+        obj["apiVersion"] = obj_client.group_version
+        obj["kind"] = obj_client.kind
+        return obj
+
     def get_all(self, kind, all_namespaces=False):
         k, group_version = self._parse_kind(kind)
         obj_client = self._get_obj_client(group_version=group_version, kind=k)
@@ -1442,6 +2158,15 @@ class OC:
             cluster_name = connection_parameters.cluster_name
 
         if use_native:
+            use_native_writes_env = os.environ.get("USE_NATIVE_WRITES", "")
+            if len(use_native_writes_env) > 0:
+                native_writes = use_native_writes_env.lower() in {"true", "yes"}
+            else:
+                native_writes = get_feature_toggle_state(
+                    "openshift-resources-native-writes",
+                    context={"cluster_name": cluster_name},
+                    default=False,
+                )
             OC.client_status.labels(cluster_name=cluster_name, native_client=True).inc()
             return OCNative(
                 cluster_name=cluster_name,
@@ -1453,6 +2178,7 @@ class OC:
                 local=local,
                 insecure_skip_tls_verify=insecure_skip_tls_verify,
                 connection_parameters=connection_parameters,
+                native_writes=native_writes,
             )
 
         OC.client_status.labels(cluster_name=cluster_name, native_client=False).inc()
@@ -1563,7 +2289,7 @@ class OC_Map:
         key = f"{jh['hostname']}:{jh['remotePort']}"
         with self._lock:
             if key not in self.jh_ports:
-                port = JumpHostSSH.get_unique_random_port()
+                port = JumpHostSSH.get_tunnel_port(jh["hostname"], jh["remotePort"])
                 self.jh_ports[key] = port
             jh["localPort"] = self.jh_ports[key]
 
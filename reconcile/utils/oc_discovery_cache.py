@@ -0,0 +1,78 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import suppress
+from typing import Any
+
+DISCOVERY_CACHE_DIR_ENV = "OC_DISCOVERY_CACHE_DIR"
+DISCOVERY_CACHE_TTL_ENV = "OC_DISCOVERY_CACHE_TTL_SECONDS"
+DEFAULT_DISCOVERY_CACHE_TTL_SECONDS = 3600
+
+
+class DiscoveryCache:
+    """
+    On-disk cache for the API discovery data of clusters.
+
+    Entries are keyed by server URL and cluster version, so an upgraded
+    cluster never reads the discovery data of its previous version. Entries
+    older than the TTL are removed on access. Files are written atomically,
+    which allows integrations running in parallel to share the directory.
+    """
+
+    def __init__(
+        self, cache_dir: str, ttl_seconds: int = DEFAULT_DISCOVERY_CACHE_TTL_SECONDS
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> "DiscoveryCache | None":
+        """The cache is enabled by setting OC_DISCOVERY_CACHE_DIR."""
+        cache_dir = os.environ.get(DISCOVERY_CACHE_DIR_ENV)
+        if not cache_dir:
+            return None
+        ttl_seconds = int(
+            os.environ.get(
+                DISCOVERY_CACHE_TTL_ENV, str(DEFAULT_DISCOVERY_CACHE_TTL_SECONDS)
+            )
+        )
+        return cls(cache_dir, ttl_seconds)
+
+    def path(self, server: str | None, version: str, name: str) -> str:
+        """Path of the cache file. Expired files are removed."""
+        key = hashlib.sha256(f"{server}\n{version}".encode()).hexdigest()
+        path = os.path.join(self.cache_dir, f"{key}-{name}.json")
+        with suppress(OSError):
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                self._remove(path)
+        return path
+
+    def read(self, server: str | None, version: str, name: str) -> Any | None:
+        try:
+            with open(self.path(server, version, name), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write(self, server: str | None, version: str, name: str, data: Any) -> None:
+        path = self.path(server, version, name)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # failing to write the cache is not worth failing the run
+            logging.debug(f"unable to write discovery cache {path}: {e}")
+
+    def invalidate(self, server: str | None, version: str, name: str) -> None:
+        self._remove(self.path(server, version, name))
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        with suppress(FileNotFoundError):
+            os.remove(path)
@@ -68,7 +68,10 @@ class OCMap:
         key = f"{connection_parameters.jumphost_hostname}:{connection_parameters.jumphost_remote_port}"
         with self._lock:
             if key not in self._jh_ports:
-                port = JumpHostSSH.get_unique_random_port()
+                port = JumpHostSSH.get_tunnel_port(
+                    connection_parameters.jumphost_hostname or "",
+                    connection_parameters.jumphost_remote_port,
+                )
                 self._jh_ports[key] = port
             connection_parameters.jumphost_local_port = self._jh_ports[key]
 
@@ -0,0 +1,243 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import (
+    dataclass,
+    field,
+)
+from typing import (
+    Any,
+    Protocol,
+)
+
+from reconcile.utils.oc import (
+    OCClient,
+    OCNative,
+)
+
+CURRENT_STATE_CACHE_ENV = "OC_CURRENT_STATE_CACHE"
+CURRENT_STATE_CACHE_RESYNC_ENV = "OC_CURRENT_STATE_CACHE_RESYNC_SECONDS"
+DEFAULT_RESYNC_SECONDS = 3600
+# length of a single watch request, the watch is restarted after each
+WATCH_SECONDS = 300
+
+
+class TimeProtocol(Protocol):
+    def time(self) -> float: ...
+
+
+@dataclass
+class _CacheEntry:
+    oc: OCNative
+    # serialized items keyed by (namespace, name). Every reader decodes its
+    # own copy, which is several times faster than a deepcopy.
+    items: dict[tuple[str, str], bytes] = field(default_factory=dict)
+    resource_version: str = ""
+    synced_at: float = 0.0
+    # incremented by every list, a watch started before is stale
+    generation: int = 0
+    # set while the watch keeps the items up to date
+    watching: bool = False
+    # requested since the last end_run
+    requested: bool = True
+    # set once the entry was dropped, its watch ends after the current request
+    stopped: bool = False
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+def _item_key(item: dict[str, Any]) -> tuple[str, str]:
+    metadata = item["metadata"]
+    return metadata.get("namespace", ""), metadata["name"]
+
+
+def _serialize(item: dict[str, Any]) -> bytes:
+    return json.dumps(item, separators=(",", ":")).encode()
+
+
+class CurrentStateCache:
+    """
+    Keeps the objects listed from clusters in memory across the runs of a
+    long-running integration process (see run_integration).
+
+    The first request for a (server, credentials, kind, namespace) lists the
+    objects and starts a background thread watching for their changes from
+    the resourceVersion of the list, like an informer. Requests are served
+    from memory and don't wait for the watch. The objects are listed again
+    after resync_seconds, or if the watch fails (e.g. the resourceVersion is
+    too old, or the client of a finished run can't be used anymore). The
+    watch uses the client of the latest request.
+
+    end_run drops the objects that were not requested during a run, and
+    stops their watches, so clients of earlier runs aren't kept alive.
+
+    Watching requires the native client, so only OCNative clients are
+    served from the cache.
+    """
+
+    def __init__(
+        self,
+        resync_seconds: float = DEFAULT_RESYNC_SECONDS,
+        watch_seconds: int = WATCH_SECONDS,
+        time_module: TimeProtocol = time,
+    ) -> None:
+        self.resync_seconds = resync_seconds
+        self.watch_seconds = watch_seconds
+        self.time_module = time_module
+        self._entries: dict[tuple[str, str, str, str], _CacheEntry] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def get_items(
+        self, oc: OCNative, kind: str, namespace: str
+    ) -> list[dict[str, Any]]:
+        """Current objects of a kind in a namespace. An empty namespace
+        returns the objects of all namespaces."""
+        key = (oc.server or "", oc.identity, kind, namespace)
+        with self._lock:
+            entry = self._entries.setdefault(key, _CacheEntry(oc=oc))
+        with entry.lock:
+            entry.oc = oc
+            entry.requested = True
+            age = self.time_module.time() - entry.synced_at
+            if not entry.watching or age > self.resync_seconds:
+                self._sync(entry, kind, namespace)
+            items = list(entry.items.values())
+        # callers own the returned objects
+        return [json.loads(item) for item in items]
+
+    def end_run(self) -> None:
+        """Drops the objects that were not requested since the previous
+        end_run. Their watches stop after their current request."""
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                with entry.lock:
+                    if not entry.requested:
+                        entry.stopped = True
+                        del self._entries[key]
+                    entry.requested = False
+
+    def stop(self) -> None:
+        """Drops all objects and stops the watches after their current
+        request."""
+        self._stopped.set()
+        with self._lock:
+            for entry in self._entries.values():
+                with entry.lock:
+                    entry.stopped = True
+            self._entries.clear()
+
+    def _sync(self, entry: _CacheEntry, kind: str, namespace: str) -> None:
+        if namespace:
+            items, resource_version = entry.oc.list_items(kind, namespace=namespace)
+        else:
+            items, resource_version = entry.oc.list_items(kind)
+        entry.items = {_item_key(item): _serialize(item) for item in items}
+        entry.resource_version = resource_version
+        entry.synced_at = self.time_module.time()
+        entry.generation += 1
+        if not entry.watching:
+            entry.watching = True
+            threading.Thread(
+                target=self._watch,
+                args=(entry, kind, namespace),
+                name=f"watch-{kind}-{namespace or 'all'}",
+                daemon=True,
+            ).start()
+
+    def _watch(self, entry: _CacheEntry, kind: str, namespace: str) -> None:
+        while not self._stopped.is_set():
+            with entry.lock:
+                if entry.stopped:
+                    break
+                oc = entry.oc
+                generation = entry.generation
+                resource_version = entry.resource_version
+            try:
+                events = oc.watch_items(
+                    kind,
+                    timeout_seconds=self.watch_seconds,
+                    namespace=namespace or None,
+                    resource_version=resource_version,
+                )
+                try:
+                    for event_type, item in events:
+                        with entry.lock:
+                            if entry.generation != generation or entry.stopped:
+                                # listed again or dropped meanwhile
+                                break
+                            self._apply_event(entry, event_type, item)
+                finally:
+                    # ends the request, not only when the generator is collected
+                    events.close()
+            except Exception as e:
+                logging.info(
+                    f"[{oc.cluster_name}] stopped watching {kind} changes, "
+                    f"listing again on the next request: {e}"
+                )
+                with entry.lock:
+                    entry.watching = False
+                return
+        with entry.lock:
+            entry.watching = False
+
+    @staticmethod
+    def _apply_event(entry: _CacheEntry, event_type: str, item: dict[str, Any]) -> None:
+        if event_type == "DELETED":
+            entry.items.pop(_item_key(item), None)
+        elif event_type in {"ADDED", "MODIFIED"}:
+            entry.items[_item_key(item)] = _serialize(item)
+        entry.resource_version = item["metadata"].get(
+            "resourceVersion", entry.resource_version
+        )
+
+
+_current_state_cache: CurrentStateCache | None = None
+_current_state_cache_lock = threading.Lock()
+
+
+def get_current_state_cache() -> CurrentStateCache | None:
+    """The process wide cache, enabled by setting OC_CURRENT_STATE_CACHE
+    to true."""
+    global _current_state_cache  # noqa: PLW0603
+    if os.environ.get(CURRENT_STATE_CACHE_ENV, "false").lower() != "true":
+        return None
+    with _current_state_cache_lock:
+        if _current_state_cache is None:
+            _current_state_cache = CurrentStateCache(
+                resync_seconds=float(
+                    os.environ.get(
+                        CURRENT_STATE_CACHE_RESYNC_ENV, str(DEFAULT_RESYNC_SECONDS)
+                    )
+                )
+            )
+        return _current_state_cache
+
+
+def end_current_state_cache_run() -> None:
+    """CurrentStateCache.end_run of the process wide cache, if there is one."""
+    with _current_state_cache_lock:
+        cache = _current_state_cache
+    if cache is not None:
+        cache.end_run()
+
+
+def cached_items(
+    oc: OCClient,
+    kind: str,
+    namespace: str,
+    resource_names: Iterable[str] | None = None,
+) -> list[dict[str, Any]] | None:
+    """
+    Objects of a kind in a namespace from the current state cache, or None
+    if they can't be served from it and have to be fetched from the cluster.
+    An empty namespace stands for all namespaces.
+    """
+    cache = get_current_state_cache()
+    if cache is None or resource_names or not isinstance(oc, OCNative):
+        return None
+    if namespace not in {"", "cluster"} and not oc.project_exists(namespace):
+        return []
+    return cache.get_items(oc, kind, namespace)
@@ -4,8 +4,12 @@ import contextlib
 import copy
 import datetime
 import hashlib
+import itertools
 import json
+import os
 import re
+import sys
+import zlib
 from collections.abc import Mapping
 from threading import Lock
 
@@ -13,6 +17,12 @@ import semver
 from pydantic import BaseModel
 
 from reconcile.external_resources.meta import SECRET_UPDATED_AT
+from reconcile.utils import canonical_json
+from reconcile.utils.body_store import (
+    MemoryBodyStore,
+    SpilledBody,
+    SqliteBodyStore,
+)
 from reconcile.utils.metrics import GaugeMetric
 
 SECRET_MAX_KEY_LENGTH = 253
@@ -61,6 +71,13 @@ QONTRACT_ANNOTATION_SHA256SUM = "qontract.sha256sum"
 QONTRACT_ANNOTATION_UPDATE = "qontract.update"
 QONTRACT_ANNOTATION_CALLER_NAME = "qontract.caller_name"
 
+# keep the bodies of the resources in a ResourceInventory compressed
+COMPACT_INVENTORY_ENV = "RESOURCE_INVENTORY_COMPACT"
+# keep the compressed bodies on disk, in a temporary file in this directory
+SPILL_INVENTORY_DIR_ENV = "RESOURCE_INVENTORY_SPILL_DIR"
+# number of locks guarding the (cluster, namespace) entries of a ResourceInventory
+INVENTORY_LOCK_STRIPES = 64
+
 QONTRACT_ANNOTATIONS = {
     QONTRACT_ANNOTATION_INTEGRATION,
     QONTRACT_ANNOTATION_INTEGRATION_VERSION,
@@ -72,6 +89,17 @@ QONTRACT_ANNOTATIONS = {
 
 # pylint: disable=R0904
 class OpenshiftResource:
+    __slots__ = (
+        "_body",
+        "_body_blob",
+        "_canonical_body",
+        "_sha256sum",
+        "caller_name",
+        "error_details",
+        "integration",
+        "integration_version",
+    )
+
     def __init__(
         self,
         body,
@@ -89,79 +117,181 @@ class OpenshiftResource:
         if validate_k8s_object:
             self.verify_valid_k8s_object()
 
+    @property
+    def body(self):
+        # read once, compact() may drop the loaded body meanwhile
+        body = self._body
+        if body is None and (blob := self._body_blob) is not None:
+            # the compressed copy is kept, compact() drops the loaded body
+            # again once it isn't needed anymore
+            if isinstance(blob, SpilledBody):
+                blob = blob.load()
+            body = self._body = json.loads(zlib.decompress(blob))
+        return body
+
+    @body.setter
+    def body(self, body):
+        self._body = body
+        self._body_blob = None
+        self.invalidate_cache()
+
+    def compact(self, store: MemoryBodyStore | SqliteBodyStore | None = None) -> None:
+        """
+        Replaces the body by a compressed copy, which is loaded again on the
+        next access of body. Resources with identical bodies share the copy
+        if they are compacted with the same store. With a SqliteBodyStore,
+        the copy is kept on disk. The memoized sha256sum is kept, the
+        canonical body is computed again if needed.
+
+        Compacting a resource whose body was loaded only drops the loaded
+        body, the compressed copy is still up to date unless the body was
+        replaced or invalidate_cache() was called.
+        """
+        self._canonical_body = None
+        if self._body_blob is not None:
+            self._body = None
+            return
+        try:
+            blob = zlib.compress(self.serialize(self._body).encode())
+        except TypeError:
+            # not JSON serializable, keep the body as it is
+            return
+        self._body_blob = store.put(blob) if store is not None else blob
+        self._body = None
+
+    def size_bytes(self) -> int | None:
+        """Size of the compressed copy of the body, None if the resource
+        isn't compacted."""
+        if isinstance(self._body_blob, SpilledBody):
+            return self._body_blob.size
+        if self._body_blob is not None:
+            return len(self._body_blob)
+        return None
+
+    def invalidate_cache(self):
+        """
+        Drops the memoized canonical body and sha256sum, and the compressed
+        copy of the body. They are dropped when body is replaced, but changes
+        made to body in place must call this before the next sha256sum() or
+        compact().
+        """
+        # loads the body if needed, before its compressed copy is dropped
+        self._body = self.body
+        self._body_blob = None
+        self._canonical_body = None
+        self._sha256sum = None
+
     def __eq__(self, other):
         return self.obj_intersect_equal(self.body, other.body)
 
     def obj_intersect_equal(self, obj1, obj2, depth=0):
+        return self.obj_intersect_difference(obj1, obj2, depth) is None
+
+    def obj_intersect_difference(self, obj1, obj2, depth=0):
+        """
+        Compares the fields set in obj1 (desired) with obj2 (current) like
+        obj_intersect_equal and returns the path of the first field that
+        differs, e.g. "spec.template.spec.containers[0].image", or None if
+        they are equal. The root is reported as ".".
+
+        Children of the root which serialize to the same canonical JSON are
+        not walked.
+        """
         # obj1 == d_item
         # obj2 == c_item
-        if obj1.__class__ != obj2.__class__:
-            return False
+        stack = [(obj1, obj2, depth, "")]
+        while stack:
+            obj1, obj2, depth, path = stack.pop()
+            if obj1.__class__ != obj2.__class__:
+                return path or "."
+
+            if depth == 1 and self._canonically_identical(obj1, obj2):
+                continue
+
+            # children are pushed in reverse to compare them in order
+            children = []
+            if isinstance(obj1, dict):
+                for obj1_k, obj1_v in obj1.items():
+                    obj2_v = obj2.get(obj1_k, None)
+                    child_path = f"{path}.{obj1_k}" if path else obj1_k
+                    if obj2_v is None:
+                        if obj1_v:
+                            return child_path
+                    if self.ignorable_field(obj1_k):
+                        pass
+                    elif self.ignorable_key_value_pair(obj1_k, obj1_v):
+                        pass
+                    elif depth == 0 and obj1_k == "status":
+                        pass
+                    elif obj1_k == "labels":
+                        diff = [
+                            k
+                            for k in obj2_v
+                            if k not in obj1_v
+                            and not OpenshiftResource.is_controller_managed_label(
+                                self.kind, k
+                            )
+                        ]
+                        if diff:
+                            return f"{child_path}.{diff[0]}"
+                        children.append((obj1_v, obj2_v, depth + 1, child_path))
+                    elif obj1_k in {"data", "matchLabels"}:
+                        diff = [
+                            k
+                            for k in obj2_v
+                            if k not in obj1_v and k not in IGNORABLE_DATA_FIELDS
+                        ]
+                        if diff:
+                            return f"{child_path}.{diff[0]}"
+                        children.append((obj1_v, obj2_v, depth + 1, child_path))
+                    elif obj1_k == "env":
+                        for v in obj2_v or []:
+                            if "name" in v and len(v) == 1:
+                                v["value"] = ""
+                        children.append((obj1_v, obj2_v, depth + 1, child_path))
+                    elif obj1_k == "cpu":
+                        if not self.cpu_equal(obj1_v, obj2_v):
+                            return child_path
+                    elif obj1_k == "apiVersion":
+                        if not self.api_version_mutation(obj1_v, obj2_v):
+                            return child_path
+                    elif obj1_k == "imagePullSecrets":
+                        # remove default pull secrets added by k8s
+                        obj2_v_clean = [
+                            s for s in obj2_v if "-dockercfg-" not in s["name"]
+                        ]
+                        children.append((obj1_v, obj2_v_clean, depth + 1, child_path))
+                    else:
+                        children.append((obj1_v, obj2_v, depth + 1, child_path))
+
+            elif isinstance(obj1, list):
+                if len(obj1) != len(obj2):
+                    return path or "."
+                children = [
+                    (item, obj2[index], depth + 1, f"{path}[{index}]")
+                    for index, item in enumerate(obj1)
+                ]
 
-        if isinstance(obj1, dict):
-            for obj1_k, obj1_v in obj1.items():
-                obj2_v = obj2.get(obj1_k, None)
-                if obj2_v is None:
-                    if obj1_v:
-                        return False
-                if self.ignorable_field(obj1_k):
-                    pass
-                elif self.ignorable_key_value_pair(obj1_k, obj1_v):
-                    pass
-                elif depth == 0 and obj1_k == "status":
-                    pass
-                elif obj1_k == "labels":
-                    diff = [
-                        k
-                        for k in obj2_v
-                        if k not in obj1_v
-                        and not OpenshiftResource.is_controller_managed_label(
-                            self.kind, k
-                        )
-                    ]
-                    if diff or not self.obj_intersect_equal(obj1_v, obj2_v, depth + 1):
-                        return False
-                elif obj1_k in {"data", "matchLabels"}:
-                    diff = [
-                        k
-                        for k in obj2_v
-                        if k not in obj1_v and k not in IGNORABLE_DATA_FIELDS
-                    ]
-                    if diff or not self.obj_intersect_equal(obj1_v, obj2_v, depth + 1):
-                        return False
-                elif obj1_k == "env":
-                    for v in obj2_v or []:
-                        if "name" in v and len(v) == 1:
-                            v["value"] = ""
-                    if not self.obj_intersect_equal(obj1_v, obj2_v, depth + 1):
-                        return False
-                elif obj1_k == "cpu":
-                    equal = self.cpu_equal(obj1_v, obj2_v)
-                    if not equal:
-                        return False
-                elif obj1_k == "apiVersion":
-                    valid = self.api_version_mutation(obj1_v, obj2_v)
-                    if not valid:
-                        return False
-                elif obj1_k == "imagePullSecrets":
-                    # remove default pull secrets added by k8s
-                    obj2_v_clean = [s for s in obj2_v if "-dockercfg-" not in s["name"]]
-                    if not self.obj_intersect_equal(obj1_v, obj2_v_clean, depth + 1):
-                        return False
-                elif not self.obj_intersect_equal(obj1_v, obj2_v, depth + 1):
-                    return False
-
-        elif isinstance(obj1, list):
-            if len(obj1) != len(obj2):
-                return False
-            for index, item in enumerate(obj1):
-                if not self.obj_intersect_equal(item, obj2[index], depth + 1):
-                    return False
-
-        elif obj1 != obj2:
-            return False
+            elif obj1 != obj2:
+                return path or "."
 
-        return True
+            stack.extend(reversed(children))
+
+        return None
+
+    @staticmethod
+    def _canonically_identical(obj1, obj2):
+        if not isinstance(obj1, dict | list):
+            return False
+        try:
+            serialized = canonical_json.dumps(obj1)
+            # default pull secrets are removed from current before comparing
+            return "-dockercfg-" not in serialized and serialized == (
+                canonical_json.dumps(obj2)
+            )
+        except (TypeError, ValueError, RecursionError):
+            # not JSON serializable, compare field by field
+            return False
 
     @staticmethod
     def ignorable_field(val):
@@ -344,9 +474,10 @@ class OpenshiftResource:
             openshift_resource: new OpenshiftResource object with
                 annotations.
         """
-        body = self.canonicalize(self.body) if canonicalize else self.body
-
-        sha256sum = self.calculate_sha256sum(self.serialize(body))
+        if canonicalize:
+            sha256sum = self.sha256sum()
+        else:
+            sha256sum = self.calculate_sha256sum(self.serialize(self.body))
 
         # create new body object
         body = copy.deepcopy(self.body)
@@ -367,13 +498,28 @@ class OpenshiftResource:
         if self.caller_name:
             annotations[QONTRACT_ANNOTATION_CALLER_NAME] = self.caller_name
 
-        return OpenshiftResource(body, self.integration, self.integration_version)
+        annotated = OpenshiftResource(body, self.integration, self.integration_version)
+        if canonicalize:
+            # the qontract annotations are not part of the canonical body
+            annotated._canonical_body = self._canonical_body
+            annotated._sha256sum = sha256sum
+        return annotated
 
-    def sha256sum(self):
-        body = self.annotate().body
+    def canonical_body(self):
+        """
+        The canonicalized body, computed once per body. The returned dict is
+        shared by later calls and must not be modified.
+        """
+        if self._canonical_body is None:
+            self._canonical_body = self.canonicalize(self.body)
+        return self._canonical_body
 
-        annotations = body["metadata"]["annotations"]
-        return annotations["qontract.sha256sum"]
+    def sha256sum(self):
+        if self._sha256sum is None:
+            self._sha256sum = self.calculate_sha256sum(
+                self.serialize(self.canonical_body())
+            )
+        return self._sha256sum
 
     def toJSON(self):
         return self.serialize(self.body)
@@ -521,7 +667,7 @@ class OpenshiftResource:
 
     @staticmethod
     def serialize(body):
-        return json.dumps(body, sort_keys=True)
+        return canonical_json.dumps(body)
 
     @staticmethod
     def calculate_sha256sum(body):
@@ -556,12 +702,69 @@ class OpenshiftResourceInventoryGauge(OpenshiftResourceBaseMetric, GaugeMetric):
         return "qontract_reconcile_openshift_resource_inventory"
 
 
+class OpenshiftResourceInventoryBytesGauge(OpenshiftResourceBaseMetric, GaugeMetric):
+    "Approximate size of the resource bodies held in the inventory"
+
+    cluster: str
+    state: str
+
+    @classmethod
+    def name(cls) -> str:
+        return "qontract_reconcile_openshift_resource_inventory_bytes"
+
+
+class ResourceTypeEntry:
+    """
+    current and desired resources of a kind in a namespace of a cluster,
+    by name. Items can be read like a dict, e.g. entry["desired"].
+    """
+
+    __slots__ = ("current", "desired", "managed_names", "use_admin_token")
+
+    def __init__(self, managed_names: list[str] | None = None):
+        self.current: dict[str, OpenshiftResource] = {}
+        self.desired: dict[str, OpenshiftResource] = {}
+        self.use_admin_token: dict[str, bool] = {}
+        self.managed_names = managed_names
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+
 class ResourceInventory:
-    def __init__(self):
-        self._clusters = {}
+    """
+    current and desired resources by cluster, namespace, kind and name.
+
+    Cluster, namespace, kind and resource names are interned, as they repeat
+    across many entries. With compact (or RESOURCE_INVENTORY_COMPACT=true),
+    the bodies of added resources are kept compressed until they are
+    accessed, identical bodies share a single copy and only the sha256sum of
+    desired resources is kept ready for comparisons. With spill_dir (or
+    RESOURCE_INVENTORY_SPILL_DIR), the compressed bodies are kept in a
+    sqlite database in that directory instead of in memory; names, hashes
+    and metadata other than the body stay in memory.
+
+    Adding resources locks only the stripe of the (cluster, namespace), so
+    threads populating different namespaces don't wait for each other.
+    Compacting happens outside of the locks, the body stores have their own.
+    """
+
+    def __init__(self, compact: bool | None = None, spill_dir: str | None = None):
+        self._clusters: dict[str, dict[str, dict[str, ResourceTypeEntry]]] = {}
         self._error_registered = False
-        self._error_registered_clusters = {}
-        self._lock = Lock()
+        self._error_registered_clusters: dict[str, bool] = {}
+        self._locks = [Lock() for _ in range(INVENTORY_LOCK_STRIPES)]
+        if compact is None:
+            compact = os.environ.get(COMPACT_INVENTORY_ENV, "false").lower() == "true"
+        if spill_dir is None:
+            spill_dir = os.environ.get(SPILL_INVENTORY_DIR_ENV) or None
+        self.compact = compact or spill_dir is not None
+        self.spill_dir = spill_dir
+        self._store: MemoryBodyStore | SqliteBodyStore = (
+            SqliteBodyStore(spill_dir) if spill_dir is not None else MemoryBodyStore()
+        )
 
     def initialize_resource_type(
         self,
@@ -570,18 +773,18 @@ class ResourceInventory:
         resource_type,
         managed_names: list[str] | None = None,
     ):
+        cluster = sys.intern(cluster)
+        namespace = sys.intern(namespace)
+        resource_type = sys.intern(resource_type)
         self._clusters.setdefault(cluster, {})
         self._clusters[cluster].setdefault(namespace, {})
         self._clusters[cluster][namespace].setdefault(
-            resource_type,
-            {
-                "current": {},
-                "desired": {},
-                "use_admin_token": {},
-                "managed_names": managed_names,
-            },
+            resource_type, ResourceTypeEntry(managed_names)
         )
 
+    def _lock_for(self, cluster: str, namespace: str) -> Lock:
+        return self._locks[hash((cluster, namespace)) % INVENTORY_LOCK_STRIPES]
+
     def is_cluster_present(self, cluster: str) -> bool:
         return cluster in self._clusters
 
@@ -614,45 +817,83 @@ class ResourceInventory:
         # state-specs that lead up to add_desired calls. while this is a
         # mismatch between schema and implementation for now, it will enable
         # us to implement per-resource configuration in the future
-        with self._lock:
+        with self._lock_for(cluster, namespace):
+            entry = self._clusters[cluster][namespace][resource_type]
             # fail if the name of the resource is not within the managed names if they are defined
-            managed_names = self._clusters[cluster][namespace][resource_type][
-                "managed_names"
-            ]
-            if managed_names is not None and name not in managed_names:
+            if entry.managed_names is not None and name not in entry.managed_names:
                 raise ResourceNotManagedError(name)
 
-            desired = self._clusters[cluster][namespace][resource_type]["desired"]
-            if name in desired:
+            if name in entry.desired:
                 raise ResourceKeyExistsError(name)
-            desired[name] = value
-            admin_token_usage = self._clusters[cluster][namespace][resource_type][
-                "use_admin_token"
-            ]
-            admin_token_usage[name] = privileged
+            name = sys.intern(name)
+            entry.desired[name] = value
+            entry.use_admin_token[name] = privileged
+        if self.compact and isinstance(value, OpenshiftResource):
+            # compared by sha256sum in the 3-way diff
+            with contextlib.suppress(KeyError, TypeError):
+                value.sha256sum()
+            value.compact(self._store)
 
     def get_desired(self, cluster, namespace, resource_type, name):
         try:
-            return self._clusters[cluster][namespace][resource_type]["desired"][name]
+            return self._clusters[cluster][namespace][resource_type].desired[name]
         except KeyError:
             return None
 
     def get_desired_by_type(self, cluster, namespace, resource_type):
         try:
-            return self._clusters[cluster][namespace][resource_type]["desired"]
+            return self._clusters[cluster][namespace][resource_type].desired
         except KeyError:
             return None
 
     def get_current(self, cluster, namespace, resource_type, name):
         try:
-            return self._clusters[cluster][namespace][resource_type]["current"][name]
+            return self._clusters[cluster][namespace][resource_type].current[name]
         except KeyError:
             return None
 
     def add_current(self, cluster, namespace, resource_type, name, value):
-        with self._lock:
-            current = self._clusters[cluster][namespace][resource_type]["current"]
-            current[name] = value
+        with self._lock_for(cluster, namespace):
+            current = self._clusters[cluster][namespace][resource_type].current
+            current[sys.intern(name)] = value
+        if self.compact and isinstance(value, OpenshiftResource):
+            value.compact(self._store)
+
+    def compact_resource_type(
+        self, cluster: str, namespace: str, resource_type: str
+    ) -> None:
+        """
+        Compacts the resources of a resource type again once their bodies,
+        loaded e.g. to compare them, aren't needed anymore. Only the
+        compressed copies stay in memory, or on disk with spill_dir.
+        """
+        if not self.compact:
+            return
+        with self._lock_for(cluster, namespace):
+            entry = self._clusters[cluster][namespace][resource_type]
+            resources = list(
+                itertools.chain(entry.current.values(), entry.desired.values())
+            )
+        for resource in resources:
+            if isinstance(resource, OpenshiftResource):
+                resource.compact(self._store)
+
+    def size_bytes(self, cluster: str, state: str) -> int | None:
+        """
+        Size of the compressed bodies of the current or desired resources of
+        a cluster, None unless compact. Bodies that can't be compacted are
+        not counted.
+        """
+        if not self.compact:
+            return None
+        return sum(
+            size
+            for namespace in self._clusters.get(cluster, {}).values()
+            for entry in namespace.values()
+            for resource in entry[state].values()
+            if isinstance(resource, OpenshiftResource)
+            and (size := resource.size_bytes()) is not None
+        )
 
     def __iter__(self):
         for cluster_name, cluster in self._clusters.items():
@@ -148,7 +148,10 @@ from reconcile.gql_definitions.fragments.aws_vpc_request import (
 from reconcile.gql_definitions.terraform_resources.terraform_resources_namespaces import (
     NamespaceTerraformResourceLifecycleV1,
 )
-from reconcile.utils import gql
+from reconcile.utils import (
+    canonical_json,
+    gql,
+)
 from reconcile.utils.aws_api import (
     AmiTag,
     AWSApi,
@@ -1853,7 +1856,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
             em_identifier = f"{identifier}-enhanced-monitoring"
             em_values = {
                 "name": em_identifier,
-                "assume_role_policy": json.dumps(assume_role_policy, sort_keys=True),
+                "assume_role_policy": canonical_json.dumps(assume_role_policy),
             }
             role_tf_resource = aws_iam_role(em_identifier, **em_values)
             tf_resources.append(role_tf_resource)
@@ -2253,7 +2256,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
                         }
                     ],
                 }
-                rc_values["assume_role_policy"] = json.dumps(role, sort_keys=True)
+                rc_values["assume_role_policy"] = canonical_json.dumps(role)
                 role_resource = aws_iam_role(id, **rc_values)
                 tf_resources.append(role_resource)
 
@@ -2291,7 +2294,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
                         },
                     ],
                 }
-                rc_values["policy"] = json.dumps(policy, sort_keys=True)
+                rc_values["policy"] = canonical_json.dumps(policy)
                 policy_resource = aws_iam_policy(id, **rc_values)
                 tf_resources.append(policy_resource)
 
@@ -2504,7 +2507,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
                 },
             ],
         }
-        values["policy"] = json.dumps(policy, sort_keys=True)
+        values["policy"] = canonical_json.dumps(policy)
         values["depends_on"] = self.get_dependencies([user_tf_resource])
 
         tf_aws_iam_policy = aws_iam_policy(identifier, **values)
@@ -2913,7 +2916,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
                 all_queues.append(queue_name)
                 sqs_policy = values.pop("sqs_policy", None)
                 if sqs_policy is not None:
-                    values["policy"] = json.dumps(sqs_policy, sort_keys=True)
+                    values["policy"] = canonical_json.dumps(sqs_policy)
                 dl_queue = values.pop("dl_queue", None)
                 if dl_queue is not None:
                     max_receive_count = int(values.pop("max_receive_count", 10))
@@ -3000,7 +3003,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
                     "Resource": list(kms_keys),
                 }
                 policy["Statement"].append(kms_statement)
-            values["policy"] = json.dumps(policy, sort_keys=True)
+            values["policy"] = canonical_json.dumps(policy)
             policy_tf_resource = aws_iam_policy(policy_identifier, **values)
             tf_resources.append(policy_tf_resource)
 
@@ -3140,7 +3143,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
                 }
             ],
         }
-        values["policy"] = json.dumps(policy, sort_keys=True)
+        values["policy"] = canonical_json.dumps(policy)
         values["depends_on"] = self.get_dependencies([user_tf_resource])
 
         tf_aws_iam_policy = aws_iam_policy(identifier, **values)
@@ -3249,7 +3252,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
                 },
             ],
         }
-        values["policy"] = json.dumps(policy, sort_keys=True)
+        values["policy"] = canonical_json.dumps(policy)
         values["depends_on"] = self.get_dependencies([user_tf_resource])
 
         tf_aws_iam_policy = aws_iam_policy(identifier, **values)
@@ -3301,7 +3304,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
                 }
             ],
         }
-        values["policy"] = json.dumps(policy, sort_keys=True)
+        values["policy"] = canonical_json.dumps(policy)
         values["depends_on"] = self.get_dependencies([bucket_tf_resource])
         region = common_values.get("region") or self.default_regions.get(account)
         if self._multiregion_account(account):
@@ -3441,7 +3444,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
                 }
             ],
         }
-        sqs_values["policy"] = json.dumps(sqs_policy, sort_keys=True)
+        sqs_values["policy"] = canonical_json.dumps(sqs_policy)
 
         kms_encryption = common_values.get("kms_encryption", False)
         if kms_encryption:
@@ -3477,7 +3480,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
                     },
                 ],
             }
-            kms_values["policy"] = json.dumps(kms_policy, sort_keys=True)
+            kms_values["policy"] = canonical_json.dumps(kms_policy)
             if provider:
                 kms_values["provider"] = provider
 
@@ -3576,7 +3579,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
                 "Resource": [sqs_values["kms_master_key_id"]],
             }
             policy["Statement"].append(kms_statement)
-        values["policy"] = json.dumps(policy, sort_keys=True)
+        values["policy"] = canonical_json.dumps(policy)
         policy_tf_resource = aws_iam_policy(sqs_identifier, **values)
         tf_resources.append(policy_tf_resource)
 
@@ -3645,7 +3648,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
             role_identifier = f"{identifier}-lambda-execution-role"
             role_values = {
                 "name": role_identifier,
-                "assume_role_policy": json.dumps(assume_role_policy, sort_keys=True),
+                "assume_role_policy": canonical_json.dumps(assume_role_policy),
             }
 
             role_tf_resource = aws_iam_role(role_identifier, **role_values)
@@ -3677,7 +3680,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
 
             policy_values = {
                 "role": "${" + role_tf_resource.id + "}",
-                "policy": json.dumps(policy, sort_keys=True),
+                "policy": canonical_json.dumps(policy),
             }
             policy_tf_resource = aws_iam_role_policy(policy_identifier, **policy_values)
             tf_resources.append(policy_tf_resource)
@@ -3808,7 +3811,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
         }
         values = {
             "name": identifier,
-            "policy": json.dumps(policy, sort_keys=True),
+            "policy": canonical_json.dumps(policy),
             "depends_on": self.get_dependencies([user_tf_resource]),
         }
 
@@ -3925,7 +3928,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
             role_identifier = f"{identifier}-lambda-execution-role"
             role_values = {
                 "name": role_identifier,
-                "assume_role_policy": json.dumps(assume_role_policy, sort_keys=True),
+                "assume_role_policy": canonical_json.dumps(assume_role_policy),
                 "tags": tags,
             }
 
@@ -3962,7 +3965,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
             policy_tf_resource = aws_iam_policy(
                 policy_identifier,
                 name=policy_identifier,
-                policy=json.dumps(policy, sort_keys=True),
+                policy=canonical_json.dumps(policy),
                 tags=tags,
             )
             tf_resources.append(policy_tf_resource)
@@ -4172,7 +4175,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
         # iam user policy
         values = {}
         values["name"] = identifier
-        values["policy"] = json.dumps(policy, sort_keys=True)
+        values["policy"] = canonical_json.dumps(policy)
         values["depends_on"] = self.get_dependencies([user_tf_resource])
 
         tf_aws_iam_policy = aws_iam_policy(identifier, **values)
@@ -4539,7 +4542,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
         }
         log_groups_policy_values = {
             "policy_name": "es-log-publishing-permissions",
-            "policy_document": json.dumps(log_groups_policy, sort_keys=True),
+            "policy_document": canonical_json.dumps(log_groups_policy),
         }
         resource_policy = aws_cloudwatch_log_resource_policy(
             "es_log_publishing_resource_policy",
@@ -4867,7 +4870,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
                 }
             ],
         }
-        es_values["access_policies"] = json.dumps(access_policies, sort_keys=True)
+        es_values["access_policies"] = canonical_json.dumps(access_policies)
 
         region = values.get("region") or self.default_regions.get(account)
         provider = ""
@@ -4969,7 +4972,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
             iam_policy_resource = aws_iam_policy(
                 secret_identifier,
                 name=f"{identifier}-secretsmanager-policy",
-                policy=json.dumps(policy, sort_keys=True),
+                policy=canonical_json.dumps(policy),
                 tags=tags,
             )
             tf_resources.append(iam_policy_resource)
@@ -5326,7 +5329,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
             lb_access_logs_s3_bucket_policy_values = {
                 "provider": provider,
                 "bucket": f"${{{lb_access_logs_s3_bucket_tf_resource.id}}}",
-                "policy": json.dumps(policy, sort_keys=True),
+                "policy": canonical_json.dumps(policy),
             }
             lb_access_logs_s3_bucket_policy_tf_resource = aws_s3_bucket_policy(
                 policy_identifier, **lb_access_logs_s3_bucket_policy_values
@@ -6623,7 +6626,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
                 },
             ],
         }
-        cloudwatch_assume_role_policy = json.dumps(policy, sort_keys=True)
+        cloudwatch_assume_role_policy = canonical_json.dumps(policy)
 
         cloudwatch_iam_role_resource = aws_iam_role(
             "cloudwatch_assume_role",
@@ -6651,7 +6654,7 @@ class TerrascriptClient:  # pylint: disable=too-many-public-methods
             ],
         }
 
-        cloudwatch_iam_policy_document = json.dumps(policy, sort_keys=True)
+        cloudwatch_iam_policy_document = canonical_json.dumps(policy)
 
         cloudwatch_iam_policy_resource = aws_iam_policy(
             "cloudwatch",
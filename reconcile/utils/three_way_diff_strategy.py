@@ -77,7 +77,7 @@ EMPTY_ENV_VALUE = re.compile(r"/.*/env/[0-9]+/value$")
 
 def is_cpu_mutation(current: OR, desired: OR, patch: Mapping[str, Any]) -> bool:
     pointer = patch["path"]
-    if re.match(CPU_REGEX, pointer):
+    if CPU_REGEX.match(pointer):
         current_value = resolve_pointer(current.body, pointer)
         desired_value = patch["value"]
         return OR.cpu_equal(current_value, desired_value)
@@ -96,9 +96,7 @@ def is_empty_env_value(current: OR, desired: OR, patch: Mapping[str, Any]) -> bo
     """
     pointer = patch["path"]
     return bool(
-        patch["op"] == "add"
-        and not patch["value"]
-        and re.match(EMPTY_ENV_VALUE, pointer)
+        patch["op"] == "add" and not patch["value"] and EMPTY_ENV_VALUE.match(pointer)
     )
 
 
@@ -146,6 +144,10 @@ def three_way_diff_using_hash(c_item: OR, d_item: OR) -> bool:
     current = normalize_object(c_item)
     desired = normalize_object(d_item)
 
+    # no patch needed if nothing was changed or added to the current object
+    if current.body == desired.body:
+        return True
+
     patch = jsonpatch.JsonPatch.from_diff(current.body, desired.body)
     valid_changes = [
         item for item in patch.patch if is_valid_change(current, desired, item)
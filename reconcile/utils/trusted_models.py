@@ -0,0 +1,204 @@
+"""
+Builds the data classes generated in reconcile.gql_definitions from query
+results without validating them, for integrations that trust qontract-server
+to return data matching the schema.
+
+Validating large results, e.g. all namespaces, takes seconds. Instead,
+construct only checks that the data has the shape of the data classes:
+dicts with exactly the keys of a class, lists, Json strings and JSON values
+of the annotated types. Values that don't fit, like a number in a str field,
+are left to pydantic, which validates the class containing them as usual.
+The first member of a Union that the value fits is used, as with
+validation.
+
+GQL_TRUSTED_MODELS_INTEGRATIONS is a comma separated list of the
+integrations that use it, or "all".
+"""
+
+import functools
+import json
+import os
+from collections.abc import Callable
+from typing import (
+    Any,
+    TypeVar,
+    get_type_hints,
+)
+
+from pydantic import (
+    BaseModel,
+    ValidationError,
+)
+from pydantic.fields import (
+    SHAPE_DICT,
+    SHAPE_LIST,
+    SHAPE_SINGLETON,
+    ModelField,
+)
+
+from reconcile.status import RunningState
+
+TRUSTED_MODELS_INTEGRATIONS_ENV = "GQL_TRUSTED_MODELS_INTEGRATIONS"
+
+Model = TypeVar("Model", bound=BaseModel)
+
+# values of these types are used as they are
+JSON_TYPES = (str, int, float, bool)
+
+Converter = Callable[[Any], Any]
+
+object_setattr = object.__setattr__
+
+
+class _MismatchError(Exception):
+    """The data doesn't have the shape of the class."""
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _parse_json(value: Any) -> Any:
+    if type(value) is not str:
+        raise _MismatchError
+    try:
+        return json.loads(value)
+    except ValueError:
+        raise _MismatchError from None
+
+
+def _dict(value: Any) -> Any:
+    if type(value) is not dict:
+        raise _MismatchError
+    return value
+
+
+def _mismatch(value: Any) -> Any:
+    raise _MismatchError
+
+
+def _scalar(t: type) -> Converter:
+    def convert(value: Any) -> Any:
+        if type(value) is not t:
+            raise _MismatchError
+        return value
+
+    return convert
+
+
+def _model(model: type[BaseModel]) -> Converter:
+    def convert(value: Any) -> Any:
+        return construct(model, value)
+
+    return convert
+
+
+def _list(item: Converter) -> Converter:
+    def convert(value: Any) -> Any:
+        if type(value) is not list:
+            raise _MismatchError
+        return [item(v) for v in value]
+
+    return convert
+
+
+def _union(members: list[Converter]) -> Converter:
+    def convert(value: Any) -> Any:
+        for member in members:
+            try:
+                return member(value)
+            except (_MismatchError, ValidationError):
+                continue
+        raise _MismatchError
+
+    return convert
+
+
+def _optional(convert_value: Converter) -> Converter:
+    def convert(value: Any) -> Any:
+        return None if value is None else convert_value(value)
+
+    return convert
+
+
+def _converter(field: ModelField) -> Converter:
+    """Converts a JSON value of field, decided once per field instead of on
+    every value."""
+    convert: Converter
+    t = field.type_
+    if field.parse_json:
+        convert = _parse_json if t is Any else _mismatch
+    elif field.shape == SHAPE_LIST:
+        convert = _list(_converter(field.sub_fields[0]))  # type: ignore[index]
+    elif field.shape == SHAPE_DICT:
+        convert = _dict if t is Any else _mismatch
+    elif field.shape != SHAPE_SINGLETON:
+        convert = _mismatch
+    elif field.sub_fields:
+        convert = _union([_converter(member) for member in field.sub_fields])
+    elif t is Any:
+        return _identity
+    elif isinstance(t, type) and issubclass(t, BaseModel):
+        convert = _model(t)
+    elif t in JSON_TYPES:
+        convert = _scalar(t)
+    else:
+        convert = _mismatch
+    return _optional(convert) if field.allow_none else convert
+
+
+@functools.cache
+def _fields(
+    model: type[BaseModel],
+) -> tuple[frozenset[str], list[tuple[str, str, Converter]]]:
+    fields = model.__fields__.values()
+    return frozenset(field.alias for field in fields), [
+        (field.alias, field.name, _converter(field)) for field in fields
+    ]
+
+
+def _build(model: type[Model], data: Any) -> Model:
+    aliases, fields = _fields(model)
+    if type(data) is not dict or data.keys() != aliases:
+        raise _MismatchError
+    values = {name: convert(data[alias]) for alias, name, convert in fields}
+    # what BaseModel.construct does, without looking up defaults and aliases
+    m = model.__new__(model)
+    object_setattr(m, "__dict__", values)
+    object_setattr(m, "__fields_set__", set(values))
+    if model.__private_attributes__:
+        m._init_private_attributes()
+    return m
+
+
+def construct(model: type[Model], data: Any) -> Model:
+    """model built from data, validating only the parts that don't have the
+    shape of model."""
+    try:
+        return _build(model, data)
+    except _MismatchError:
+        return model.parse_obj(data)
+
+
+def trusted_models_enabled(integration: str | None = None) -> bool:
+    integrations = os.environ.get(TRUSTED_MODELS_INTEGRATIONS_ENV, "")
+    enabled = {i.strip() for i in integrations.split(",") if i.strip()}
+    return "all" in enabled or (integration or RunningState().integration) in enabled
+
+
+def query(
+    generated_query: Callable[..., Model],
+    query_func: Callable,
+    **kwargs: Any,
+) -> Model:
+    """
+    Runs the query of a query function generated in reconcile.gql_definitions,
+    like generated_query(query_func, **kwargs) does, but builds the data
+    classes with construct if the running integration uses trusted models.
+    """
+    if not trusted_models_enabled():
+        return generated_query(query_func, **kwargs)
+    model = get_type_hints(generated_query)["return"]
+    definition = generated_query.__globals__["DEFINITION"]
+    raw_data: dict[Any, Any] = query_func(definition, **kwargs)
+    return construct(model, raw_data)